@@ -0,0 +1,169 @@
+"""
+Binary columnar encodings for the forecast API, chosen by content negotiation.
+
+Two encodings are supported besides JSON, each behind an optional dependency:
+- Arrow IPC stream (`application/vnd.apache.arrow.stream`, needs pyarrow):
+  a record batch with `ds` and `y` columns; request parameters (model,
+  periods, ...) go in the query string. Responses carry the forecast table
+  and the remaining JSON fields as the schema metadata key `response`.
+- msgpack (`application/msgpack`, needs msgpack): a map holding the request
+  parameters next to `ds` and `y`, each either raw little-endian bytes
+  (int64 nanoseconds since the epoch, float64 sales) or a plain array.
+  Responses are the JSON body with `forecast` as {column: bytes} and a
+  `dtypes` map giving each column's NumPy dtype.
+
+Clients send a binary body with the matching Content-Type and ask for a
+binary response with Accept. Columns are decoded straight into NumPy arrays,
+so no per-row Python objects are created on either side.
+"""
+
+import numpy as np
+import pandas as pd
+from flask import Response, current_app, request
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MIMETYPE = "application/json"
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_MIMETYPE = "application/msgpack"
+
+ARROW = "arrow"
+MSGPACK = "msgpack"
+
+ENCODINGS = {
+    ARROW_MIMETYPE: ARROW,
+    MSGPACK_MIMETYPE: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+}
+
+MIMETYPES = {ARROW: ARROW_MIMETYPE, MSGPACK: MSGPACK_MIMETYPE}
+
+class UnsupportedEncoding(Exception):
+    """The request body uses a binary encoding whose library isn't installed"""
+
+def available(encoding):
+    """True if the library behind `encoding` is installed"""
+    return {ARROW: pa, MSGPACK: msgpack}[encoding] is not None
+
+def request_encoding():
+    """Encoding of the request body: 'arrow', 'msgpack', or None for JSON"""
+    encoding = ENCODINGS.get(request.mimetype)
+    if encoding is not None and not available(encoding):
+        raise UnsupportedEncoding(f"{request.mimetype} bodies need the optional '{_package(encoding)}' package")
+    return encoding
+
+def response_encoding():
+    """Encoding the client accepts best: 'arrow', 'msgpack', or None for JSON
+
+    Only installed encodings are offered, and JSON wins ties, so clients that
+    send no Accept header (or */*) keep getting JSON.
+    """
+    offers = [JSON_MIMETYPE] + [mimetype for mimetype, encoding in ENCODINGS.items() if available(encoding)]
+    best = request.accept_mimetypes.best_match(offers, default=JSON_MIMETYPE)
+    return ENCODINGS.get(best)
+
+def _package(encoding):
+    return 'pyarrow' if encoding == ARROW else 'msgpack'
+
+# --- Requests ----------------------------------------------------------------
+
+def read_series_request(encoding):
+    """Decode a binary request body into (ds/y DataFrame, parameters dict)"""
+    body = request.get_data()
+    if encoding == ARROW:
+        try:
+            table = pa.ipc.open_stream(body).read_all()
+        except (pa.ArrowInvalid, OSError) as e:
+            raise ValueError(f"Invalid Arrow IPC stream: {e}")
+        missing = [name for name in ('ds', 'y') if name not in table.column_names]
+        if missing:
+            raise ValueError("Data must have 'ds' (date) and 'y' (sales) columns")
+        ds = table.column('ds').to_pandas()
+        y = table.column('y').to_numpy(zero_copy_only=False)
+        params = query_params()
+    else:
+        try:
+            payload = msgpack.unpackb(body, raw=False)
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as e:
+            raise ValueError(f"Invalid msgpack body: {e}")
+        if not isinstance(payload, dict) or 'ds' not in payload or 'y' not in payload:
+            raise ValueError("Data must have 'ds' (date) and 'y' (sales) columns")
+        ds = _unpack_column(payload.pop('ds'), '<i8')
+        y = _unpack_column(payload.pop('y'), '<f8')
+        params = {**payload, **query_params()}
+    return series_frame(ds, y), params
+
+def query_params():
+    """Request parameters from the query string, with numeric ones converted"""
+    params = dict(request.args)
+    try:
+        if 'periods' in params:
+            params['periods'] = int(params['periods'])
+        for name in ('initial', 'step', 'horizon'):
+            if name in params:
+                params[name] = int(params[name])
+    except ValueError:
+        raise ValueError("'periods', 'initial', 'step' and 'horizon' must be whole numbers")
+    return params
+
+def _unpack_column(value, dtype):
+    """A msgpack column: raw little-endian bytes of `dtype`, or an array of values"""
+    if isinstance(value, bytes):
+        if len(value) % np.dtype(dtype).itemsize:
+            raise ValueError(f"Binary column length is not a multiple of {np.dtype(dtype).itemsize} bytes")
+        return np.frombuffer(value, dtype=dtype)
+    if isinstance(value, list):
+        return value
+    raise ValueError("Columns must be binary arrays or lists")
+
+def series_frame(ds, y):
+    """Build a ds/y DataFrame from whole columns, converting each in one vectorized call"""
+    if isinstance(ds, np.ndarray) and ds.dtype.kind in 'iu':
+        ds = ds.astype('int64').view('datetime64[ns]')
+    if not pd.api.types.is_datetime64_any_dtype(ds):
+        try:
+            ds = pd.to_datetime(ds)
+        except (ValueError, TypeError, OverflowError):
+            raise ValueError("Dates must be valid dates")
+    try:
+        y = np.asarray(y, dtype=float)
+    except (ValueError, TypeError):
+        raise ValueError("Sales values must be numeric")
+    if len(ds) != len(y):
+        raise ValueError("'ds' and 'y' must have the same length")
+    return pd.DataFrame({'ds': np.asarray(ds, dtype='datetime64[ns]'), 'y': y})
+
+# --- Responses ---------------------------------------------------------------
+
+def binary_response(fields, frame, key, encoding, status=200):
+    """Encode a response whose `key` field is the table `frame` and the rest is JSON-like `fields`"""
+    # Round-trip the fields through the app's JSON provider so NumPy scalars become plain values
+    provider = current_app.json
+    fields = provider.loads(provider.dumps(fields))
+
+    if encoding == ARROW:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        table = table.replace_schema_metadata({'response': provider.dumps(fields)})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        body = sink.getvalue().to_pybytes()
+    else:
+        columns, dtypes = {}, {}
+        for name in frame.columns:
+            values = frame[name].to_numpy()
+            if values.dtype.kind == 'M':
+                values = values.astype('datetime64[ns]').view('int64')
+            values = values.astype(values.dtype.newbyteorder('<'), copy=False)
+            columns[name] = values.tobytes()
+            dtypes[name] = values.dtype.str
+        body = msgpack.packb({**fields, key: columns, 'dtypes': dtypes}, use_bin_type=True)
+    return Response(body, status=status, mimetype=MIMETYPES[encoding])
@@ -8,19 +8,34 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from flask import Blueprint, request, jsonify
-from App.preprocess import clean_data, validate_data_quality, get_data_insights
+from App.config import MAX_UPLOAD_BYTES, STREAM_THRESHOLD_BYTES
+from App.datasets import dataset_store
+from App.metrics import timed
+from App.persistence import persistence
+from App.stats import series_statistics
+from App.preprocess import (
+    clean_data, clean_csv_stream, read_sales_csv, split_panel, validate_data_quality, get_data_insights
+)
+from http_caching import make_etag, not_modified, upload_fingerprint
+from serializers import COLUMNAR, frame_to_records, response_format, serialize_frame
 
 cleaning_bp = Blueprint("cleaning", __name__)
 
-def validate_file_size(file):
-    """Check if file size is reasonable"""
+def get_file_size(file):
+    """Return the size of an uploaded file in bytes"""
     file.seek(0, 2)  # Go to end of file
     size = file.tell()
     file.seek(0)  # Go back to start
-    
-    if size > 10 * 1024 * 1024:  # 10MB limit
-        return False
-    return True
+    return size
+
+def validate_file_size(file):
+    """Check if file size is within the configured upload limit"""
+    return get_file_size(file) <= MAX_UPLOAD_BYTES
+
+def in_memory_limit_error():
+    """Error for uploads too large to clean in memory; only resampled (freq=...) uploads are streamed"""
+    return (f"File too large to clean in memory (max {STREAM_THRESHOLD_BYTES // (1024 * 1024)}MB); "
+            "pass freq to stream it")
 
 def validate_csv_structure(file):
     """Check if file looks like a CSV with sales data"""
@@ -42,6 +57,120 @@ def validate_csv_structure(file):
     except:
         return False
 
+def resampling_report(freq, agg, fill, rows_before, rows_after):
+    """Describe how much resampling shrank the upload"""
+    return {
+        'freq': freq,
+        'agg': agg,
+        'fill': fill,
+        'rows_before': rows_before,
+        'rows_after': rows_after,
+        'reduction': round(1 - rows_after / rows_before, 3) if rows_before else 0.0
+    }
+
+def wants_data():
+    """False when the client only needs the dataset id and insights, not the cleaned rows back"""
+    flag = request.args.get('include_data', request.form.get('include_data', '1'))
+    return str(flag).lower() not in ('0', 'false', 'no')
+
+def store_dataset(cleaned_df, meta=None, key=None):
+    """Keep the cleaned series for /clean/append; None if it can't be stored"""
+    try:
+        with timed('store_dataset', rows=len(cleaned_df)):
+            return dataset_store.create(cleaned_df, meta, key=key)
+    except (OSError, ValueError):
+        return None
+
+def dataset_etag(upload_key, dataset_id):
+    """ETag of a /clean response that created a dataset: the upload and options plus that dataset
+
+    None when nothing was stored, so the response isn't revalidated into a
+    dataset_id that never existed.
+    """
+    return make_etag(upload_key, dataset_id) if dataset_id else None
+
+def revalidate_upload(upload_key):
+    """A 304 if the client holds the response for this upload and its dataset is still stored, else None
+
+    Finding the dataset counts as a use of it, so it stays as long as clients
+    keep revalidating.
+    """
+    if not request.if_none_match:
+        return None
+    dataset_id = dataset_store.find(upload_key)
+    return not_modified(dataset_etag(upload_key, dataset_id)) if dataset_id else None
+
+def record_upload(upload, cleaned_df, quality_info, pattern_info, dataset_id):
+    """Queue the upload for the uploads table; the database write happens on a background thread"""
+    if persistence is None or upload is None:
+        return
+    persistence.record_upload(
+        id=dataset_id,
+        cleaned_rows=len(cleaned_df),
+        data_quality_issues=quality_info['issues'],
+        data_insights=quality_info['insights'],
+        pattern_insights=pattern_info,
+        **upload
+    )
+
+def build_clean_response(cleaned_df, fmt, message, aggregated=False, resampling=None, stats=None, extra=None, etag=None,
+                         upload=None):
+    """Attach quality and pattern insights to cleaned data and serialize it
+
+    `stats` overrides the statistics of `cleaned_df`, e.g. with those of the
+    whole stored dataset `cleaned_df` was appended to; `extra` adds fields
+    to the response. With `include_data=0` the rows are left out and
+    `data` is null: clients that forecast by dataset id never need them.
+    `etag` becomes the response's ETag. `upload` (file_name, file_size,
+    original_rows) describes a new upload to persist.
+    """
+    rows = len(cleaned_df)
+    
+    # One statistics pass feeds both the quality checks and the pattern insights
+    if stats is None:
+        with timed('series_statistics', rows=rows):
+            stats = series_statistics(cleaned_df)
+    
+    # Get data quality information
+    with timed('validate_data_quality', rows=rows):
+        quality_info = validate_data_quality(cleaned_df, stats)
+    with timed('get_data_insights', rows=rows):
+        pattern_info = get_data_insights(cleaned_df, stats)
+    
+    # Columnar layout sends the metadata once; the legacy row layout repeats it per row
+    with timed('serialize', rows=rows):
+        if not wants_data():
+            data = None
+        elif fmt == COLUMNAR:
+            data = serialize_frame(cleaned_df, fmt)
+        else:
+            data = frame_to_records(cleaned_df, extra={
+                '_quality_issues': quality_info['issues'],
+                '_data_insights': quality_info['insights'],
+                '_pattern_insights': pattern_info
+            })
+    
+    response = {
+        "success": True,
+        "format": fmt,
+        "data": data,
+        "aggregated": aggregated,
+        "date_format": cleaned_df.attrs.get('date_format'),
+        "message": message,
+        "quality_issues": quality_info['issues'],
+        "data_insights": quality_info['insights'],
+        "pattern_insights": pattern_info
+    }
+    if resampling:
+        response['resampling'] = resampling
+    response.update(extra or {})
+    record_upload(upload, cleaned_df, quality_info, pattern_info, response.get('dataset_id'))
+    
+    response = jsonify(response)
+    if etag:
+        response.set_etag(etag)
+    return response
+
 @cleaning_bp.route("/", methods=["POST"])
 def clean_csv():
     """Clean and validate uploaded CSV file"""
@@ -59,48 +188,166 @@ def clean_csv():
     
     # Validate file size
     if not validate_file_size(file):
-        return jsonify({"error": "File too large (max 10MB)"}), 400
+        return jsonify({"error": f"File too large (max {MAX_UPLOAD_BYTES // (1024 * 1024)}MB)"}), 400
     
     # Validate CSV structure
     if not validate_csv_structure(file):
         return jsonify({"error": "Invalid CSV format"}), 400
     
     try:
-        # Read CSV file
-        df = pd.read_csv(file)
+        fmt = response_format()
+        group_by = request.form.get('group_by')
+        
+        # Optional resampling onto a regular daily/weekly/monthly grid
+        freq = request.form.get('freq')
+        agg = request.form.get('agg', 'sum')
+        fill = request.form.get('fill', 'zero')
+        
+        # Only resampled series uploads are cleaned in chunks; anything else above the streaming threshold
+        # would be read, cleaned and serialized whole, so it is refused before any of that happens
+        file_size = get_file_size(file)
+        streamed = file_size > STREAM_THRESHOLD_BYTES
+        if streamed and (not freq or group_by):
+            return jsonify({"error": in_memory_limit_error()}), 413
+        
+        # Re-sending the same file with the same options revalidates instead of re-cleaning. A 304 keeps
+        # the client's earlier body, so outside panels it needs that body's dataset to still be stored.
+        upload_key = make_etag('clean', upload_fingerprint(file), group_by, freq, agg, fill, fmt, wants_data())
+        unchanged = not_modified(upload_key) if group_by else revalidate_upload(upload_key)
+        if unchanged is not None:
+            return unchanged
+        
+        # Large resampled uploads are streamed in chunks, so the response shape and date handling are the
+        # same as clean_data(freq=...) on a small file while peak memory stays bounded by CSV_CHUNK_ROWS
+        if streamed:
+            # Per-day sums and counts are rolled up to `freq` inside the stream, so means stay row-weighted
+            with timed('read_csv'):
+                cleaned_df, rows_read = clean_csv_stream(file.stream, freq=freq, agg=agg, fill=fill)
+            dataset_id = store_dataset(cleaned_df, {'freq': freq, 'agg': agg, 'fill': fill}, key=upload_key)
+            return build_clean_response(
+                cleaned_df, fmt,
+                f"Successfully cleaned {rows_read} rows into {len(cleaned_df)} {freq} periods",
+                aggregated=True,
+                resampling=resampling_report(freq, agg, fill, rows_read, len(cleaned_df)),
+                extra={'dataset_id': dataset_id}, etag=dataset_etag(upload_key, dataset_id),
+                upload={'file_name': file.filename, 'file_size': file_size, 'original_rows': rows_read}
+            )
+        
+        # Read only the date and sales columns (plus any grouping columns)
+        group_cols = [col.strip() for col in group_by.split(',') if col.strip()] if group_by else None
+        with timed('read_csv'):
+            df = read_sales_csv(file, extra_columns=group_cols)
         
         if len(df) == 0:
             return jsonify({"error": "CSV file is empty"}), 400
         
+        # Optional per-product/store panel: comma-separated grouping columns
+        if group_cols:
+            with timed('clean_data', rows=len(df)):
+                panel = clean_data(df, group_by=group_cols)
+            with timed('serialize', rows=len(panel)):
+                series = {
+                    series_id: serialize_frame(frame, fmt)
+                    for series_id, frame in split_panel(panel).items()
+                }
+            response = jsonify({
+                "success": True,
+                "format": fmt,
+                "series": series,
+                "series_count": len(series),
+                "message": f"Successfully cleaned {len(panel)} rows into {len(series)} series"
+            })
+            response.set_etag(upload_key)
+            return response
+        
         # Clean the data
-        cleaned_df = clean_data(df)
-        
-        # Get data quality information
-        quality_info = validate_data_quality(cleaned_df)
-        pattern_info = get_data_insights(cleaned_df)
-        
-        # Convert to list of dictionaries for JSON response
-        data_list = []
-        for _, row in cleaned_df.iterrows():
-            data_dict = {
-                'ds': row['ds'].strftime('%Y-%m-%d'),
-                'y': float(row['y']),
-                '_quality_issues': quality_info['issues'],
-                '_data_insights': quality_info['insights'],
-                '_pattern_insights': pattern_info
-            }
-            data_list.append(data_dict)
-        
-        return jsonify({
-            "success": True,
-            "data": data_list,
-            "message": f"Successfully cleaned {len(data_list)} rows of data",
-            "quality_issues": quality_info['issues'],
-            "data_insights": quality_info['insights'],
-            "pattern_insights": pattern_info
-        })
+        with timed('clean_data', rows=len(df)):
+            cleaned_df = clean_data(df, freq=freq, agg=agg, fill=fill)
+        upload = {'file_name': file.filename, 'file_size': file_size, 'original_rows': len(df)}
+        
+        if freq:
+            dataset_id = store_dataset(cleaned_df, {'freq': freq, 'agg': agg, 'fill': fill}, key=upload_key)
+            return build_clean_response(
+                cleaned_df, fmt,
+                f"Successfully cleaned {len(df)} rows into {len(cleaned_df)} {freq} periods",
+                aggregated=True,
+                resampling=resampling_report(freq, agg, fill, len(df), len(cleaned_df)),
+                extra={'dataset_id': dataset_id}, etag=dataset_etag(upload_key, dataset_id), upload=upload
+            )
+        
+        dataset_id = store_dataset(cleaned_df, key=upload_key)
+        return build_clean_response(cleaned_df, fmt, f"Successfully cleaned {len(cleaned_df)} rows of data",
+                                    extra={'dataset_id': dataset_id}, etag=dataset_etag(upload_key, dataset_id),
+                                    upload=upload)
         
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
-        return jsonify({"error": f"Error processing file: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"Error processing file: {str(e)}"}), 500
+
+def append_rows_frame():
+    """Clean the new rows of an append request; the store resamples them onto the dataset's grid"""
+    if 'file' in request.files:
+        file = request.files['file']
+        if not validate_file_size(file):
+            raise ValueError(f"File too large (max {MAX_UPLOAD_BYTES // (1024 * 1024)}MB)")
+        # Appended rows are always cleaned in memory
+        if get_file_size(file) > STREAM_THRESHOLD_BYTES:
+            raise ValueError(in_memory_limit_error())
+        if not validate_csv_structure(file):
+            raise ValueError("Invalid CSV format")
+        with timed('read_csv'):
+            df = read_sales_csv(file)
+        if len(df) == 0:
+            raise ValueError("CSV file is empty")
+        with timed('clean_data', rows=len(df)):
+            return clean_data(df)
+    
+    # JSON body: {"dataset_id": ..., "data": [{"ds": ..., "y": ...}, ...]}
+    body = request.get_json(silent=True) or {}
+    rows = body.get('data')
+    if not rows:
+        raise ValueError("No rows to append")
+    if not all(isinstance(row, dict) and 'ds' in row and 'y' in row for row in rows):
+        raise ValueError("Data must have 'ds' (date) and 'y' (sales) columns")
+    with timed('clean_data', rows=len(rows)):
+        df = pd.DataFrame(rows)[['ds', 'y']].rename(columns={'ds': 'Date', 'y': 'Sales'})
+        return clean_data(df)
+
+@cleaning_bp.route("/append", methods=["POST"])
+def append_rows():
+    """Append new rows to a stored dataset and return the updated insights"""
+    body = request.get_json(silent=True) if request.is_json else None
+    dataset_id = request.form.get('dataset_id') or (body or {}).get('dataset_id')
+    if not dataset_id:
+        return jsonify({"error": "dataset_id is required"}), 400
+    
+    try:
+        fmt = response_format()
+        meta = dataset_store.meta(dataset_id)
+        if meta is None:
+            return jsonify({"error": f"Unknown dataset: {dataset_id}"}), 404
+        
+        new_rows = append_rows_frame()
+        resample = {key: meta[key] for key in ('freq', 'agg', 'fill') if key in meta} if meta.get('freq') else None
+        with timed('append_dataset', rows=len(new_rows)):
+            appended = dataset_store.append(dataset_id, new_rows, resample)
+        if appended is None:
+            return jsonify({"error": f"Unknown dataset: {dataset_id}"}), 404
+        stats, written = appended
+        
+        # `written` starts with the stored last period when new rows were added to it
+        rows_appended = len(written) - written.attrs['updated_last']
+        written.attrs.update(new_rows.attrs)
+        return build_clean_response(
+            written, fmt,
+            f"Appended {rows_appended} rows; the dataset now has {stats['rows']} rows",
+            aggregated=bool(resample), stats=stats,
+            extra={'dataset_id': dataset_id, 'rows_appended': rows_appended, 'total_rows': stats['rows'],
+                   'updated_last_period': written.attrs['updated_last']}
+        )
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Error appending rows: {str(e)}"}), 500
@@ -2,12 +2,23 @@
 Blueprint handling the /forecast endpoint.
 """
 
+import numpy as np
 import pandas as pd
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from flask import Blueprint, request, jsonify
-from App.forecast import run_forecast
+from flask import Blueprint, request, jsonify, url_for
+from App.backtest import backtest
+from App.forecast import MODEL_CHOICES, run_forecast_batch, run_forecast_cached
+from App.cache import fingerprint_series, forecast_cache
+from App.config import FIT_MEMORY_LIMIT_MB, FIT_TIMEOUT_SECONDS
+from App.datasets import dataset_store
+from App.jobs import job_queue
+from App.metrics import timed
+from App.persistence import persistence
+from binary_formats import UnsupportedEncoding, binary_response, read_series_request, request_encoding, response_encoding
+from http_caching import make_etag, not_modified
+from serializers import response_format, serialize_frame
 
 forecast_bp = Blueprint("forecast", __name__)
 
@@ -30,60 +41,318 @@ def validate_forecast_data(data):
     
     return True, ""
 
+def validate_forecast_frame(df):
+    """`validate_forecast_data` for a ds/y DataFrame, checked column-wise"""
+    if len(df) < 5:
+        return False, "Need at least 5 data points for forecasting"
+    if df['ds'].isna().any():
+        return False, "Dates must be valid dates"
+    y = df['y'].to_numpy(dtype=float)
+    if not np.isfinite(y).all():
+        return False, "Sales values must be numeric"
+    if y.min() == y.max():
+        return False, "All sales values are identical - cannot forecast"
+    return True, ""
+
+def validated_frame(df):
+    """Return `df` if it can be forecast, else raise ValueError"""
+    with timed('validate', rows=len(df)):
+        is_valid, error_msg = validate_forecast_frame(df)
+    if not is_valid:
+        raise ValueError(error_msg)
+    return df
+
+def records_to_frame(data):
+    """Build a ds/y DataFrame from a list of row dicts"""
+    df = pd.DataFrame(data)
+    df['ds'] = pd.to_datetime(df['ds'])
+    df['y'] = pd.to_numeric(df['y'])
+    return df
+
+def request_series(request_data):
+    """The series a request forecasts: the stored dataset named by 'dataset_id', or the posted 'data' rows
+
+    Raises LookupError for an unknown or expired dataset and ValueError for
+    data that can't be forecast.
+    """
+    dataset_id = request_data.get('dataset_id')
+    if dataset_id:
+        with timed('load_dataset'):
+            df = dataset_store.load(dataset_id)
+        if df is None:
+            raise LookupError(f"Unknown or expired dataset: {dataset_id}")
+        return validated_frame(df)
+    
+    data = request_data.get('data', [])
+    with timed('validate', rows=len(data)):
+        is_valid, error_msg = validate_forecast_data(data)
+    if not is_valid:
+        raise ValueError(error_msg)
+    
+    # Convert to DataFrame
+    with timed('parse', rows=len(data)):
+        return records_to_frame(data)
+
+FORECAST_COLUMNS = ['ds', 'yhat', 'yhat_lower', 'yhat_upper', 'low_confidence']
+
+def serialize_forecast(forecast_df, fmt):
+    """Serialize the public forecast columns in the requested layout"""
+    return serialize_frame(forecast_df[FORECAST_COLUMNS], fmt)
+
+def wants_async(request_data):
+    """Return True if the client asked for the forecast to run as a background job"""
+    flag = request.args.get('async', request_data.get('async', False))
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+def fit_timeout(request_data):
+    """Per-request fit deadline in seconds, never above the server's FIT_TIMEOUT_SECONDS"""
+    timeout = request_data.get('timeout')
+    if timeout is None:
+        return FIT_TIMEOUT_SECONDS
+    try:
+        timeout = float(timeout)
+    except (TypeError, ValueError):
+        raise ValueError("'timeout' must be a number of seconds")
+    if timeout <= 0:
+        raise ValueError("'timeout' must be positive")
+    return min(timeout, FIT_TIMEOUT_SECONDS) if FIT_TIMEOUT_SECONDS else timeout
+
+def record_forecast(result, df, forecast_days, upload_id=None):
+    """Queue the forecast for the forecasts table; serialization and the write happen on a background thread"""
+    if persistence is None:
+        return
+    persistence.record_forecast(
+        forecast=result['forecast'],
+        insights=result['insights'],
+        low_confidence=result['low_confidence'],
+        forecast_periods=forecast_days,
+        data_points_used=len(df),
+        upload_id=upload_id
+    )
+
+def build_forecast_response(result, cached, fmt, include_forecast=True):
+    """Serialize a run_forecast result the same way for sync requests and finished jobs"""
+    response = {"success": True, "format": fmt}
+    if include_forecast:
+        with timed('serialize', rows=len(result['forecast'])):
+            response["forecast"] = serialize_forecast(result['forecast'], fmt)
+    
+    response.update({
+        "message": f"Successfully generated {len(result['forecast'])} days of forecasts",
+        "insights": result['insights'],
+        "cached": cached
+    })
+    
+    # Add warning if confidence is low
+    if result['low_confidence']:
+        response['warning'] = "Forecast confidence is low due to limited data"
+    
+    return response
+
+def forecast_etag(df, model_choice, forecast_days, fmt):
+    """Strong ETag of a forecast: the series fingerprint plus everything else that shapes the response"""
+    return make_etag('forecast', fingerprint_series(df), model_choice, forecast_days, fmt, response_encoding())
+
+def forecast_response(result, cached, fmt, etag=None, **extra):
+    """The forecast response as JSON, or in the binary encoding the client's Accept header prefers"""
+    encoding = response_encoding()
+    if encoding is None:
+        fields = build_forecast_response(result, cached, fmt)
+        fields.update(extra)
+        response = jsonify(fields)
+    else:
+        fields = build_forecast_response(result, cached, fmt, include_forecast=False)
+        fields.update(extra)
+        with timed('serialize', rows=len(result['forecast'])):
+            response = binary_response(fields, result['forecast'][FORECAST_COLUMNS], 'forecast', encoding)
+    
+    # The body depends on Accept, so shared caches must key on it
+    response.vary.add('Accept')
+    if etag:
+        response.set_etag(etag)
+    return response
+
 @forecast_bp.route("/", methods=["POST"])
 def generate_forecast():
     """Generate sales forecast from cleaned data"""
     
     try:
-        # Get request data
+        # Binary columnar bodies (Arrow, msgpack) carry the columns and parameters together
+        encoding = request_encoding()
+        if encoding:
+            with timed('parse'):
+                df, request_data = read_series_request(encoding)
+            df = validated_frame(df)
+        else:
+            # Get request data
+            request_data = request.get_json()
+            
+            if not request_data:
+                return jsonify({"error": "No data provided"}), 400
+            
+            # A stored dataset (by id) or the posted rows, validated
+            df = request_series(request_data)
+        
+        model_choice = request_data.get('model', 'auto')
+        forecast_days = request_data.get('periods', 7)
+        fmt = response_format()
+        timeout = fit_timeout(request_data)
+        
+        # Long fits can run in the background; the client polls the job URL.
+        # The finished forecast is persisted just like a synchronous one.
+        if wants_async(request_data):
+            dataset_id = request_data.get('dataset_id')
+            job_id = job_queue.submit(
+                run_forecast_cached, df, model_choice, forecast_days, timeout, FIT_MEMORY_LIMIT_MB,
+                on_result=lambda outcome: record_forecast(outcome[0], df, forecast_days, dataset_id)
+            )
+            return jsonify({
+                "success": True,
+                "job_id": job_id,
+                "status": "queued",
+                "status_url": url_for("forecast.forecast_job", job_id=job_id, format=fmt)
+            }), 202
+        
+        # A client that already holds this exact forecast gets a 304 without a refit
+        etag = forecast_etag(df, model_choice, forecast_days, fmt)
+        unchanged = not_modified(etag)
+        if unchanged is not None:
+            return unchanged
+        
+        # Generate forecast, reusing a cached result for the same series, model and horizon.
+        # Slow models fit in a supervised child process so a runaway fit can't take the worker down.
+        model_label = model_choice if model_choice in MODEL_CHOICES else 'unknown'
+        with timed('forecast', model_label, len(df)):
+            result, cached = run_forecast_cached(df, model_choice, forecast_days, timeout, FIT_MEMORY_LIMIT_MB)
+        
+        record_forecast(result, df, forecast_days, request_data.get('dataset_id'))
+        
+        # Fallback results stand in for the requested model, so they get no validator
+        if 'fallback' in result['insights']:
+            etag = None
+        return forecast_response(result, cached, fmt, etag=etag)
+        
+    except UnsupportedEncoding as e:
+        return jsonify({"error": str(e)}), 415
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Error generating forecast: {str(e)}"}), 500
+
+@forecast_bp.route("/batch", methods=["POST"])
+def generate_batch_forecast():
+    """Generate forecasts for many named series in one request"""
+    
+    try:
         request_data = request.get_json()
         
-        if not request_data:
-            return jsonify({"error": "No data provided"}), 400
+        if not request_data or not request_data.get('series'):
+            return jsonify({"error": "No series provided"}), 400
+        
+        series_data = request_data['series']
+        if not isinstance(series_data, dict):
+            return jsonify({"error": "'series' must map series names to lists of rows"}), 400
         
-        data = request_data.get('data', [])
         model_choice = request_data.get('model', 'auto')
         forecast_days = request_data.get('periods', 7)
+        fmt = response_format()
         
-        # Validate input data
-        is_valid, error_msg = validate_forecast_data(data)
-        if not is_valid:
-            return jsonify({"error": error_msg}), 400
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(data)
-        df['ds'] = pd.to_datetime(df['ds'])
-        df['y'] = pd.to_numeric(df['y'])
-        
-        # Generate forecast
-        result = run_forecast(df, model_choice, forecast_days)
-        
-        # Convert forecast to list of dictionaries
-        forecast_list = []
-        for _, row in result['forecast'].iterrows():
-            forecast_dict = {
-                'ds': row['ds'].strftime('%Y-%m-%d'),
-                'yhat': float(row['yhat']),
-                'yhat_lower': float(row['yhat_lower']),
-                'yhat_upper': float(row['yhat_upper']),
-                'low_confidence': bool(row['low_confidence'])
-            }
-            forecast_list.append(forecast_dict)
+        # Validate each series on its own so one bad series doesn't reject the batch
+        errors = {}
+        series = {}
+        for name, data in series_data.items():
+            is_valid, error_msg = validate_forecast_data(data)
+            if not is_valid:
+                errors[name] = error_msg
+                continue
+            try:
+                series[name] = records_to_frame(data)
+            except (ValueError, TypeError) as e:
+                errors[name] = str(e)
         
-        response = {
-            "success": True,
-            "forecast": forecast_list,
-            "message": f"Successfully generated {len(forecast_list)} days of forecasts",
-            "insights": result['insights']
-        }
+        batch = run_forecast_batch(series, model_choice, forecast_days)
+        errors.update(batch['errors'])
         
-        # Add warning if confidence is low
-        if result['low_confidence']:
-            response['warning'] = "Forecast confidence is low due to limited data"
+        results = {}
+        for name, result in batch['results'].items():
+            record_forecast(result, series[name], forecast_days)
+            results[name] = {
+                "forecast": serialize_forecast(result['forecast'], fmt),
+                "insights": result['insights'],
+                "low_confidence": bool(result['low_confidence'])
+            }
         
-        return jsonify(response)
+        return jsonify({
+            "success": len(errors) == 0,
+            "format": fmt,
+            "results": results,
+            "errors": errors,
+            "message": f"Forecast {len(results)} of {len(series_data)} series"
+        })
         
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
-        return jsonify({"error": f"Error generating forecast: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"Error generating batch forecast: {str(e)}"}), 500
+
+@forecast_bp.route("/backtest", methods=["POST"])
+def run_backtest():
+    """Score a model with rolling-origin cross-validation on the posted series"""
+    
+    try:
+        request_data = request.get_json()
+        
+        if not request_data:
+            return jsonify({"error": "No data provided"}), 400
+        
+        result = backtest(
+            request_series(request_data),
+            model_choice=request_data.get('model', 'auto'),
+            initial=request_data.get('initial'),
+            step=request_data.get('step'),
+            horizon=request_data.get('horizon', 7)
+        )
+        
+        return jsonify({
+            "success": result['metrics']['failed_folds'] == 0,
+            **result,
+            "message": f"Backtested {len(result['folds'])} folds of {result['horizon']} periods"
+        })
+        
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 404
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Error running backtest: {str(e)}"}), 500
+
+@forecast_bp.route("/jobs/<job_id>", methods=["GET"])
+def forecast_job(job_id):
+    """Report the status of a background forecast job, with its result once done"""
+    
+    try:
+        fmt = response_format()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    
+    if job['status'] == 'done':
+        result, cached = job['result']
+        return forecast_response(result, cached, fmt, job_id=job_id, status=job['status'])
+    elif job['status'] == 'failed':
+        response = {"success": False, "error": f"Error generating forecast: {job['error']}"}
+    else:
+        response = {"success": True}
+    
+    response.update(job_id=job_id, status=job['status'])
+    return jsonify(response)
+
+@forecast_bp.route("/cache", methods=["GET"])
+def cache_stats():
+    """Report forecast cache hit/miss counters"""
+    return jsonify(forecast_cache.stats())
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+Response compression and conditional requests for the clean and forecast results.
+
+- `compress_response()` – an after-request hook that gzip- or brotli-encodes
+  bodies above COMPRESSION_MIN_BYTES when the client's Accept-Encoding
+  allows it (brotli only if the optional `brotli` package is installed)
+- `make_etag()` – a strong ETag from the request's inputs: the series or
+  upload fingerprint plus every parameter that changes the result
+- `not_modified()` – a 304 response when If-None-Match already names that
+  ETag, so unchanged results skip the refit and the transfer
+
+Compressed responses get the coding appended to their ETag ("<tag>-gzip"),
+since a strong validator must differ between representations;
+`not_modified()` accepts any of the variants back.
+"""
+
+import gzip
+import hashlib
+import os
+import sys
+
+from flask import Response, request
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from App.config import (
+    COMPRESSION_BROTLI_QUALITY, COMPRESSION_ENABLED, COMPRESSION_GZIP_LEVEL, COMPRESSION_MIN_BYTES
+)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies worth compressing; everything else (and anything already encoded) is sent as is
+COMPRESSIBLE_MIMETYPES = (
+    "application/json",
+    "application/msgpack",
+    "application/vnd.apache.arrow.stream",
+    "text/plain",
+    "text/csv",
+)
+
+def make_etag(*parts):
+    """Strong ETag value (unquoted) for a result determined entirely by `parts`"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def upload_fingerprint(file, chunk_size=1024 * 1024):
+    """Hash an uploaded file's bytes without loading it all, then rewind it"""
+    digest = hashlib.blake2b(digest_size=16)
+    file.seek(0)
+    for chunk in iter(lambda: file.read(chunk_size), b''):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+def etag_variants(etag):
+    return [etag, f"{etag}-gzip", f"{etag}-br"]
+
+def not_modified(etag):
+    """A 304 response if the client's If-None-Match names `etag` (in any encoding), else None"""
+    if not any(request.if_none_match.contains(tag) for tag in etag_variants(etag)):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    return response
+
+def preferred_encoding():
+    """'br', 'gzip' or None, by the client's Accept-Encoding quality values"""
+    accepted = request.accept_encodings
+    offers = (['br'] if brotli is not None else []) + ['gzip']
+    return accepted.best_match(offers)
+
+def compress_response(response):
+    """Compress a finished response in place when it is large enough and the client accepts it"""
+    if not COMPRESSION_ENABLED or response.direct_passthrough:
+        return response
+    if response.status_code < 200 or response.status_code in (204, 304):
+        return response
+    if 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < COMPRESSION_MIN_BYTES:
+        return response
+
+    encoding = preferred_encoding()
+    if encoding is None:
+        return response
+    if encoding == 'br':
+        response.set_data(brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY))
+    else:
+        response.set_data(gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0))
+    response.headers['Content-Encoding'] = encoding
+
+    # A strong validator names one representation: tag the compressed one separately
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
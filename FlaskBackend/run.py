@@ -1,11 +1,19 @@
-from flask import Flask
+import time
+from flask import Flask, Response, g, request
 from flask_cors import CORS
 from cleaning_routes import cleaning_bp
 from forecast_routes import forecast_bp
+from App.config import MAX_UPLOAD_BYTES, METRICS_ENABLED
+from App.metrics import REQUEST_SECONDS, render
+from App.persistence import persistence
+from http_caching import compress_response
 
 def create_app():
     app = Flask(__name__)
     
+    # Reject oversized uploads before they are read (leave room for multipart overhead)
+    app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES + 1024 * 1024
+    
     # Enable CORS
     CORS(app)
     
@@ -16,7 +24,37 @@ def create_app():
     # Health check endpoint
     @app.route("/health")
     def health_check():
-        return {"status": "healthy", "message": "Sales Forecasting API is running"}
+        health = {"status": "healthy", "message": "Sales Forecasting API is running"}
+        if persistence is not None:
+            # Queued, written, dropped and failed upload/forecast records in this worker
+            health["persistence"] = persistence.stats()
+        return health
+    
+    # Request latency and per-stage timings in the Prometheus text format
+    if METRICS_ENABLED:
+        @app.before_request
+        def start_timer():
+            g.request_started = time.perf_counter()
+        
+        @app.after_request
+        def record_latency(response):
+            started = g.pop('request_started', None)
+            if started is not None:
+                # Label by route pattern, not path, so job ids don't create new series
+                endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+                REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint,
+                                        method=request.method, status=response.status_code)
+            return response
+    
+    # gzip/brotli for large JSON and binary bodies (registered last so it runs first
+    # and the latency histogram includes compression)
+    app.after_request(compress_response)
+    
+    @app.route("/metrics")
+    def metrics():
+        if not METRICS_ENABLED:
+            return {"error": "Metrics are disabled (FORECAST_METRICS_ENABLED=0)"}, 404
+        return Response(render(), mimetype="text/plain; version=0.0.4")
     
     return app
 
@@ -2,23 +2,140 @@ from marshmallow import Schema, fields
 
 class CleanRequestSchema(Schema):
     file = fields.Raw(required=True, metadata={"description": "CSV file to clean"})
+    group_by = fields.String(metadata={"description": "Comma-separated columns to split into one series per group"})
+    freq = fields.String(metadata={"description": "Resample to daily, weekly or monthly periods"})
+    agg = fields.String(metadata={"description": "How to combine rows per period: sum (default) or mean"})
+    fill = fields.String(metadata={"description": "Missing periods: zero (default), ffill, interpolate or drop"})
+    include_data = fields.Boolean(metadata={"description": "Send the cleaned rows back (default true); false returns only the dataset id and insights"})
 
 class CleanResponseSchema(Schema):
     success = fields.Boolean(required=True)
-    data = fields.List(fields.Dict(), required=True)
+    format = fields.String(metadata={"description": "Layout of data: records (default) or columnar"})
+    data = fields.Raw(required=True, allow_none=True,
+                      metadata={"description": "List of row dicts, or {column: [values]} when columnar; null with include_data=false"})
+    aggregated = fields.Boolean(metadata={"description": "True when rows were aggregated per period"})
+    resampling = fields.Dict(metadata={"description": "Frequency, aggregation, fill policy and rows before/after"})
+    date_format = fields.String(allow_none=True, metadata={"description": "strftime format inferred for the date column"})
     message = fields.String(required=True)
     quality_issues = fields.List(fields.String())
     data_insights = fields.Dict()
     pattern_insights = fields.Dict()
+    dataset_id = fields.String(allow_none=True, metadata={"description": "Stored dataset to forecast by id or extend with /clean/append"})
+
+class CleanAppendRequestSchema(Schema):
+    dataset_id = fields.String(required=True, metadata={"description": "Id returned by /clean"})
+    file = fields.Raw(metadata={"description": "CSV file with only the new rows"})
+    data = fields.List(fields.Dict(), metadata={"description": "New rows as ds/y dicts, instead of a file"})
+
+class CleanAppendResponseSchema(CleanResponseSchema):
+    data = fields.Raw(required=True, metadata={"description": "The appended rows, cleaned"})
+    rows_appended = fields.Integer(required=True)
+    total_rows = fields.Integer(required=True)
+    quality_issues = fields.List(fields.String(), metadata={"description": "Issues across the whole updated dataset"})
+    data_insights = fields.Dict(metadata={"description": "Insights across the whole updated dataset"})
+
+class CleanPanelResponseSchema(Schema):
+    success = fields.Boolean(required=True)
+    format = fields.String()
+    series = fields.Dict(keys=fields.String(), values=fields.Raw(), required=True,
+                         metadata={"description": "Series id mapped to its cleaned rows, ready for /forecast/batch"})
+    series_count = fields.Integer(required=True)
+    message = fields.String(required=True)
 
 class ForecastRequestSchema(Schema):
-    data = fields.List(fields.Dict(), required=True, metadata={"description": "Cleaned data for forecasting"})
-    model = fields.String(metadata={"description": "Model to use (auto, linear, prophet)"})
+    data = fields.List(fields.Dict(), metadata={"description": "Cleaned data for forecasting (or dataset_id)"})
+    dataset_id = fields.String(metadata={"description": "Forecast a dataset stored by /clean instead of posting data"})
+    model = fields.String(metadata={"description": "Model to use (auto, linear, lag, ets, prophet)"})
     periods = fields.Integer(metadata={"description": "Number of periods to forecast"})
+    format = fields.String(metadata={"description": "Response layout: records (default) or columnar"})
+    # Python keyword, so the attribute is named async_ and mapped to "async"
+    async_ = fields.Boolean(data_key="async", metadata={"description": "Run as a background job (also ?async=1)"})
+    timeout = fields.Float(metadata={"description": "Fit deadline in seconds (capped by the server); Prophet falls back to linear after it"})
 
 class ForecastResponseSchema(Schema):
     success = fields.Boolean(required=True)
-    forecast = fields.List(fields.Dict(), required=True)
+    format = fields.String(metadata={"description": "Layout of forecast: records (default) or columnar"})
+    forecast = fields.Raw(required=True, metadata={"description": "List of row dicts, or {column: [values]} when columnar"})
     message = fields.String(required=True)
     insights = fields.Dict()
-    warning = fields.String()
\ No newline at end of file
+    warning = fields.String()
+    cached = fields.Boolean(metadata={"description": "True when served from the forecast cache"})
+
+# Binary columnar encodings of /forecast (see binary_formats.py). Request parameters
+# are the ForecastRequestSchema fields other than data/dataset_id/format.
+
+class ForecastMsgpackRequestSchema(Schema):
+    ds = fields.Raw(required=True, metadata={"description": "Little-endian int64 nanoseconds since the epoch as bytes, or an array of dates"})
+    y = fields.Raw(required=True, metadata={"description": "Little-endian float64 sales as bytes, or an array of numbers"})
+    model = fields.String(metadata={"description": "Model to use (auto, linear, lag, ets, prophet)"})
+    periods = fields.Integer(metadata={"description": "Number of periods to forecast"})
+    async_ = fields.Boolean(data_key="async", metadata={"description": "Run as a background job (also ?async=1)"})
+    timeout = fields.Float(metadata={"description": "Fit deadline in seconds (capped by the server)"})
+
+class ForecastArrowRequestSchema(Schema):
+    ds = fields.Raw(required=True, metadata={"description": "Arrow timestamp, date or string column"})
+    y = fields.Raw(required=True, metadata={"description": "Arrow numeric column"})
+    model = fields.String(metadata={"description": "Query parameter: model to use (auto, linear, lag, ets, prophet)"})
+    periods = fields.Integer(metadata={"description": "Query parameter: number of periods to forecast"})
+
+class ForecastMsgpackResponseSchema(ForecastResponseSchema):
+    forecast = fields.Dict(keys=fields.String(), values=fields.Raw(), required=True,
+                           metadata={"description": "{column: little-endian bytes} for ds, yhat, yhat_lower, yhat_upper, low_confidence"})
+    dtypes = fields.Dict(keys=fields.String(), values=fields.String(), required=True,
+                         metadata={"description": "NumPy dtype of each forecast column, e.g. '<i8' (ds in nanoseconds), '<f8', '|b1'"})
+
+class ForecastArrowResponseSchema(Schema):
+    ds = fields.Raw(required=True, metadata={"description": "Arrow timestamp[ns] column"})
+    yhat = fields.Raw(required=True, metadata={"description": "Arrow float64 column"})
+    yhat_lower = fields.Raw(required=True, metadata={"description": "Arrow float64 column"})
+    yhat_upper = fields.Raw(required=True, metadata={"description": "Arrow float64 column"})
+    low_confidence = fields.Raw(required=True, metadata={"description": "Arrow bool column"})
+    response = fields.String(required=True, metadata={"description": "Schema metadata: ForecastResponseSchema fields except forecast, as JSON"})
+
+class ForecastJobSubmittedSchema(Schema):
+    success = fields.Boolean(required=True)
+    job_id = fields.String(required=True)
+    status = fields.String(required=True, metadata={"description": "Always 'queued' on submission"})
+    status_url = fields.String(required=True, metadata={"description": "URL to poll for the job status"})
+
+class ForecastJobSchema(ForecastResponseSchema):
+    success = fields.Boolean(required=True)
+    job_id = fields.String(required=True)
+    status = fields.String(required=True, metadata={"description": "queued, running, done or failed"})
+    forecast = fields.Raw(metadata={"description": "Present once status is done"})
+    message = fields.String()
+    error = fields.String(metadata={"description": "Present when status is failed"})
+
+class BatchForecastRequestSchema(Schema):
+    series = fields.Dict(keys=fields.String(), values=fields.List(fields.Dict()), required=True,
+                         metadata={"description": "Series name mapped to its cleaned rows"})
+    model = fields.String(metadata={"description": "Model to use (auto, linear, lag, ets, prophet)"})
+    periods = fields.Integer(metadata={"description": "Number of periods to forecast"})
+    format = fields.String(metadata={"description": "Response layout: records (default) or columnar"})
+
+class BatchForecastResponseSchema(Schema):
+    success = fields.Boolean(required=True, metadata={"description": "False if any series failed"})
+    format = fields.String()
+    results = fields.Dict(keys=fields.String(), values=fields.Dict(), required=True)
+    errors = fields.Dict(keys=fields.String(), values=fields.String(), required=True)
+    message = fields.String(required=True)
+
+class BacktestRequestSchema(Schema):
+    data = fields.List(fields.Dict(), metadata={"description": "Cleaned data to backtest on (or dataset_id)"})
+    dataset_id = fields.String(metadata={"description": "Backtest a dataset stored by /clean instead of posting data"})
+    model = fields.String(metadata={"description": "Model to use (auto, linear, lag, ets, prophet)"})
+    initial = fields.Integer(metadata={"description": "Rows in the first training window (default: half the series)"})
+    step = fields.Integer(metadata={"description": "Rows the cutoff advances per fold (default: horizon)"})
+    horizon = fields.Integer(metadata={"description": "Periods forecast and scored per fold (default 7)"})
+
+class BacktestResponseSchema(Schema):
+    success = fields.Boolean(required=True, metadata={"description": "False if any fold failed"})
+    model = fields.String(required=True)
+    initial = fields.Integer(required=True)
+    step = fields.Integer(required=True)
+    horizon = fields.Integer(required=True)
+    folds = fields.List(fields.Dict(), required=True,
+                        metadata={"description": "Per fold: cutoff, train_size, model_used, seconds, mae/rmse/accuracy or error"})
+    metrics = fields.Dict(required=True, metadata={"description": "MAE/RMSE/accuracy pooled over folds, plus mae_by_step"})
+    timing = fields.Dict(required=True, metadata={"description": "total_seconds, fold_seconds and workers"})
+    message = fields.String(required=True)
@@ -0,0 +1,56 @@
+"""
+Vectorized JSON serialization for cleaned data and forecasts.
+
+Two response layouts are supported:
+- "records" (default): a list of per-row dicts, as the frontend has always used
+- "columnar": one list per column, e.g. {"ds": [...], "y": [...]}
+
+Clients opt into the columnar layout with `?format=columnar` (or
+`"format": "columnar"` in a JSON body). Both layouts are built from whole
+columns at once instead of `DataFrame.iterrows()`.
+"""
+
+from flask import request
+
+COLUMNAR = "columnar"
+RECORDS = "records"
+
+def response_format():
+    """Return the response layout the client asked for"""
+    fmt = request.args.get('format')
+    if fmt is None and request.is_json:
+        body = request.get_json(silent=True)
+        if isinstance(body, dict):
+            fmt = body.get('format')
+    if fmt not in (None, COLUMNAR, RECORDS):
+        raise ValueError(f"Unknown response format: {fmt}")
+    return fmt or RECORDS
+
+def frame_to_columns(df):
+    """Convert a DataFrame to {column: list} with JSON-native values"""
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if col == 'ds':
+            columns[col] = values.dt.strftime('%Y-%m-%d').tolist()
+        elif values.dtype == bool:
+            columns[col] = values.tolist()
+        else:
+            columns[col] = values.astype(float).tolist()
+    return columns
+
+def frame_to_records(df, extra=None):
+    """Convert a DataFrame to a list of row dicts, optionally merging `extra` into every row"""
+    columns = frame_to_columns(df)
+    names = list(columns)
+    records = [dict(zip(names, row)) for row in zip(*columns.values())]
+    if extra:
+        for record in records:
+            record.update(extra)
+    return records
+
+def serialize_frame(df, fmt):
+    """Serialize a DataFrame in the requested layout"""
+    if fmt == COLUMNAR:
+        return frame_to_columns(df)
+    return frame_to_records(df)
@@ -0,0 +1,155 @@
+"""
+backtest.py – Rolling-origin cross-validation of the forecasting models
+
+Implements:
+- `rolling_origins()` – training cutoffs for an initial window, step and horizon
+- `backtest()` – forecast each fold from the data before its cutoff, score it
+  against what actually happened and time every fold
+
+Folds are independent, so they run across the shared fit pool. Each worker gets a
+contiguous run of cutoffs and walks it in order, which lets Prophet warm-start
+every fold from the previous one through the model registry. Trend-line folds
+never touch the pool: all expanding windows are solved at once from running
+sums. Scores for every fold come from one call to the vectorized
+`evaluate_forecast`.
+"""
+
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .config import ABSOLUTE_MIN, BACKTEST_MAX_FOLDS, FIT_POOL_WORKERS
+from .forecast import evaluate_forecast, known_model, run_forecast, run_in_fit_pool, validate_series
+from .trend import fit_linear_trend_prefixes, predict_linear_trend
+
+def rolling_origins(n, initial, step, horizon):
+    """Training sizes (cutoffs) for each fold of a series of length n"""
+    if initial < ABSOLUTE_MIN:
+        raise ValueError(f"Initial window must be at least {ABSOLUTE_MIN} points")
+    if step < 1 or horizon < 1:
+        raise ValueError("Step and horizon must be at least 1")
+    
+    cutoffs = list(range(initial, n - horizon + 1, step))
+    if not cutoffs:
+        raise ValueError(f"Need at least {initial + horizon} data points for an initial window of "
+                         f"{initial} and a horizon of {horizon}")
+    if len(cutoffs) > BACKTEST_MAX_FOLDS:
+        raise ValueError(f"Backtest would need {len(cutoffs)} folds (max {BACKTEST_MAX_FOLDS}); "
+                         f"increase the step or the initial window")
+    return cutoffs
+
+def _run_folds(task):
+    """Process pool worker: forecast a contiguous run of folds in order"""
+    df, model_choice, cutoffs, horizon = task
+    outcomes = []
+    for cutoff in cutoffs:
+        start = time.perf_counter()
+        try:
+            result = run_forecast(df.iloc[:cutoff], model_choice, horizon)
+            outcome = (result['forecast']['yhat'].values, result['insights']['model_used'], None)
+        except Exception as e:
+            outcome = (None, None, str(e))
+        outcomes.append(outcome + (time.perf_counter() - start,))
+    return outcomes
+
+def _run_linear_folds(df, cutoffs, horizon):
+    """Score every trend-line fold from one set of running sums"""
+    start = time.perf_counter()
+    y = df['y'].values
+    predictions = predict_linear_trend(fit_linear_trend_prefixes(y, cutoffs), horizon)
+    
+    outcomes = []
+    for i, cutoff in enumerate(cutoffs):
+        try:
+            validate_series(df.iloc[:cutoff])
+            outcomes.append([predictions[i], 'Linear Regression', None])
+        except ValueError as e:
+            outcomes.append([None, None, str(e)])
+    
+    # One solve serves every fold, so each is charged an equal share of it
+    seconds = (time.perf_counter() - start) / len(cutoffs)
+    return [tuple(outcome) + (seconds,) for outcome in outcomes]
+
+def backtest(df, model_choice="auto", initial=None, step=None, horizon=7, max_workers=None):
+    """Rolling-origin backtest of `model_choice` on a ds/y series
+
+    Each fold trains on the first `cutoff` rows and forecasts the next
+    `horizon`. Cutoffs start at `initial` (default: half the series) and
+    advance by `step` (default: the horizon, so test windows don't overlap).
+    Returns per-fold scores and timings plus metrics pooled over all folds.
+    With "auto", each fold picks its model the way /forecast would on that
+    training window, so the tournament runs once per fold.
+    """
+    df_sorted = df.sort_values('ds').reset_index(drop=True)
+    n = len(df_sorted)
+    initial = int(initial) if initial is not None else max(ABSOLUTE_MIN, n // 2)
+    horizon = int(horizon)
+    step = int(step) if step is not None else horizon
+    cutoffs = rolling_origins(n, initial, step, horizon)
+    
+    started = time.perf_counter()
+    
+    # Trend-line folds are solved together in-process; the rest go to the pool
+    resolved = [known_model(df_sorted.iloc[:cutoff], model_choice) for cutoff in cutoffs]
+    linear_cutoffs = [c for c, model in zip(cutoffs, resolved) if model == "linear"]
+    other_cutoffs = [c for c, model in zip(cutoffs, resolved) if model != "linear"]
+    
+    outcomes = dict(zip(linear_cutoffs, _run_linear_folds(df_sorted, linear_cutoffs, horizon))) if linear_cutoffs else {}
+    
+    workers = min(max_workers or FIT_POOL_WORKERS, len(other_cutoffs)) if other_cutoffs else 1
+    chunks = [list(chunk) for chunk in np.array_split(other_cutoffs, workers) if len(chunk)]
+    tasks = [(df_sorted, model_choice, chunk, horizon) for chunk in chunks]
+    if workers <= 1:
+        for task in tasks:
+            outcomes.update(zip(task[2], _run_folds(task)))
+    else:
+        # A chunk lost with its worker process fails only its own folds
+        for task, results, error in run_in_fit_pool(_run_folds, tasks):
+            outcomes.update(zip(task[2], results or [(None, None, error, 0.0)] * len(task[2])))
+    
+    # Score all successful folds at once: rows are folds, columns are horizon steps
+    actual_windows = sliding_window_view(df_sorted['y'].values.astype(float), horizon)
+    scored = [c for c in cutoffs if outcomes[c][2] is None]
+    if scored:
+        actual = actual_windows[scored]
+        predicted = np.vstack([outcomes[c][0] for c in scored])
+        scores = evaluate_forecast(actual, predicted)
+        pooled = evaluate_forecast(actual.ravel(), predicted.ravel())
+        fold_scores = {c: {key: float(values[i]) for key, values in scores.items()} for i, c in enumerate(scored)}
+        metrics = {key: float(value) for key, value in pooled.items()}
+        metrics['mae_by_step'] = np.round(np.abs(predicted - actual).mean(axis=0), 2).tolist()
+    else:
+        fold_scores = {}
+        metrics = {'mae': None, 'rmse': None, 'accuracy': None, 'mae_by_step': []}
+    metrics['folds'] = len(scored)
+    metrics['failed_folds'] = len(cutoffs) - len(scored)
+    
+    folds = []
+    for cutoff in cutoffs:
+        _, model_used, error, seconds = outcomes[cutoff]
+        fold = {
+            'cutoff': str(df_sorted['ds'].iloc[cutoff - 1].date()),
+            'train_size': cutoff,
+            'model_used': model_used,
+            'seconds': round(seconds, 4)
+        }
+        if error is None:
+            fold.update(fold_scores[cutoff])
+        else:
+            fold['error'] = error
+        folds.append(fold)
+    
+    return {
+        'model': model_choice,
+        'initial': initial,
+        'step': step,
+        'horizon': horizon,
+        'folds': folds,
+        'metrics': metrics,
+        'timing': {
+            'total_seconds': round(time.perf_counter() - started, 4),
+            'fold_seconds': round(sum(fold['seconds'] for fold in folds), 4),
+            'workers': workers
+        }
+    }
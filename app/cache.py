@@ -0,0 +1,262 @@
+"""
+cache.py – Content-addressed caching for forecast results
+
+Implements:
+- `fingerprint_series()` – stable hash of a cleaned ds/y series
+- `TieredCache` – in-process LRU tier in front of an on-disk tier that every
+  gunicorn worker on the host shares, both with TTL and size-based eviction
+- `forecast_cache` – the cache instance used by the Flask backend
+
+Values are stored pickled in both tiers, so every `get()` hands back a fresh
+copy and callers can mutate results without corrupting the cache. Since
+loading a pickle can run code, the disk tier is only used when its directory
+is private to the app's user (see `statedir.private_dir`); otherwise the
+cache keeps to memory and logs why.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .config import (
+    CACHE_DIR,
+    CACHE_DISK_BYTES,
+    CACHE_ENABLED,
+    CACHE_MEMORY_BYTES,
+    CACHE_MEMORY_ENTRIES,
+    CACHE_TTL_SECONDS,
+)
+from .statedir import private_dir
+
+logger = logging.getLogger(__name__)
+
+def fingerprint_series(df):
+    """Hash the ds/y arrays of a cleaned series into a short hex digest"""
+    ds = pd.to_datetime(df['ds']).to_numpy(dtype='datetime64[ns]').view('int64')
+    y = df['y'].to_numpy(dtype='float64')
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.int64(len(y)).tobytes())
+    digest.update(np.ascontiguousarray(ds).tobytes())
+    digest.update(np.ascontiguousarray(y).tobytes())
+    return digest.hexdigest()
+
+def forecast_key(fingerprint, model_choice, forecast_days):
+    """Build the cache key for one forecast request"""
+    return f"{fingerprint}-{model_choice}-{int(forecast_days)}"
+
+class TieredCache:
+    """LRU memory tier backed by a shared directory of pickled entries"""
+
+    def __init__(self, directory, ttl=3600, max_entries=256, max_memory_bytes=64 * 1024 * 1024,
+                 max_disk_bytes=512 * 1024 * 1024, enabled=True):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.enabled = enabled
+
+        self._memory = OrderedDict()  # key -> (expires_at, payload)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0}
+        self._disk_usable = None  # checked on first use, so importing the app touches no files
+
+    def get(self, key):
+        """Return the cached value for `key`, or None on a miss"""
+        if not self.enabled:
+            return None
+
+        payload = self._get_memory(key)
+        if payload is not None:
+            self._count('memory_hits')
+            return pickle.loads(payload)
+
+        payload = self._get_disk(key)
+        if payload is not None:
+            self._count('disk_hits')
+            # Promote to the memory tier so the next lookup skips the disk
+            self._set_memory(key, payload, time.time() + self.ttl)
+            return pickle.loads(payload)
+
+        self._count('misses')
+        return None
+
+    def set(self, key, value):
+        """Store `value` in both tiers"""
+        if not self.enabled:
+            return
+
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._set_memory(key, payload, time.time() + self.ttl)
+        self._set_disk(key, payload)
+        self._count('sets')
+
+    def clear(self):
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        for path, _, _ in self._disk_entries():
+            _remove_quietly(path)
+
+    def stats(self):
+        """Hit/miss counters and current tier sizes"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['memory_entries'] = len(self._memory)
+            stats['memory_bytes'] = self._memory_bytes
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 3) if lookups else 0.0
+        stats['enabled'] = self.enabled
+        return stats
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    # --- Memory tier -------------------------------------------------------
+
+    def _get_memory(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at < time.time():
+                self._drop_memory(key)
+                return None
+            self._memory.move_to_end(key)
+            return payload
+
+    def _set_memory(self, key, payload, expires_at):
+        if len(payload) > self.max_memory_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._drop_memory(key)
+            self._memory[key] = (expires_at, payload)
+            self._memory_bytes += len(payload)
+
+            # Evict least recently used entries until both limits hold
+            while len(self._memory) > self.max_entries or self._memory_bytes > self.max_memory_bytes:
+                oldest = next(iter(self._memory))
+                self._drop_memory(oldest)
+                self._counters['evictions'] += 1
+
+    def _drop_memory(self, key):
+        _, payload = self._memory.pop(key)
+        self._memory_bytes -= len(payload)
+
+    # --- Disk tier ---------------------------------------------------------
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.pkl")
+
+    def _disk_ok(self):
+        """Whether the disk tier's directory is private to this user (created on first use)"""
+        if self._disk_usable is None:
+            try:
+                private_dir(self.directory)
+                self._disk_usable = True
+            except OSError as e:
+                logger.warning("Forecast cache disk tier disabled: %s", e)
+                self._disk_usable = False
+        return self._disk_usable
+
+    def _get_disk(self, key):
+        if not self._disk_ok():
+            return None
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl < time.time():
+                _remove_quietly(path)
+                return None
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _set_disk(self, key, payload):
+        if not self._disk_ok():
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file and rename so other workers never read a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        self._evict_disk()
+
+    def _disk_entries(self):
+        """List (path, mtime, size) for every entry in the disk tier"""
+        entries = []
+        try:
+            shards = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for shard in shards:
+            shard_dir = os.path.join(self.directory, shard)
+            try:
+                names = os.listdir(shard_dir)
+            except OSError:
+                continue
+            for name in names:
+                if not name.endswith('.pkl'):
+                    continue
+                path = os.path.join(shard_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, st.st_mtime, st.st_size))
+        return entries
+
+    def _evict_disk(self):
+        """Remove expired entries, then the oldest ones until under the size limit"""
+        now = time.time()
+        live = []
+        for path, mtime, size in self._disk_entries():
+            if mtime + self.ttl < now:
+                _remove_quietly(path)
+                self._count('evictions')
+            else:
+                live.append((mtime, path, size))
+
+        total = sum(size for _, _, size in live)
+        if total <= self.max_disk_bytes:
+            return
+        for _, path, size in sorted(live):
+            _remove_quietly(path)
+            self._count('evictions')
+            total -= size
+            if total <= self.max_disk_bytes:
+                break
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+forecast_cache = TieredCache(
+    CACHE_DIR,
+    ttl=CACHE_TTL_SECONDS,
+    max_entries=CACHE_MEMORY_ENTRIES,
+    max_memory_bytes=CACHE_MEMORY_BYTES,
+    max_disk_bytes=CACHE_DISK_BYTES,
+    enabled=CACHE_ENABLED,
+)
@@ -1,5 +1,8 @@
 # Configuration settings for the sales forecasting app
 
+import multiprocessing
+import os
+
 # Minimum number of data points needed for reliable forecasting
 MIN_RELIABLE_ROWS = 30
 
@@ -7,4 +10,99 @@ MIN_RELIABLE_ROWS = 30
 ABSOLUTE_MIN = 5
 
 # Maximum number of rows for small dataset classification
-SMALL_MAX = 15
\ No newline at end of file
+SMALL_MAX = 15
+
+# Root directory for on-disk state shared by all workers on a host. It holds pickled cache entries and job
+# results, so it lives under the app user's home rather than the shared temp dir; state directories are
+# created with mode 0700, and ones owned by another user or writable by others are refused (see statedir.py)
+STATE_HOME = os.environ.get("XDG_STATE_HOME", os.path.join(os.path.expanduser("~"), ".local", "state"))
+STATE_DIR = os.environ.get("SALESFORECASTER_STATE_DIR", os.path.join(STATE_HOME, "salesforecaster"))
+
+# Forecast result cache (in-process LRU tier + on-disk tier shared by workers)
+CACHE_ENABLED = os.environ.get("FORECAST_CACHE_ENABLED", "1") != "0"
+CACHE_DIR = os.environ.get("FORECAST_CACHE_DIR", os.path.join(STATE_DIR, "forecasts"))
+CACHE_TTL_SECONDS = int(os.environ.get("FORECAST_CACHE_TTL", 3600))
+CACHE_MEMORY_ENTRIES = 256
+CACHE_MEMORY_BYTES = 64 * 1024 * 1024
+CACHE_DISK_BYTES = 512 * 1024 * 1024
+
+# Fitted model registry (serialized Prophet models reused across horizons)
+MODEL_REGISTRY_ENABLED = os.environ.get("MODEL_REGISTRY_ENABLED", "1") != "0"
+MODEL_REGISTRY_DIR = os.environ.get("MODEL_REGISTRY_DIR", os.path.join(STATE_DIR, "models"))
+MODEL_REGISTRY_MAX_AGE_SECONDS = int(os.environ.get("MODEL_REGISTRY_MAX_AGE", 24 * 3600))
+MODEL_REGISTRY_MEMORY_ENTRIES = 64
+MODEL_REGISTRY_MEMORY_BYTES = 128 * 1024 * 1024
+MODEL_REGISTRY_DISK_BYTES = 1024 * 1024 * 1024
+
+# Warm-start Prophet from a registered fit when a series only gained this many new rows
+WARM_START_MAX_NEW_ROWS = int(os.environ.get("WARM_START_MAX_NEW_ROWS", 7))
+
+# Upload limits: resampled (freq=...) files above STREAM_THRESHOLD_BYTES are cleaned in chunks of CSV_CHUNK_ROWS rows.
+# Other uploads are cleaned in memory, so above the threshold they are refused with 413 rather than loaded whole.
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_MB", 1024)) * 1024 * 1024
+STREAM_THRESHOLD_BYTES = int(os.environ.get("STREAM_THRESHOLD_MB", 10)) * 1024 * 1024
+CSV_CHUNK_ROWS = int(os.environ.get("CSV_CHUNK_ROWS", 100_000))
+
+# Asynchronous forecast jobs: "sqlite" shares job state between workers, "memory" keeps it per process
+JOB_BACKEND = os.environ.get("FORECAST_JOB_BACKEND", "sqlite")
+JOB_DB_PATH = os.environ.get("FORECAST_JOB_DB", os.path.join(STATE_DIR, "jobs.sqlite3"))
+JOB_WORKERS = int(os.environ.get("FORECAST_JOB_WORKERS", 2))
+JOB_TTL_SECONDS = int(os.environ.get("FORECAST_JOB_TTL", 24 * 3600))
+# The worker owning unfinished SQLite jobs refreshes their heartbeat this often; a job whose owner
+# process is gone, or whose heartbeat is older than JOB_STALE_SECONDS, is reported as failed
+JOB_HEARTBEAT_SECONDS = float(os.environ.get("FORECAST_JOB_HEARTBEAT", 10))
+JOB_STALE_SECONDS = float(os.environ.get("FORECAST_JOB_STALE", 60))
+
+# Supervised model fitting: slow models run in a child process with a deadline and memory ceiling
+FIT_TIMEOUT_SECONDS = float(os.environ.get("FORECAST_FIT_TIMEOUT", 60))
+FIT_MEMORY_LIMIT_MB = int(os.environ.get("FORECAST_FIT_MEMORY_MB", 4096))
+# Fit processes start from a forkserver where available: web workers run threads (Flask, job heartbeats,
+# persistence writers, tournament fits), and a plain fork copies whatever locks those threads hold
+FIT_START_METHOD = os.environ.get(
+    "FORECAST_FIT_START_METHOD", "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# Processes in each web worker's pool for batch forecasts and backtests (created on first use, then reused)
+FIT_POOL_WORKERS = int(os.environ.get("FORECAST_POOL_WORKERS", os.cpu_count() or 1))
+
+# Rolling-origin backtests: refuse requests that would need more folds than this
+BACKTEST_MAX_FOLDS = int(os.environ.get("BACKTEST_MAX_FOLDS", 100))
+
+# Auto model selection: holdout tournament between the available models
+TOURNAMENT_ENABLED = os.environ.get("FORECAST_TOURNAMENT", "1") != "0"
+# The budget is per tournament: batch forecasts and backtests with "auto" run one per series or fold, each
+# starting a Prophet child process once the training window reaches MIN_RELIABLE_ROWS
+TOURNAMENT_BUDGET_SECONDS = float(os.environ.get("FORECAST_TOURNAMENT_BUDGET", 10))
+TOURNAMENT_ROUNDS = int(os.environ.get("FORECAST_TOURNAMENT_ROUNDS", 3))
+# A candidate whose holdout MAE exceeds the leader's by this factor stops competing
+TOURNAMENT_ELIMINATION_RATIO = float(os.environ.get("FORECAST_TOURNAMENT_ELIMINATION", 1.5))
+
+# Per-stage timing histograms served at /metrics (per worker process)
+METRICS_ENABLED = os.environ.get("FORECAST_METRICS_ENABLED", "1") != "0"
+
+# Stored cleaned datasets, forecast by id and extended with /clean/append
+DATASET_DIR = os.environ.get("FORECAST_DATASET_DIR", os.path.join(STATE_DIR, "datasets"))
+DATASET_TTL_SECONDS = int(os.environ.get("FORECAST_DATASET_TTL", 7 * 24 * 3600))
+DATASET_MAX_ROWS = int(os.environ.get("FORECAST_DATASET_MAX_ROWS", 5_000_000))
+DATASET_DISK_BYTES = int(os.environ.get("FORECAST_DATASET_DISK_MB", 2048)) * 1024 * 1024
+# Expired and over-limit datasets are swept at most this often per worker (the sweep scans every dataset)
+DATASET_PURGE_SECONDS = float(os.environ.get("FORECAST_DATASET_PURGE_INTERVAL", 60))
+
+# Response compression: gzip (or brotli, if installed) for bodies of at least this many bytes
+COMPRESSION_ENABLED = os.environ.get("FORECAST_COMPRESSION", "1") != "0"
+COMPRESSION_MIN_BYTES = int(os.environ.get("FORECAST_COMPRESSION_MIN_BYTES", 1024))
+# Fast levels: on multi-megabyte JSON they keep most of the size win at a fraction of the CPU
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("FORECAST_GZIP_LEVEL", 1))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get("FORECAST_BROTLI_QUALITY", 1))
+
+# Persistence of uploads and forecasts (supabase_schema.sql tables), written in batches off the request path.
+# DATABASE_URL: postgresql://... for Postgres (needs psycopg2), sqlite:///path, or unset for PERSISTENCE_DB_PATH
+PERSISTENCE_ENABLED = os.environ.get("FORECAST_PERSISTENCE", "1") != "0"
+DATABASE_URL = os.environ.get("DATABASE_URL")
+PERSISTENCE_DB_PATH = os.environ.get("FORECAST_PERSISTENCE_DB", os.path.join(STATE_DIR, "salesforecaster.sqlite3"))
+# Records waiting beyond this are dropped (and counted) rather than slowing requests down
+PERSISTENCE_QUEUE_SIZE = int(os.environ.get("FORECAST_PERSISTENCE_QUEUE", 10_000))
+PERSISTENCE_BATCH_SIZE = int(os.environ.get("FORECAST_PERSISTENCE_BATCH", 500))
+PERSISTENCE_FLUSH_SECONDS = float(os.environ.get("FORECAST_PERSISTENCE_FLUSH", 1.0))
+PERSISTENCE_WRITERS = int(os.environ.get("FORECAST_PERSISTENCE_WRITERS", 1))
+PERSISTENCE_POOL_SIZE = int(os.environ.get("FORECAST_PERSISTENCE_POOL", 4))
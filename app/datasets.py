@@ -0,0 +1,467 @@
+"""
+datasets.py – Stored cleaned datasets that grow by appending rows
+
+Implements:
+- `DatasetStore` – keeps each cleaned ds/y series on disk as .npy columns
+  next to its `RunningStats`, so new rows can be appended without re-reading
+  or re-cleaning the history
+- `dataset_store` – the store instance used by the Flask backend, which
+  /forecast reads by dataset id instead of receiving the rows again
+
+Each dataset is a directory holding `ds.npy` (datetime64[ns] as int64),
+`y.npy`, `ysum.npy` (running sum of y, which gives the first-half/second-half
+means in O(1)), `stats.json` (the `RunningStats`) and `meta.json` (how the upload was cleaned, so
+appended rows are cleaned the same way). Appends write the new rows in place after the
+stored ones (or over the last one, when new rows belong to the last
+resampled period) and rewrite the .npy headers, then replace `stats.json`
+atomically; the row count in `stats.json` is authoritative, so a crash
+between the two steps leaves the dataset at its previous size (with the
+last period's new total, if it was being rewritten).
+
+Columns are memory-mapped on read, so loading a dataset maps its pages
+instead of parsing anything. Datasets unused for longer than the TTL are
+deleted, each is capped at `max_rows` rows, and when the directory grows
+past `max_disk_bytes` the least recently used datasets are evicted. That
+sweep scans every stored dataset, so `create()` runs it at most once per
+`purge_interval` seconds in each process; the disk limit can be overshot
+by the datasets created in between. A
+dataset can also be created under a key (/clean uses the upload's ETag),
+and `find()` maps the key back to the dataset for as long as it is kept.
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from .config import DATASET_DIR, DATASET_DISK_BYTES, DATASET_MAX_ROWS, DATASET_PURGE_SECONDS, DATASET_TTL_SECONDS
+from .preprocess import fill_periods, resample_rule
+from .statedir import private_dir
+from .stats import OUTLIER_STDS, RunningStats
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are serialized per process only
+    fcntl = None
+
+COLUMNS = ('ds', 'y', 'ysum')
+
+_DATASET_ID = re.compile(r'^[0-9a-f]{32}$')
+
+def frame_columns(df):
+    """The int64 nanosecond dates and float sales of a cleaned ds/y frame"""
+    ds = df['ds']
+    if not pd.api.types.is_datetime64_any_dtype(ds):
+        ds = pd.to_datetime(ds)
+    ns = ds.to_numpy(dtype='datetime64[ns]').view('int64')
+    y = df['y'].to_numpy(dtype='float64')
+    if len(ns) > 1 and not (np.diff(ns) >= 0).all():
+        order = np.argsort(ns, kind='stable')
+        ns, y = ns[order], y[order]
+    return ns, y
+
+def _append_npy(path, values, start):
+    """Write `values` after the first `start` elements of a 1-D .npy file
+
+    The header is rewritten in place with the new length (NumPy pads .npy
+    headers so the length can grow); on NumPy versions without that padding
+    the whole file is rewritten instead.
+    """
+    values = np.ascontiguousarray(values)
+    with open(path, 'r+b') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            _, _, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            _, _, dtype = np.lib.format.read_array_header_2_0(f)
+        data_offset = f.tell()
+
+        header = {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False,
+                  'shape': (start + len(values),)}
+        f.seek(0)
+        if version == (1, 0):
+            np.lib.format.write_array_header_1_0(f, header)
+        else:
+            np.lib.format.write_array_header_2_0(f, header)
+
+        if f.tell() == data_offset:
+            f.seek(data_offset + start * dtype.itemsize)
+            f.write(values.astype(dtype, copy=False).tobytes())
+            f.truncate()
+            return
+
+    # The longer shape did not fit the old header
+    stored = np.load(path, mmap_mode='r')[:start]
+    _save_npy(path, np.concatenate([stored, values]))
+
+def _touch(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _save_npy(path, values):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        np.save(f, values)
+    os.replace(tmp_path, path)
+
+def _continue_periods(last_ns, last_y, ns, y, freq='daily', agg='sum', fill='zero'):
+    """Resample new rows onto a stored series' grid, starting from its last period
+
+    Returns the periods from the stored last one on (int64 ns, y) and whether
+    the first of them replaces the stored last period, i.e. new rows fell
+    into it. Without that, the stored last period is left out.
+    """
+    rule = resample_rule(freq, agg, fill)
+    series = pd.Series(np.concatenate(([last_y], y)),
+                       index=pd.DatetimeIndex(np.concatenate(([last_ns], ns)).view('datetime64[ns]')))
+    resampler = series.sort_index().resample(rule)
+    periods = resampler.sum(min_count=1) if agg == 'sum' else resampler.mean()
+    last = pd.Timestamp(last_ns)
+    if periods.index[0] < last:
+        raise ValueError(f"Appended rows must be dated in or after the dataset's last period ({last:%Y-%m-%d})")
+
+    updated_last = int(resampler.count().iloc[0]) > 1
+    if updated_last and agg != 'sum':
+        raise ValueError(f"Rows for the dataset's last period ({last:%Y-%m-%d}) can't be added to a mean; "
+                         "append whole periods after it")
+
+    # The stored last period anchors the fill policy across the gap to the new rows
+    filled = fill_periods(periods, fill)
+    if not updated_last:
+        filled = filled.iloc[1:]
+    return filled['ds'].to_numpy(dtype='datetime64[ns]').view('int64'), filled['y'].to_numpy(), updated_last
+
+class DatasetStore:
+    """Directory of appendable ds/y datasets keyed by a random id"""
+
+    def __init__(self, directory, ttl=7 * 24 * 3600, max_rows=5_000_000, max_disk_bytes=2 * 1024 ** 3,
+                 purge_interval=60):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.max_disk_bytes = max_disk_bytes
+        self.purge_interval = purge_interval
+        self._last_purge = None
+        self._purge_lock = threading.Lock()
+        # One lock per dataset id being appended to, with a count of the threads using it
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def create(self, df, meta=None, key=None):
+        """Store a cleaned series and return its dataset id
+
+        `meta` is a JSON-serializable dict kept alongside, e.g. the resampling
+        settings appended rows must be cleaned with. `key` (32 hex digits,
+        e.g. a fingerprint of the upload) indexes the new dataset for
+        `find()`.
+        """
+        ns, y = frame_columns(df)
+        if np.isnan(y).any():
+            raise ValueError("Stored datasets cannot contain missing sales values")
+        self._check_rows(len(y))
+
+        dataset_id = uuid.uuid4().hex
+        path = self._path(dataset_id)
+        private_dir(self.directory)
+        os.makedirs(path)
+        _save_npy(os.path.join(path, 'ds.npy'), ns)
+        _save_npy(os.path.join(path, 'y.npy'), y)
+        _save_npy(os.path.join(path, 'ysum.npy'), np.cumsum(y))
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump(meta or {}, f)
+        self._save_stats(dataset_id, RunningStats().update(ns, y))
+        if key is not None:
+            os.makedirs(self._index_dir, mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self._index_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                f.write(dataset_id)
+            os.replace(tmp_path, self._index_path(key))
+        self._purge_if_due()
+        return dataset_id
+
+    def find(self, key):
+        """Id of the latest dataset created with `key`, or None if there is none or it's gone
+
+        Counts as a use of that dataset, like `load()`.
+        """
+        index_path = self._index_path(key)
+        try:
+            with open(index_path) as f:
+                dataset_id = f.read()
+        except OSError:
+            return None
+        if not _DATASET_ID.match(dataset_id) or self._load_stats(dataset_id) is None:
+            _remove_quietly(index_path)
+            return None
+        _touch(os.path.join(self._path(dataset_id), 'stats.json'))
+        return dataset_id
+
+    def append(self, dataset_id, df, resample=None):
+        """Append rows dated from the stored last date on; returns (statistics, rows written)
+
+        Returns None for an unknown dataset. Only the new rows are read and
+        summarized; the outlier count is the one figure recounted over the
+        stored sales (a vectorized pass over the memory-mapped column), since
+        the 3-sigma threshold moves with every append.
+
+        With `resample` (the freq/agg/fill the dataset was created with) `df`
+        holds unresampled rows, which are resampled together with the stored
+        last period: periods between it and the new rows are filled with the
+        dataset's fill policy, and rows falling in the last period are added
+        to it (agg='sum' only; a mean can't be updated without the period's
+        row count). Rewriting the last period means recomputing the running
+        statistics over the whole column, so that case costs O(rows stored).
+        The rows written come back as a ds/y frame whose
+        `attrs['updated_last']` says whether its first row replaced the
+        stored last period.
+        """
+        ns, y = frame_columns(df)
+        if np.isnan(y).any():
+            raise ValueError("Stored datasets cannot contain missing sales values")
+
+        with self._locked(dataset_id) as found:
+            running = self._load_stats(dataset_id) if found else None
+            if running is None:
+                return None
+            path = self._path(dataset_id)
+            start = running.count
+            updated_last = False
+
+            if len(ns) and running.last_ns is not None:
+                if resample:
+                    last_y = float(np.load(os.path.join(path, 'y.npy'), mmap_mode='r')[start - 1])
+                    ns, y, updated_last = _continue_periods(running.last_ns, last_y, ns, y, **resample)
+                    start -= updated_last
+                elif ns[0] < running.last_ns:
+                    last = pd.Timestamp(running.last_ns).strftime('%Y-%m-%d')
+                    raise ValueError(f"Appended rows must be dated on or after the dataset's last date ({last})")
+            self._check_rows(start + len(y))
+
+            ysum_start = float(np.load(os.path.join(path, 'ysum.npy'), mmap_mode='r')[start - 1]) if start else 0.0
+            _append_npy(os.path.join(path, 'ds.npy'), ns, start)
+            _append_npy(os.path.join(path, 'y.npy'), y, start)
+            _append_npy(os.path.join(path, 'ysum.npy'), ysum_start + np.cumsum(y), start)
+
+            if updated_last:
+                running = RunningStats().update(*self._columns(dataset_id, start + len(y), ('ds', 'y')))
+            else:
+                running.update(ns, y)
+            self._save_stats(dataset_id, running)
+
+            written = pd.DataFrame({'ds': ns.view('datetime64[ns]'), 'y': y})
+            written.attrs['updated_last'] = updated_last
+            return self._statistics(dataset_id, running), written
+
+    def statistics(self, dataset_id):
+        """`series_statistics`-style dict for a stored dataset, or None if unknown"""
+        running = self._load_stats(dataset_id)
+        if running is None:
+            return None
+        return self._statistics(dataset_id, running)
+
+    def meta(self, dataset_id):
+        """The `meta` dict the dataset was created with, or None if unknown"""
+        try:
+            with open(os.path.join(self._path(dataset_id), 'meta.json')) as f:
+                return json.load(f)
+        except OSError:
+            return None
+
+    def load(self, dataset_id):
+        """The stored series as a ds/y DataFrame, or None if unknown or expired
+
+        Counts as a use: the dataset's retention clock restarts.
+        """
+        running = self._load_stats(dataset_id)
+        if running is None:
+            return None
+        ns, y = self._columns(dataset_id, running.count, ('ds', 'y'))
+        df = pd.DataFrame({'ds': ns.view('datetime64[ns]'), 'y': y})
+        _touch(os.path.join(self._path(dataset_id), 'stats.json'))
+        return df
+
+    def purge(self):
+        """Delete expired datasets, then least recently used ones over the disk limit
+
+        Returns the number of datasets removed. The most recently used dataset
+        is always kept, even if it alone exceeds the limit.
+        """
+        now = time.time()
+        entries = []
+        removed = 0
+        for path, last_used, size in self._entries():
+            if last_used + self.ttl < now:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+            else:
+                entries.append((last_used, size, path))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries[:-1]:
+            if total <= self.max_disk_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+
+        if removed:
+            self._purge_index()
+        return removed
+
+    # --- Internals ---------------------------------------------------------
+
+    def _purge_if_due(self):
+        """Purge unless this process did within the last `purge_interval` seconds (or another thread is)"""
+        if not self._purge_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            if self._last_purge is not None and now - self._last_purge < self.purge_interval:
+                return
+            self._last_purge = now
+            self.purge()
+        finally:
+            self._purge_lock.release()
+
+    def _path(self, dataset_id):
+        if not _DATASET_ID.match(str(dataset_id)):
+            raise ValueError(f"Invalid dataset id: {dataset_id}")
+        return os.path.join(self.directory, dataset_id)
+
+    @property
+    def _index_dir(self):
+        return os.path.join(self.directory, 'index')
+
+    def _index_path(self, key):
+        if not _DATASET_ID.match(str(key)):
+            raise ValueError(f"Invalid dataset key: {key}")
+        return os.path.join(self._index_dir, key)
+
+    def _purge_index(self):
+        """Drop index entries whose dataset has been deleted"""
+        try:
+            names = os.listdir(self._index_dir)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self._index_dir, name)
+            try:
+                with open(path) as f:
+                    dataset_id = f.read()
+            except OSError:
+                continue
+            if not _DATASET_ID.match(dataset_id) or not os.path.isdir(os.path.join(self.directory, dataset_id)):
+                _remove_quietly(path)
+
+    def _check_rows(self, rows):
+        if rows > self.max_rows:
+            raise ValueError(f"Stored datasets are limited to {self.max_rows} rows")
+
+    def _entries(self):
+        """(path, last used, bytes) for every dataset directory"""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if not _DATASET_ID.match(name):
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(path))
+                last_used = os.path.getmtime(os.path.join(path, 'stats.json'))
+            except FileNotFoundError:
+                # Still being created: no stats.json yet, so the directory's mtime stands in
+                try:
+                    last_used = os.path.getmtime(path)
+                except OSError:
+                    continue
+            except OSError:
+                continue
+            entries.append((path, last_used, size))
+        return entries
+
+    def _columns(self, dataset_id, rows, names=COLUMNS):
+        path = self._path(dataset_id)
+        return [np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')[:rows] for name in names]
+
+    def _statistics(self, dataset_id, running):
+        n = running.count
+        y, ysum = self._columns(dataset_id, n, ('y', 'ysum'))
+        std = running.std
+        outliers = int(np.count_nonzero(np.abs(y - running.mean) > OUTLIER_STDS * std)) if n > 1 else 0
+
+        # Half-split means from the running sum: O(1) per request
+        half = n // 2
+        first_sum = float(ysum[half - 1]) if half else 0.0
+        first_half_mean = first_sum / half if half else float('nan')
+        second_half_mean = (float(ysum[n - 1]) - first_sum) / (n - half) if n - half else float('nan')
+        return running.statistics(outliers, first_half_mean, second_half_mean)
+
+    def _load_stats(self, dataset_id):
+        path = os.path.join(self._path(dataset_id), 'stats.json')
+        try:
+            if os.path.getmtime(path) + self.ttl < time.time():
+                shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+                return None
+            with open(path) as f:
+                return RunningStats.from_dict(json.load(f))
+        except OSError:
+            return None
+
+    def _save_stats(self, dataset_id, running):
+        path = os.path.join(self._path(dataset_id), 'stats.json')
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(running.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @contextmanager
+    def _locked(self, dataset_id):
+        """Hold an exclusive lock on one dataset across threads and worker processes
+
+        Yields False, without locking, when the dataset doesn't exist.
+        """
+        lock_path = os.path.join(self._path(dataset_id), 'lock')
+        with self._locks_guard:
+            entry = self._locks.setdefault(dataset_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                if not os.path.isdir(os.path.dirname(lock_path)):
+                    yield False
+                    return
+                with open(lock_path, 'a') as lock_file:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    try:
+                        yield True
+                    finally:
+                        if fcntl is not None:
+                            fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            with self._locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[dataset_id]
+
+dataset_store = DatasetStore(DATASET_DIR, ttl=DATASET_TTL_SECONDS, max_rows=DATASET_MAX_ROWS,
+                             max_disk_bytes=DATASET_DISK_BYTES, purge_interval=DATASET_PURGE_SECONDS)
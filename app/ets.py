@@ -0,0 +1,239 @@
+"""
+ets.py – Holt-Winters exponential smoothing in NumPy
+
+Implements:
+- `fit_holt_winters()` – additive or multiplicative Holt-Winters (level,
+  trend and a season of `season_length` periods) with the smoothing
+  parameters chosen by minimizing the one-step squared error
+- `predict_holt_winters()` – point forecasts with analytic prediction
+  interval half-widths
+
+The model is written in error-correction form (ETS(A,A,A) and ETS(A,A,M) in
+Hyndman et al.'s notation): each step forecasts y, and the level, trend and
+that period's seasonal state move by a fixed share (alpha, beta, gamma) of
+the error. A fit is one O(n) pass over the series. The filter is vectorized
+across parameter sets rather than time, so one pass scores a whole grid of
+candidate (alpha, beta, gamma); the optimizer is a coarse grid followed by
+two finer grids around the best point, i.e. three passes in all.
+
+Intervals use the closed form for linear exponential smoothing: the h-step
+variance is sigma² (1 + Σ c_j²) with c_j = alpha + beta·j, plus gamma when j
+is a whole number of seasons. For multiplicative seasons the deseasonalized
+errors are used and the width is scaled by the seasonal factor, the usual
+approximation when seasonal factors change slowly.
+"""
+
+import numpy as np
+
+from .trend import fit_linear_trend
+
+SEASONAL_CHOICES = ('auto', 'additive', 'multiplicative')
+DEFAULT_SEASON_LENGTH = 7
+
+# Initial states come from at most this many whole seasons
+INIT_SEASONS = 4
+
+# Parameters are searched as alpha, beta / alpha and gamma / (1 - alpha), each in [0, 1], which
+# keeps beta <= alpha and gamma <= 1 - alpha (the usual admissible region)
+COARSE_GRID = (np.linspace(0.05, 0.95, 8), np.linspace(0.0, 1.0, 5), np.linspace(0.0, 1.0, 5))
+REFINE_POINTS = 5
+REFINE_ROUNDS = 2
+
+def min_rows(season_length=DEFAULT_SEASON_LENGTH):
+    """Fewest observations for a seasonal fit: two whole seasons to initialize from"""
+    return 2 * season_length
+
+def initial_states(y, season_length, multiplicative):
+    """Level, trend and seasonal states before the first observation
+
+    A straight line through the first few seasons gives the level and trend;
+    each season position's average deviation from (or ratio to) that line
+    gives its seasonal state, normalized to sum to 0 (or average 1).
+    """
+    m = season_length
+    seasons = min(len(y) // m, INIT_SEASONS) if m > 1 else 0
+    head = y[:max(seasons * m, min(len(y), 10))]
+    fit = fit_linear_trend(head)
+    level, trend = fit['intercept'] - fit['slope'], fit['slope']
+
+    if seasons == 0:
+        return level, trend, np.array([1.0 if multiplicative else 0.0])
+
+    line = fit['fitted'][:seasons * m].reshape(seasons, m)
+    cycles = head[:seasons * m].reshape(seasons, m)
+    if multiplicative:
+        season = (cycles / line).mean(axis=0)
+        season /= season.mean()
+    else:
+        season = (cycles - line).mean(axis=0)
+        season -= season.mean()
+    return level, trend, season
+
+def _filter(y, season_length, alpha, beta, gamma, init, multiplicative, keep_errors=False):
+    """Run the smoothing recursions for K parameter sets at once
+
+    `alpha`, `beta` and `gamma` are arrays of shape (K,). Returns the K sums
+    of squared one-step errors, the final level/trend (K,) and seasonal
+    states (m, K), and, with `keep_errors`, the (n, K) one-step errors
+    and the errors that drove the level and trend (the same errors, divided
+    by the seasonal factor for multiplicative seasons).
+    """
+    m = season_length
+    k = len(alpha)
+    level0, trend0, season0 = init
+    level = np.full(k, level0)
+    trend = np.full(k, trend0)
+    season = np.repeat(np.asarray(season0, dtype=float)[:, np.newaxis], k, axis=1)
+    sse = np.zeros(k)
+    errors = np.empty((len(y), k)) if keep_errors else None
+    drives = np.empty((len(y), k)) if keep_errors and multiplicative else errors
+
+    # Preallocated work arrays: each step is a handful of in-place ufunc calls on K values
+    base = np.empty(k)
+    error = np.empty(k)
+    scaled = np.empty(k)
+    work = np.empty(k)
+    for t, value in enumerate(y):
+        s = season[t % m]
+        np.add(level, trend, out=base)
+        if multiplicative:
+            np.multiply(base, s, out=error)
+            np.subtract(value, error, out=error)     # e = y - (l + b) s
+            np.divide(error, s, out=scaled)          # level and trend move by e / s
+            drive = scaled
+            np.multiply(error, gamma, out=work)
+            work /= base
+            s += work                                # s_t = s_{t-m} + gamma e / (l + b)
+        else:
+            np.subtract(value, base, out=error)
+            error -= s                               # e = y - (l + b + s)
+            drive = error
+            np.multiply(error, gamma, out=work)
+            s += work                                # s_t = s_{t-m} + gamma e
+        np.multiply(error, error, out=work)
+        sse += work
+        np.multiply(drive, alpha, out=level)
+        level += base                                # l_t = l + b + alpha e
+        np.multiply(drive, beta, out=work)
+        trend += work                                # b_t = b + beta e
+        if keep_errors:
+            errors[t] = error
+            drives[t] = drive
+    return sse, level, trend, season, errors, drives
+
+def _parameters(a, u, v):
+    """alpha, beta, gamma from the unit-box search coordinates"""
+    return a, a * u, (1 - a) * v
+
+def _optimize(y, season_length, init, multiplicative):
+    """(alpha, beta, gamma) with the smallest one-step SSE, and that SSE
+
+    Each round scores a full grid in one `_filter` pass, then the next
+    round's grid spans one step of the previous grid either side of the
+    best point, so the resolution improves by (REFINE_POINTS - 1) / 2 per
+    round.
+    """
+    axes = list(COARSE_GRID)
+    if season_length == 1:
+        axes[2] = np.zeros(1)  # no season to smooth
+    lower, upper = (0.01, 0.0, 0.0), (0.99, 1.0, 1.0)
+
+    best_sse, best = np.inf, None
+    for round_index in range(REFINE_ROUNDS + 1):
+        a, u, v = (grid.ravel() for grid in np.meshgrid(*axes, indexing='ij'))
+        with np.errstate(all='ignore'):
+            sse = _filter(y, season_length, *_parameters(a, u, v), init, multiplicative)[0]
+        sse[~np.isfinite(sse)] = np.inf
+        i = int(np.argmin(sse))
+        if sse[i] < best_sse:
+            best_sse, best = sse[i], (a[i], u[i], v[i])
+        if best is None or round_index == REFINE_ROUNDS:
+            break
+
+        steps = [grid[1] - grid[0] if len(grid) > 1 else 0.0 for grid in axes]
+        axes = [
+            np.linspace(max(lo, center - step), min(hi, center + step), REFINE_POINTS) if step else grid
+            for grid, center, step, lo, hi in zip(axes, best, steps, lower, upper)
+        ]
+
+    if best is None:
+        raise ValueError("Holt-Winters smoothing diverged for every parameter set")
+    return _parameters(*best), float(best_sse)
+
+def fit_holt_winters(y, season_length=DEFAULT_SEASON_LENGTH, seasonal='auto'):
+    """Fit Holt-Winters smoothing to `y` and return the model dict
+
+    `seasonal` is 'additive', 'multiplicative' (needs positive values) or
+    'auto', which fits both and keeps the one with the smaller squared error
+    (they have the same number of parameters, so this is also the AIC
+    choice). A `season_length` of 1 fits Holt's linear trend without a
+    season.
+    """
+    y = np.asarray(y, dtype=float)
+    if seasonal not in SEASONAL_CHOICES:
+        raise ValueError(f"Unknown seasonal mode: {seasonal}")
+    if np.isnan(y).any():
+        raise ValueError("Sales values contain NaN; fill or drop missing periods before forecasting")
+    needed = min_rows(season_length) if season_length > 1 else 4
+    if len(y) < needed:
+        raise ValueError(f"Need at least {needed} data points for Holt-Winters smoothing")
+
+    modes = ['additive']
+    if season_length > 1 and seasonal != 'additive':
+        if (y > 0).all():
+            modes = ['multiplicative'] if seasonal == 'multiplicative' else ['additive', 'multiplicative']
+        elif seasonal == 'multiplicative':
+            raise ValueError("Multiplicative seasonality needs all sales values to be positive")
+
+    best = None
+    for mode in modes:
+        multiplicative = mode == 'multiplicative'
+        init = initial_states(y, season_length, multiplicative)
+        params, sse = _optimize(y, season_length, init, multiplicative)
+        if best is None or sse < best[2]:
+            best = (mode, params, sse, init)
+    mode, (alpha, beta, gamma), _, init = best
+    multiplicative = mode == 'multiplicative'
+
+    # One more pass with the chosen parameters for the final states and the residuals
+    _, level, trend, season, errors, drives = _filter(
+        y, season_length, np.array([alpha]), np.array([beta]), np.array([gamma]), init, multiplicative,
+        keep_errors=True
+    )
+    errors, drives = errors[:, 0], drives[:, 0]
+    dof = max(len(y) - 3, 1)
+
+    return {
+        'seasonal': mode if season_length > 1 else 'none',
+        'season_length': season_length,
+        'alpha': float(alpha),
+        'beta': float(beta),
+        'gamma': float(gamma),
+        'level': float(level[0]),
+        'trend': float(trend[0]),
+        'season': season[:, 0].copy(),
+        'n': len(y),
+        'sigma': float(np.sqrt((drives ** 2).sum() / dof)),
+        'mae': float(np.abs(errors).mean()),
+        'rmse': float(np.sqrt((errors ** 2).mean())),
+    }
+
+def predict_holt_winters(model, steps):
+    """Forecast the `steps` periods after the training data; returns (yhat, standard deviation)"""
+    m = model['season_length']
+    h = np.arange(1, steps + 1)
+    season = model['season'][(model['n'] + h - 1) % m]
+    trend_part = model['level'] + h * model['trend']
+    multiplicative = model['seasonal'] == 'multiplicative'
+    yhat = trend_part * season if multiplicative else trend_part + season
+
+    # var(h) = sigma² (1 + sum_{j<h} c_j²), c_j = alpha + beta j (+ gamma every m-th step)
+    j = np.arange(1, steps)
+    c = model['alpha'] + model['beta'] * j
+    if m > 1:
+        c = c + model['gamma'] * (j % m == 0)
+    variance = model['sigma'] ** 2 * (1 + np.concatenate(([0.0], np.cumsum(c ** 2))))
+    std = np.sqrt(variance)
+    if multiplicative:
+        std = std * season
+    return yhat, std
@@ -3,63 +3,207 @@ forecast.py – Core forecasting logic
 
 Implements:
 - Prophet model (handles seasonality and trends)
-- Linear regression with lag features (simple but effective)
-- Unified `run_forecast()` interface with educational insights
+- Linear regression on the time index (simple but effective), solved in closed
+  form and batched across equal-length series
+- Lag regression: autoregressive least squares on lags, a rolling mean and
+  day of week, between the trend line and Prophet in cost
+- Holt-Winters exponential smoothing ("ets"): additive or multiplicative
+  weekly seasonality with analytic intervals, fitted in NumPy without Prophet
+- Unified `run_forecast()` interface with educational insights; "auto" picks
+  the model by a budgeted holdout tournament (see tournament.py)
+- `run_forecast_batch()` for many named series across a process pool
+- `run_in_fit_pool()` – the process pool batches and backtests share, created
+  once per web worker process and replaced if a child dies
+- Supervised fitting: Prophet can run in a child process with a deadline and
+  memory ceiling, falling back to linear regression if it is stopped
 
 Used by: Streamlit UI (Week 3), Flask backend (Weeks 4–5)
 """
 
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression, Ridge
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 import warnings
 warnings.filterwarnings('ignore')
 
+from .cache import fingerprint_series, forecast_cache, forecast_key
+from .config import FIT_POOL_WORKERS, TOURNAMENT_ENABLED
+from .ets import DEFAULT_SEASON_LENGTH, fit_holt_winters, min_rows as ets_min_rows, predict_holt_winters
+from .lags import fit_lag_model, predict_lag_model
+from .metrics import timed
+from .model_registry import find_prefix_prophet_model, load_prophet_model, save_prophet_model
+from .preprocess import split_panel
+from .supervisor import FitAborted, FitCancelled, fit_context, run_supervised
+from .tournament import run_tournament
+from .trend import fit_linear_trend, predict_linear_trend
+from .utils import select_model
+
+# Values accepted for model_choice
+MODEL_CHOICES = ("auto", "linear", "lag", "ets", "prophet")
+
+def infer_frequency(df):
+    """Detect the spacing of a series (e.g. 'D', 'W-SUN', 'MS'), defaulting to daily"""
+    if len(df) < 3:
+        return 'D'
+    return pd.infer_freq(pd.DatetimeIndex(df['ds']).sort_values()) or 'D'
+
+def linear_forecast_output(df_sorted, fit, forecast_days):
+    """Build the forecast frame and insights for one fitted trend"""
+    predictions = predict_linear_trend(fit, forecast_days)
+    
+    # Create forecast dataframe
+    last_date = df_sorted['ds'].iloc[-1]
+    future_dates = pd.date_range(start=last_date, periods=forecast_days + 1, freq=infer_frequency(df_sorted))[1:]
+    
+    forecast_df = pd.DataFrame({
+        'ds': future_dates,
+        'yhat': predictions,
+        'yhat_lower': predictions * 0.8,  # Simple confidence interval
+        'yhat_upper': predictions * 1.2,
+        'low_confidence': np.zeros(forecast_days, dtype=bool)
+    })
+    
+    mae = float(fit['mae'])
+    insights = {
+        'model_used': 'Linear Regression',
+        'model_explanation': f'Used linear regression to predict future sales. Model error: {mae:.2f} (MAE)',
+        'forecast_periods': forecast_days,
+        'confidence_level': 'Medium',
+        'data_points_used': len(df_sorted),
+        'mae': round(mae, 2),
+        'rmse': round(float(fit['rmse']), 2)
+    }
+    
+    return forecast_df, insights
+
 def run_linear_regression(df, forecast_days=7):
     """Run linear regression forecasting"""
-    # Prepare data
+    # Closed-form least-squares trend; in-sample MAE/RMSE come out of the same pass
+    df_sorted = df.sort_values('ds').reset_index(drop=True)
+    with timed('fit', 'linear', len(df_sorted)):
+        fit = fit_linear_trend(df_sorted['y'].values)
+    with timed('predict', 'linear', len(df_sorted)):
+        return linear_forecast_output(df_sorted, fit, forecast_days)
+
+def run_linear_regression_batch(series, forecast_days=7):
+    """Linear forecasts for many named series, solving each group of equal-length series at once
+
+    Returns {name: (forecast_df, insights)}, the same per-series output as
+    `run_linear_regression`.
+    """
+    by_length = {}
+    for name, df in series.items():
+        df_sorted = df.sort_values('ds').reset_index(drop=True)
+        by_length.setdefault(len(df_sorted), []).append((name, df_sorted))
+    
+    outputs = {}
+    for group in by_length.values():
+        # One (series × time) matrix, one vectorized solve
+        fits = fit_linear_trend(np.vstack([df_sorted['y'].values for _, df_sorted in group]))
+        for i, (name, df_sorted) in enumerate(group):
+            fit = {key: value[i] if isinstance(value, np.ndarray) else value for key, value in fits.items()}
+            outputs[name] = linear_forecast_output(df_sorted, fit, forecast_days)
+    return outputs
+
+def run_lag_regression(df, forecast_days=7):
+    """Run autoregressive regression on lags, a rolling mean and day-of-week"""
     df_sorted = df.sort_values('ds').reset_index(drop=True)
-    X = np.arange(len(df_sorted)).reshape(-1, 1)
     y = df_sorted['y'].values
+    freq = infer_frequency(df_sorted)
     
-    # Train model
-    model = LinearRegression()
-    model.fit(X, y)
+    last_date = df_sorted['ds'].iloc[-1]
+    future_dates = pd.date_range(start=last_date, periods=forecast_days + 1, freq=freq)[1:]
     
-    # Make predictions
-    future_X = np.arange(len(df_sorted), len(df_sorted) + forecast_days).reshape(-1, 1)
-    predictions = model.predict(future_X)
+    # Day-of-week effects only make sense for daily data
+    daily = freq == 'D'
+    weekdays = df_sorted['ds'].dt.dayofweek.values if daily else None
+    future_weekdays = future_dates.dayofweek.values if daily else None
     
-    # Create forecast dataframe
-    last_date = df_sorted['ds'].max()
-    future_dates = pd.date_range(start=last_date + pd.Timedelta(days=1), periods=forecast_days)
+    with timed('fit', 'lag', len(y)):
+        model = fit_lag_model(y, weekdays)
+    with timed('predict', 'lag', len(y)):
+        predictions = predict_lag_model(model, y, forecast_days, future_weekdays)
     
+    # Uncertainty grows with the horizon as predictions feed back in as lags
+    spread = 1.96 * model['residual_std'] * np.sqrt(np.arange(1, forecast_days + 1))
     forecast_df = pd.DataFrame({
         'ds': future_dates,
         'yhat': predictions,
-        'yhat_lower': predictions * 0.8,  # Simple confidence interval
-        'yhat_upper': predictions * 1.2,
-        'low_confidence': [False] * len(predictions)
+        'yhat_lower': predictions - spread,
+        'yhat_upper': predictions + spread,
+        'low_confidence': np.zeros(forecast_days, dtype=bool)
     })
     
-    # Calculate model performance
-    y_pred = model.predict(X)
-    mae = mean_absolute_error(y, y_pred)
-    rmse = np.sqrt(mean_squared_error(y, y_pred))
-    
+    mae = model['mae']
+    features = f"{model['lags']} lags, a {model['window']}-period rolling mean" + (" and day of week" if daily else "")
     insights = {
-        'model_used': 'Linear Regression',
-        'model_explanation': f'Used linear regression to predict future sales. Model error: {mae:.2f} (MAE)',
+        'model_used': 'Lag Regression',
+        'model_explanation': f'Used autoregressive regression on {features}. Model error: {mae:.2f} (MAE)',
         'forecast_periods': forecast_days,
         'confidence_level': 'Medium',
         'data_points_used': len(df),
         'mae': round(mae, 2),
-        'rmse': round(rmse, 2)
+        'rmse': round(model['rmse'], 2)
+    }
+    
+    return forecast_df, insights
+
+def run_ets(df, forecast_days=7):
+    """Run Holt-Winters exponential smoothing with weekly seasonality"""
+    df_sorted = df.sort_values('ds').reset_index(drop=True)
+    y = df_sorted['y'].values
+    freq = infer_frequency(df_sorted)
+    
+    # Weekly seasonality needs daily data and two whole weeks; otherwise smooth level and trend only
+    season_length = DEFAULT_SEASON_LENGTH if freq == 'D' and len(y) >= ets_min_rows() else 1
+    
+    with timed('fit', 'ets', len(y)):
+        model = fit_holt_winters(y, season_length)
+    with timed('predict', 'ets', len(y)):
+        predictions, std = predict_holt_winters(model, forecast_days)
+    
+    last_date = df_sorted['ds'].iloc[-1]
+    future_dates = pd.date_range(start=last_date, periods=forecast_days + 1, freq=freq)[1:]
+    forecast_df = pd.DataFrame({
+        'ds': future_dates,
+        'yhat': predictions,
+        'yhat_lower': predictions - 1.96 * std,
+        'yhat_upper': predictions + 1.96 * std,
+        'low_confidence': np.zeros(forecast_days, dtype=bool)
+    })
+    
+    mae = model['mae']
+    seasonality = f"{model['seasonal']} weekly seasonality" if season_length > 1 else "no seasonality"
+    insights = {
+        'model_used': 'Holt-Winters',
+        'model_explanation': f'Used Holt-Winters exponential smoothing with a trend and {seasonality} '
+                             f'(alpha={model["alpha"]:.2f}, beta={model["beta"]:.2f}, gamma={model["gamma"]:.2f}). '
+                             f'Model error: {mae:.2f} (MAE)',
+        'forecast_periods': forecast_days,
+        'confidence_level': 'High' if season_length > 1 else 'Medium',
+        'data_points_used': len(df),
+        'mae': round(mae, 2),
+        'rmse': round(model['rmse'], 2),
+        'seasonality': model['seasonal']
     }
     
     return forecast_df, insights
 
+def prophet_warm_start_params(model):
+    """Extract fitted parameters from a Prophet model as Stan initial values"""
+    return {
+        'k': model.params['k'][0][0],
+        'm': model.params['m'][0][0],
+        'sigma_obs': model.params['sigma_obs'][0][0],
+        'delta': model.params['delta'][0],
+        'beta': model.params['beta'][0],
+    }
+
 def run_prophet(df, forecast_days=7):
     """Run Prophet forecasting"""
     try:
@@ -71,13 +215,33 @@ def run_prophet(df, forecast_days=7):
     df_prophet = df[['ds', 'y']].copy()
     df_prophet.columns = ['ds', 'y']
     
-    # Create and fit model
-    model = Prophet(yearly_seasonality=False, weekly_seasonality=True, daily_seasonality=False)
-    model.fit(df_prophet)
+    # Reuse a model already fitted on this exact series, otherwise fit and register one
+    fingerprint = fingerprint_series(df_prophet)
+    model = load_prophet_model(fingerprint)
+    model_reused = model is not None
+    warm_started = False
+    if not model_reused:
+        with timed('fit', 'prophet', len(df_prophet)):
+            model = Prophet(yearly_seasonality=False, weekly_seasonality=True, daily_seasonality=False)
+            
+            # If only a few rows were appended since an earlier fit, start the optimizer from its parameters
+            previous_model, _ = find_prefix_prophet_model(df_prophet)
+            if previous_model is not None:
+                try:
+                    model.fit(df_prophet, init=prophet_warm_start_params(previous_model))
+                    warm_started = True
+                except Exception:
+                    # Parameter shapes can change (e.g. fewer changepoints); fall back to a cold fit
+                    model = Prophet(yearly_seasonality=False, weekly_seasonality=True, daily_seasonality=False)
+            
+            if not warm_started:
+                model.fit(df_prophet)
+            save_prophet_model(fingerprint, model)
     
     # Make forecast
-    future = model.make_future_dataframe(periods=forecast_days)
-    forecast = model.predict(future)
+    with timed('predict', 'prophet', len(df_prophet)):
+        future = model.make_future_dataframe(periods=forecast_days, freq=infer_frequency(df_prophet))
+        forecast = model.predict(future)
     
     # Extract only the forecast period
     forecast_df = forecast.tail(forecast_days)[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
@@ -101,35 +265,66 @@ def run_prophet(df, forecast_days=7):
         'confidence_level': 'High',
         'data_points_used': len(df),
         'mae': round(mae, 2),
-        'rmse': round(rmse, 2)
+        'rmse': round(rmse, 2),
+        'model_reused': model_reused,
+        'warm_started': warm_started
     }
     
     return forecast_df, insights
 
-def run_forecast(df, model_choice="auto", forecast_days=7):
-    """Main forecasting function"""
+def resolve_model_choice(df, model_choice="auto"):
+    """Turn "auto" into a concrete model without fitting anything
+
+    This is the cheap heuristic (`utils.select_model`: data size, then weekly
+    seasonality). `run_forecast` uses it when the "auto" tournament is turned
+    off, can't run or has no winner.
+    """
+    return select_model(df, model_choice)
+
+def known_model(df, model_choice="auto"):
+    """The model `run_forecast` will fit, if it is known without fitting anything, else None
+
+    With the tournament on, "auto" is only decided by racing the models, so
+    batches and backtests leave it to `run_forecast` and every series (or
+    fold) gets the model a single /forecast request would pick.
+    """
+    if model_choice == "auto" and TOURNAMENT_ENABLED:
+        return None
+    return resolve_model_choice(df, model_choice)
+
+def run_prophet_supervised(df, forecast_days=7, timeout=None, memory_limit_mb=None, cancel_event=None):
+    """Run Prophet in a child process; fall back to linear regression if it times out or runs out of memory
+
+    Cancellation is not a failure to recover from, so FitCancelled propagates.
+    """
+    try:
+        return run_supervised(
+            run_prophet, df, forecast_days,
+            timeout=timeout, memory_limit_mb=memory_limit_mb, cancel_event=cancel_event
+        )
+    except FitCancelled:
+        raise
+    except FitAborted as e:
+        forecast_df, insights = run_linear_regression(df, forecast_days)
+        insights['fallback'] = {
+            'requested_model': 'Prophet',
+            'reason': e.reason,
+            'detail': str(e)
+        }
+        insights['model_explanation'] = f"Prophet was stopped ({e}); {insights['model_explanation']}"
+        return forecast_df, insights
+
+def validate_series(df):
+    """Reject series no model can forecast"""
     # Basic validation
     if len(df) < 5:
         raise ValueError("Need at least 5 data points for forecasting")
     
     if df['y'].std() == 0:
         raise ValueError("All sales values are identical - cannot generate meaningful forecast")
-    
-    # Choose model
-    if model_choice == "auto":
-        if len(df) < 30:
-            model_choice = "linear"
-        else:
-            model_choice = "prophet"
-    
-    # Run the selected model
-    if model_choice == "linear":
-        forecast_df, insights = run_linear_regression(df, forecast_days)
-    elif model_choice == "prophet":
-        forecast_df, insights = run_prophet(df, forecast_days)
-    else:
-        raise ValueError(f"Unknown model choice: {model_choice}")
-    
+
+def package_result(df, forecast_df, insights):
+    """Flag low-confidence forecasts and assemble the run_forecast result dict"""
     # Check for low confidence
     if len(df) < 30:
         forecast_df['low_confidence'] = [True] * len(forecast_df)
@@ -141,17 +336,198 @@ def run_forecast(df, model_choice="auto", forecast_days=7):
         'insights': insights
     }
 
+def run_forecast(df, model_choice="auto", forecast_days=7, timeout=None, memory_limit_mb=None, cancel_event=None):
+    """Main forecasting function
+
+    Passing `timeout`, `memory_limit_mb` or `cancel_event` fits Prophet in a
+    supervised child process (see `run_prophet_supervised`); linear regression
+    is cheap and always runs inline.
+    """
+    validate_series(df)
+    
+    # Choose model: "auto" races the candidates on recent holdout data
+    tournament = None
+    if model_choice == "auto" and TOURNAMENT_ENABLED:
+        with timed('tournament', 'auto', len(df)):
+            winner, tournament = run_tournament(df, forecast_days)
+        model_choice = winner or resolve_model_choice(df, model_choice)
+    else:
+        model_choice = resolve_model_choice(df, model_choice)
+    
+    # Run the selected model
+    if model_choice == "linear":
+        forecast_df, insights = run_linear_regression(df, forecast_days)
+    elif model_choice == "lag":
+        forecast_df, insights = run_lag_regression(df, forecast_days)
+    elif model_choice == "ets":
+        forecast_df, insights = run_ets(df, forecast_days)
+    elif model_choice == "prophet":
+        if timeout or memory_limit_mb or cancel_event is not None:
+            forecast_df, insights = run_prophet_supervised(df, forecast_days, timeout, memory_limit_mb, cancel_event)
+        else:
+            forecast_df, insights = run_prophet(df, forecast_days)
+    else:
+        raise ValueError(f"Unknown model choice: {model_choice}")
+    
+    if tournament is not None:
+        insights['model_selection'] = 'tournament' if tournament['winner'] else 'heuristic'
+        insights['tournament'] = tournament
+    
+    return package_result(df, forecast_df, insights)
+
+def run_forecast_cached(df, model_choice="auto", forecast_days=7, timeout=None, memory_limit_mb=None):
+    """run_forecast behind the shared result cache; returns (result, cached)"""
+    # "auto" is keyed as itself: the tournament's pick depends on more than the heuristic
+    cache_key = forecast_key(fingerprint_series(df), model_choice if model_choice == "auto" else resolve_model_choice(df, model_choice), forecast_days)
+    result = forecast_cache.get(cache_key)
+    if result is not None:
+        return result, True
+    
+    result = run_forecast(df, model_choice, forecast_days, timeout=timeout, memory_limit_mb=memory_limit_mb)
+    # A fallback answer stands in for the requested model; don't serve it from the cache later
+    if 'fallback' not in result['insights']:
+        forecast_cache.set(cache_key, result)
+    return result, False
+
+# The shared fit pool, and the process it was created in (a forked child can't use its parent's)
+_fit_pool = None
+_fit_pool_pid = None
+_fit_pool_lock = threading.Lock()
+
+def _get_fit_pool():
+    # Created lazily so importing the app doesn't fork worker processes
+    global _fit_pool, _fit_pool_pid
+    with _fit_pool_lock:
+        if _fit_pool is None or _fit_pool_pid != os.getpid():
+            _fit_pool = ProcessPoolExecutor(max_workers=FIT_POOL_WORKERS, mp_context=fit_context())
+            _fit_pool_pid = os.getpid()
+        return _fit_pool
+
+def _discard_fit_pool(pool):
+    """Forget a pool broken by a dead child so the next call starts a fresh one"""
+    global _fit_pool
+    with _fit_pool_lock:
+        if _fit_pool is pool:
+            _fit_pool = None
+    pool.shutdown(wait=False)
+
+def run_in_fit_pool(fn, chunks):
+    """Run `fn(chunk)` for every chunk on the shared process pool; yields (chunk, output, error)
+
+    Each chunk's outcome is collected on its own: a chunk whose `fn` raised,
+    or whose child process died (BrokenProcessPool, e.g. killed for memory),
+    yields an error message and None, and every chunk that finished still
+    yields its output.
+    """
+    pool = _get_fit_pool()
+    try:
+        futures = [pool.submit(fn, chunk) for chunk in chunks]
+    except BrokenProcessPool:
+        # Broken by an earlier call; its children are gone, so start over once
+        _discard_fit_pool(pool)
+        pool = _get_fit_pool()
+        futures = [pool.submit(fn, chunk) for chunk in chunks]
+    
+    for chunk, future in zip(chunks, futures):
+        try:
+            yield chunk, future.result(), None
+        except BrokenProcessPool as e:
+            _discard_fit_pool(pool)
+            yield chunk, None, f"Forecast worker process stopped: {e}"
+        except Exception as e:
+            yield chunk, None, str(e) or type(e).__name__
+
+def _forecast_one(task):
+    """Forecast one named series, capturing its error"""
+    name, df, model_choice, forecast_days = task
+    try:
+        return name, run_forecast(df, model_choice, forecast_days), None
+    except Exception as e:
+        return name, None, str(e)
+
+def _forecast_many(tasks):
+    """Process pool worker: forecast a chunk of named series"""
+    return [_forecast_one(task) for task in tasks]
+
+def run_forecast_batch(series, model_choice="auto", forecast_days=7, max_workers=None):
+    """Forecast many named series, fanning the fits out across processes
+
+    `series` maps a name to a ds/y DataFrame, or is a long-format panel with a
+    'series_id' column as produced by `clean_data(df, group_by=...)`. Returns
+    {'results': {name: result}, 'errors': {name: message}}; one bad series
+    never fails the whole batch. "auto" runs the tournament for each series,
+    as `run_forecast` does, so only series with an explicit (or heuristic,
+    when the tournament is off) linear model share the vectorized solve.
+    """
+    if isinstance(series, pd.DataFrame):
+        series = split_panel(series)
+    
+    results, errors = {}, {}
+    
+    # Linear series are solved together in-process; only the remaining models need the pool
+    linear = {}
+    tasks = []
+    for name, df in series.items():
+        try:
+            validate_series(df)
+            resolved = known_model(df, model_choice)
+        except Exception as e:
+            errors[name] = str(e)
+            continue
+        if resolved == "linear":
+            linear[name] = df
+        else:
+            tasks.append((name, df, model_choice, forecast_days))
+    
+    try:
+        outputs = run_linear_regression_batch(linear, forecast_days)
+    except ValueError:
+        # e.g. a series with missing values; forecast one at a time so only that series fails
+        outputs = {}
+        tasks.extend((name, df, model_choice, forecast_days) for name, df in linear.items())
+    for name, (forecast_df, insights) in outputs.items():
+        results[name] = package_result(linear[name], forecast_df, insights)
+    
+    max_workers = min(max_workers or FIT_POOL_WORKERS, len(tasks)) if tasks else 1
+    
+    if max_workers <= 1:
+        outcomes = map(_forecast_one, tasks)
+    else:
+        # One chunk per worker used: several series per round trip amortize the pickling
+        size = -(-len(tasks) // max_workers)
+        chunks = [tasks[i:i + size] for i in range(0, len(tasks), size)]
+        outcomes = []
+        for chunk, chunk_outcomes, error in run_in_fit_pool(_forecast_many, chunks):
+            outcomes.extend(chunk_outcomes or [(name, None, error) for name, *_ in chunk])
+    
+    for name, result, error in outcomes:
+        if error is None:
+            results[name] = result
+        else:
+            errors[name] = error
+    
+    # Report series in the order they were given
+    results = {name: results[name] for name in series if name in results}
+    return {'results': results, 'errors': errors}
+
 def evaluate_forecast(actual, predicted):
-    """Evaluate forecast accuracy"""
-    if len(actual) != len(predicted):
+    """Evaluate forecast accuracy
+
+    Accepts one forecast (1-D) or many at once (2-D, one forecast per row), in
+    which case every metric is an array with one value per row.
+    """
+    actual = np.asarray(actual, dtype=float)
+    predicted = np.asarray(predicted, dtype=float)
+    if actual.shape != predicted.shape:
         return None
     
-    mae = mean_absolute_error(actual, predicted)
-    rmse = np.sqrt(mean_squared_error(actual, predicted))
+    errors = predicted - actual
+    mae = np.abs(errors).mean(axis=-1)
+    rmse = np.sqrt((errors ** 2).mean(axis=-1))
+    accuracy = (1 - mae / actual.mean(axis=-1)) * 100
     
     return {
-        'mae': round(mae, 2),
-        'rmse': round(rmse, 2),
-        'accuracy': round((1 - mae / actual.mean()) * 100, 1)
+        'mae': np.round(mae, 2),
+        'rmse': np.round(rmse, 2),
+        'accuracy': np.round(accuracy, 1)
     }
-
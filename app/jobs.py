@@ -0,0 +1,297 @@
+"""
+jobs.py – Background execution of forecast jobs
+
+Implements:
+- `MemoryJobBackend` / `SQLiteJobBackend` – where job status and results live
+- `JobQueue` – submits work to a local process pool and records the outcome
+- `job_queue` – the queue used by the Flask backend (backend chosen by config
+  and built on first use)
+
+A job moves through queued → running → done | failed. The HTTP request that
+submits a job returns immediately; the fit runs in a worker process, so the
+web worker stays free for cheap requests. With the SQLite backend every
+gunicorn worker on the host can answer status polls for any job; "running"
+is only visible to the worker that owns the job, others report "queued"
+until it finishes. Each SQLite job records its owner's pid, and the owner
+refreshes a heartbeat while the job is unfinished. When a worker restarts,
+its jobs would otherwise stay "queued" forever; once the owner process is
+gone or the heartbeat is stale, `get()` marks them failed instead. If the
+SQLite database can't be used (e.g. its directory is writable by others),
+the queue logs why and keeps jobs in memory, as with the "memory" backend.
+"""
+
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from .config import (
+    JOB_BACKEND,
+    JOB_DB_PATH,
+    JOB_HEARTBEAT_SECONDS,
+    JOB_STALE_SECONDS,
+    JOB_TTL_SECONDS,
+    JOB_WORKERS,
+)
+from .statedir import private_dir
+from .supervisor import fit_context
+
+logger = logging.getLogger(__name__)
+
+class MemoryJobBackend:
+    """Job records in a dict; only visible inside this process"""
+
+    def __init__(self, ttl=JOB_TTL_SECONDS):
+        self.ttl = ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id):
+        with self._lock:
+            self._jobs[job_id] = {'status': 'queued', 'created_at': time.time(), 'result': None, 'error': None}
+
+    def finish(self, job_id, result=None, error=None):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(status='failed' if error else 'done', result=result, error=error)
+
+    def heartbeat(self, job_ids):
+        # Jobs die with this process, so there is nothing to keep alive
+        pass
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def purge(self):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for job_id in [k for k, job in self._jobs.items() if job['created_at'] < cutoff]:
+                del self._jobs[job_id]
+
+class SQLiteJobBackend:
+    """Job records in a SQLite file shared by every worker on the host"""
+
+    def __init__(self, path=JOB_DB_PATH, ttl=JOB_TTL_SECONDS, stale_after=JOB_STALE_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self.stale_after = stale_after
+        # Results are pickled, so the database must sit where only this user can write
+        private_dir(os.path.dirname(path) or '.')
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, created_at REAL NOT NULL, "
+                "result BLOB, error TEXT, owner_pid INTEGER, heartbeat REAL)"
+            )
+            # Databases created before jobs had owners
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (('owner_pid', 'INTEGER'), ('heartbeat', 'REAL')):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+    def _connect(self):
+        # One short-lived connection per call keeps this safe across threads
+        return sqlite3.connect(self.path, timeout=10)
+
+    def create(self, job_id):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, created_at, owner_pid, heartbeat) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, now, os.getpid(), now)
+            )
+
+    def heartbeat(self, job_ids):
+        """Mark the owner of `job_ids` as still alive"""
+        if not job_ids:
+            return
+        with self._connect() as conn:
+            conn.executemany("UPDATE jobs SET heartbeat = ? WHERE id = ?", [(time.time(), job_id) for job_id in job_ids])
+
+    def finish(self, job_id, result=None, error=None):
+        payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL) if result is not None else None
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ? WHERE id = ?",
+                ('failed' if error else 'done', payload, error, job_id)
+            )
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT status, created_at, result, error, owner_pid, heartbeat FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            status, created_at, payload, error, owner_pid, heartbeat = row
+            finished_meanwhile = False
+            if status == 'queued' and self._abandoned(owner_pid, heartbeat):
+                status, error = 'failed', "The worker running this job stopped before it finished"
+                # Only if it is still unfinished: the owner may have just written its outcome
+                finished_meanwhile = not conn.execute(
+                    "UPDATE jobs SET status = ?, error = ? WHERE id = ? AND status = 'queued'", (status, error, job_id)
+                ).rowcount
+        if finished_meanwhile:
+            return self.get(job_id)
+        result = pickle.loads(payload) if payload is not None else None
+        return {'status': status, 'created_at': created_at, 'result': result, 'error': error}
+
+    def _abandoned(self, owner_pid, heartbeat):
+        """Whether an unfinished job's owner has exited or stopped sending heartbeats"""
+        if heartbeat is not None and heartbeat + self.stale_after < time.time():
+            return True
+        if owner_pid is None or owner_pid == os.getpid():
+            return False
+        try:
+            os.kill(owner_pid, 0)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            pass  # exists, but belongs to someone else (e.g. a reused pid): the heartbeat decides
+        return False
+
+    def purge(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE created_at < ?", (time.time() - self.ttl,))
+
+class JobQueue:
+    """Run functions in a local process pool and track them as jobs"""
+
+    def __init__(self, backend=None, max_workers=JOB_WORKERS, heartbeat_seconds=JOB_HEARTBEAT_SECONDS):
+        self._backend = backend
+        self._backend_lock = threading.Lock()
+        self.max_workers = max_workers
+        self.heartbeat_seconds = heartbeat_seconds
+        self._pool = None
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._heartbeat_thread = None
+
+    @property
+    def backend(self):
+        """The job backend; without one given, built from config on first use so importing the app touches no files"""
+        with self._backend_lock:
+            if self._backend is None:
+                self._backend = create_backend()
+            return self._backend
+
+    def _get_pool(self):
+        # Created lazily so importing the app doesn't fork worker processes
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=fit_context())
+                self._stopped.clear()
+                self._heartbeat_thread = threading.Thread(target=self._send_heartbeats, name="job-heartbeat",
+                                                          daemon=True)
+                self._heartbeat_thread.start()
+            return self._pool
+
+    def _send_heartbeats(self):
+        """Refresh the heartbeat of every job this process still owns"""
+        while not self._stopped.wait(self.heartbeat_seconds):
+            with self._lock:
+                job_ids = list(self._futures)
+            try:
+                self.backend.heartbeat(job_ids)
+            except Exception:
+                logger.exception("Could not record job heartbeats")
+
+    def submit(self, fn, *args, on_result=None):
+        """Queue `fn(*args)` and return its job id
+
+        `on_result(result)` runs in this process once the job succeeds, e.g.
+        to record what the synchronous path would have recorded; its errors
+        are logged and don't fail the job.
+        """
+        self.backend.purge()
+        job_id = uuid.uuid4().hex
+        self.backend.create(job_id)
+
+        future = self._get_pool().submit(fn, *args)
+        with self._lock:
+            self._futures[job_id] = future
+        future.add_done_callback(lambda f: self._finish(job_id, f, on_result))
+        return job_id
+
+    def _finish(self, job_id, future, on_result=None):
+        try:
+            try:
+                result = future.result()
+            except Exception as e:
+                self.backend.finish(job_id, error=str(e) or type(e).__name__)
+                return
+            if on_result is not None:
+                try:
+                    on_result(result)
+                except Exception:
+                    logger.exception("Result callback of job %s failed", job_id)
+            self.backend.finish(job_id, result=result)
+        finally:
+            with self._lock:
+                self._futures.pop(job_id, None)
+
+    def get(self, job_id):
+        """Return the job record, or None for an unknown (or expired) job"""
+        job = self.backend.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            future = self._futures.get(job_id)
+        if job['status'] == 'queued' and future is not None and future.running():
+            job['status'] = 'running'
+        return job
+
+    def wait(self, job_id, timeout=None):
+        """Block until a locally submitted job finishes (used by tests and scripts)"""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                pass
+        # The done callback may still be writing the outcome
+        deadline = time.time() + (timeout or 5)
+        while time.time() < deadline:
+            job = self.get(job_id)
+            if job is None or job['status'] in ('done', 'failed'):
+                return job
+            time.sleep(0.01)
+        return self.get(job_id)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            thread, self._heartbeat_thread = self._heartbeat_thread, None
+        self._stopped.set()
+        if pool is not None:
+            pool.shutdown(wait=True)
+        if thread is not None:
+            thread.join()
+
+def create_backend(name=JOB_BACKEND):
+    """Build a job backend by name ("sqlite" or "memory")
+
+    Falls back to the memory backend when the SQLite database can't be
+    opened safely, so a misconfigured state directory costs cross-worker
+    job status rather than the whole app.
+    """
+    if name == 'sqlite':
+        try:
+            return SQLiteJobBackend(JOB_DB_PATH)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("SQLite job backend unavailable, keeping jobs per process: %s", e)
+            return MemoryJobBackend()
+    if name == 'memory':
+        return MemoryJobBackend()
+    raise ValueError(f"Unknown job backend: {name}")
+
+job_queue = JobQueue()
@@ -0,0 +1,118 @@
+"""
+lags.py – Autoregressive least-squares model on lag features
+
+Implements:
+- `build_lag_features()` – design matrix of intercept, trend, the previous
+  `lags` values, a rolling mean and optional day-of-week dummies
+- `fit_lag_model()` / `predict_lag_model()` – least-squares fit and recursive
+  multi-step prediction
+
+The lag block is a reversed view of `sliding_window_view(y, lags)`, so no
+Python loop runs over rows and nothing is copied until the columns are
+written into the design matrix. Recursive prediction writes each forecast
+into one preallocated history buffer and refills one feature row per step.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+DEFAULT_LAGS = 7
+# Longer than the lag block: a window the lags span would make the mean a linear combination of them
+DEFAULT_WINDOW = 28
+
+def _layout(lags, use_weekday):
+    """Column offsets: [intercept, trend, lag 1..lags, rolling mean, weekday dummies]"""
+    lag_start = 2
+    mean_col = lag_start + lags
+    weekday_start = mean_col + 1
+    width = weekday_start + (6 if use_weekday else 0)
+    return lag_start, mean_col, weekday_start, width
+
+def min_rows(lags=DEFAULT_LAGS, window=DEFAULT_WINDOW, use_weekday=True):
+    """Fewest observations that leave more training rows than features"""
+    warmup = max(lags, window)
+    return warmup + _layout(lags, use_weekday)[3] + 1
+
+def build_lag_features(y, weekdays=None, lags=DEFAULT_LAGS, window=DEFAULT_WINDOW):
+    """Return (X, target) for one-step-ahead regression on the history `y`
+
+    Row i predicts y[warmup + i] from the values before it. `weekdays` (0–6
+    per observation, or None) adds six day-of-week dummies, Monday being the
+    baseline. `window` must exceed `lags`, or the rolling mean adds no
+    information the lag columns don't already carry.
+    """
+    if window <= lags:
+        raise ValueError(f"Rolling-mean window ({window}) must be longer than the number of lags ({lags})")
+    y = np.asarray(y, dtype=float)
+    warmup = max(lags, window)
+    rows = len(y) - warmup
+    lag_start, mean_col, weekday_start, width = _layout(lags, weekdays is not None)
+
+    X = np.empty((rows, width))
+    X[:, 0] = 1.0
+    X[:, 1] = np.arange(warmup, len(y))
+
+    # windows[j] = y[j : j + lags]; the window ending just before target t starts at t - lags
+    windows = sliding_window_view(y, lags)[warmup - lags:len(y) - lags]
+    X[:, lag_start:mean_col] = windows[:, ::-1]
+
+    # Rolling mean of the `window` values before each target, from a running sum
+    csum = np.concatenate(([0.0], np.cumsum(y)))
+    targets = np.arange(warmup, len(y))
+    X[:, mean_col] = (csum[targets] - csum[targets - window]) / window
+
+    if weekdays is not None:
+        weekdays = np.asarray(weekdays)[warmup:]
+        X[:, weekday_start:] = weekdays[:, np.newaxis] == np.arange(1, 7)
+
+    return X, y[warmup:]
+
+def fit_lag_model(y, weekdays=None, lags=DEFAULT_LAGS, window=DEFAULT_WINDOW):
+    """Least-squares fit on lag features, with one-step in-sample MAE/RMSE"""
+    y = np.asarray(y, dtype=float)
+    if np.isnan(y).any():
+        raise ValueError("Sales values contain NaN; fill or drop missing periods before forecasting")
+    needed = min_rows(lags, window, weekdays is not None)
+    if len(y) < needed:
+        raise ValueError(f"Need at least {needed} data points for the lag model")
+
+    X, target = build_lag_features(y, weekdays, lags, window)
+    coef, *_ = np.linalg.lstsq(X, target, rcond=None)
+    residuals = target - X @ coef
+
+    return {
+        'coef': coef,
+        'lags': lags,
+        'window': window,
+        'use_weekday': weekdays is not None,
+        'residual_std': float(residuals.std(ddof=min(len(coef), len(residuals) - 1))),
+        'mae': float(np.abs(residuals).mean()),
+        'rmse': float(np.sqrt((residuals ** 2).mean())),
+    }
+
+def predict_lag_model(model, y, steps, future_weekdays=None):
+    """Forecast `steps` values after history `y`, feeding each prediction back in as a lag"""
+    y = np.asarray(y, dtype=float)
+    lags, window, coef = model['lags'], model['window'], model['coef']
+    lag_start, mean_col, weekday_start, width = _layout(lags, model['use_weekday'])
+
+    # One buffer holds the history and the forecasts; one feature row is reused every step
+    history = np.empty(len(y) + steps)
+    history[:len(y)] = y
+    row = np.zeros(width)
+    row[0] = 1.0
+    running_sum = y[len(y) - window:].sum()
+
+    for step in range(steps):
+        t = len(y) + step
+        row[1] = t
+        row[lag_start:mean_col] = history[t - lags:t][::-1]
+        row[mean_col] = running_sum / window
+        if model['use_weekday']:
+            row[weekday_start:] = 0.0
+            if future_weekdays[step] > 0:
+                row[weekday_start + future_weekdays[step] - 1] = 1.0
+        history[t] = row @ coef
+        running_sum += history[t] - history[t - window]
+
+    return history[len(y):]
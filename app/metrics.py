@@ -0,0 +1,127 @@
+"""
+metrics.py – Stage timers and histograms in the Prometheus text format
+
+Implements:
+- `Histogram` – cumulative-bucket histogram with labels, safe across threads
+- `timed()` – context manager that records how long a pipeline stage took,
+  labelled by stage, model and a coarse data-size bucket
+- `render()` – every registered metric in the Prometheus exposition format
+
+When METRICS_ENABLED is off, `timed()` hands back one shared no-op context
+manager, so an instrumented stage costs a function call and nothing else.
+Metrics are kept per process; under gunicorn each worker reports its own.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+from .config import METRICS_ENABLED
+
+# Seconds; spans sub-millisecond serialization up to long Prophet fits
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Row counts are bucketed so the label set stays small
+ROW_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000)
+
+_registry = {}
+_NOOP = nullcontext()
+
+def rows_label(rows):
+    """Coarse data-size label, e.g. '<=1000' or '>1000000'"""
+    if rows is None:
+        return ''
+    for bound in ROW_BUCKETS:
+        if rows <= bound:
+            return f'<={bound}'
+    return f'>{ROW_BUCKETS[-1]}'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+class Histogram:
+    """A labelled histogram rendered as Prometheus _bucket/_sum/_count series"""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+        _registry[name] = self
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), then sum
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            snapshot = [(key, list(counts), total) for key, (counts, total) in sorted(self._series.items())]
+        for key, counts, total in snapshot:
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                lines.append(f'{self.name}_bucket{_format_labels(pairs + [("le", le)])} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(pairs)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(pairs)} {cumulative}')
+        return '\n'.join(lines)
+
+STAGE_SECONDS = Histogram(
+    'salesforecaster_stage_seconds',
+    'Time spent in each pipeline stage',
+    labelnames=('stage', 'model', 'rows')
+)
+
+REQUEST_SECONDS = Histogram(
+    'salesforecaster_request_seconds',
+    'HTTP request latency by endpoint',
+    labelnames=('endpoint', 'method', 'status')
+)
+
+class _StageTimer:
+    __slots__ = ('stage', 'model', 'rows', 'start')
+
+    def __init__(self, stage, model, rows):
+        self.stage = stage
+        self.model = model
+        self.rows = rows
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        STAGE_SECONDS.observe(time.perf_counter() - self.start,
+                              stage=self.stage, model=self.model, rows=rows_label(self.rows))
+        return False
+
+def timed(stage, model='', rows=None):
+    """Time a block as pipeline stage `stage`: `with timed('fit', model='prophet', rows=len(df)):`"""
+    if not METRICS_ENABLED:
+        return _NOOP
+    return _StageTimer(stage, model, rows)
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    return '\n'.join(metric.render() for metric in _registry.values()) + '\n'
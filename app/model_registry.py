@@ -0,0 +1,64 @@
+"""
+model_registry.py – Registry of fitted forecasting models
+
+Fitted Prophet models are serialized with `prophet.serialize` and stored in a
+`TieredCache` keyed by the fingerprint of the training series. A later request
+on the same data, for any horizon, loads the model and goes straight to
+`predict` instead of repeating the Stan optimization.
+
+When a series extends a registered one by a few appended rows (the daily
+refresh workload), `find_prefix_prophet_model()` returns the earlier fit so the
+new fit can be warm-started from its parameters.
+
+Entries are evicted by age (`MODEL_REGISTRY_MAX_AGE`) and by the memory/disk
+size limits in `config.py`.
+"""
+
+from .cache import TieredCache, fingerprint_series
+from .config import (
+    MODEL_REGISTRY_DIR,
+    MODEL_REGISTRY_DISK_BYTES,
+    MODEL_REGISTRY_ENABLED,
+    MODEL_REGISTRY_MAX_AGE_SECONDS,
+    MODEL_REGISTRY_MEMORY_BYTES,
+    MODEL_REGISTRY_MEMORY_ENTRIES,
+    WARM_START_MAX_NEW_ROWS,
+)
+
+model_registry = TieredCache(
+    MODEL_REGISTRY_DIR,
+    ttl=MODEL_REGISTRY_MAX_AGE_SECONDS,
+    max_entries=MODEL_REGISTRY_MEMORY_ENTRIES,
+    max_memory_bytes=MODEL_REGISTRY_MEMORY_BYTES,
+    max_disk_bytes=MODEL_REGISTRY_DISK_BYTES,
+    enabled=MODEL_REGISTRY_ENABLED,
+)
+
+def _registry_key(fingerprint, model_name):
+    return f"{fingerprint}-{model_name}"
+
+def load_prophet_model(fingerprint):
+    """Return the fitted Prophet model for this training series, or None"""
+    serialized = model_registry.get(_registry_key(fingerprint, 'prophet'))
+    if serialized is None:
+        return None
+
+    from prophet.serialize import model_from_json
+    return model_from_json(serialized)
+
+def save_prophet_model(fingerprint, model):
+    """Serialize a fitted Prophet model into the registry"""
+    from prophet.serialize import model_to_json
+    model_registry.set(_registry_key(fingerprint, 'prophet'), model_to_json(model))
+
+def find_prefix_prophet_model(df, max_new_rows=WARM_START_MAX_NEW_ROWS):
+    """Find a registered model fitted on `df` minus its last few rows
+
+    Returns (model, new_rows), or (None, 0) when no prefix of the series has
+    been fitted before. Shorter suffixes are tried first.
+    """
+    for new_rows in range(1, min(max_new_rows, len(df) - 1) + 1):
+        model = load_prophet_model(fingerprint_series(df.iloc[:-new_rows]))
+        if model is not None:
+            return model, new_rows
+    return None, 0
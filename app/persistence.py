@@ -0,0 +1,413 @@
+"""
+persistence.py – Batched, off-request-path writes of uploads and forecasts
+
+Implements:
+- `ConnectionPool` – a fixed-size pool of database connections shared by
+  the writer threads
+- `SQLiteStore` / `PostgresStore` – insert batches into the `uploads` and
+  `forecasts` tables of supabase_schema.sql (SQLite creates a stand-in copy
+  of the two tables; Postgres expects the schema to exist)
+- `BatchWriter` – a bounded queue drained by background threads that write
+  up to `batch_size` rows per transaction
+- `persistence` – the writer used by the Flask backend, or None when
+  persistence is disabled
+
+Requests only build a small dict and `put_nowait()` it. Serializing
+`forecast_data` to JSON and the INSERTs happen on the writer threads. When
+the queue is full the row is dropped and counted rather than slowing the
+request down. Row ids are UUIDs, and an upload's id is its stored dataset
+id, so forecasts made by dataset id link to their upload.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .config import (
+    DATABASE_URL,
+    PERSISTENCE_BATCH_SIZE,
+    PERSISTENCE_DB_PATH,
+    PERSISTENCE_ENABLED,
+    PERSISTENCE_FLUSH_SECONDS,
+    PERSISTENCE_POOL_SIZE,
+    PERSISTENCE_QUEUE_SIZE,
+    PERSISTENCE_WRITERS,
+)
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_COLUMNS = ('id', 'file_name', 'file_size', 'original_rows', 'cleaned_rows',
+                  'data_quality_issues', 'data_insights', 'pattern_insights', 'created_at')
+FORECAST_COLUMNS = ('id', 'upload_id', 'model_used', 'model_explanation', 'forecast_data', 'forecast_insights',
+                    'confidence_level', 'forecast_periods', 'data_points_used', 'low_confidence', 'created_at')
+JSON_COLUMNS = {'data_quality_issues', 'data_insights', 'pattern_insights', 'forecast_data', 'forecast_insights'}
+
+TABLES = {'uploads': UPLOAD_COLUMNS, 'forecasts': FORECAST_COLUMNS}
+
+# Columns of a forecast frame kept in forecast_data, as in the API response
+FORECAST_DATA_COLUMNS = ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+def _json(value):
+    return json.dumps(value, default=_json_default)
+
+def _json_default(value):
+    # NumPy scalars and arrays, Timestamps and anything else with a plain equivalent
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+def _as_uuid(value):
+    """Dataset ids are UUID hex; Postgres wants the dashed form. None for anything else"""
+    try:
+        return str(uuid.UUID(value))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+def upload_row(payload):
+    """Flatten an upload record into UPLOAD_COLUMNS order"""
+    return (
+        _as_uuid(payload.get('id')) or str(uuid.uuid4()),
+        payload['file_name'],
+        payload.get('file_size'),
+        payload.get('original_rows'),
+        payload.get('cleaned_rows'),
+        _json(payload.get('data_quality_issues')),
+        _json(payload.get('data_insights')),
+        _json(payload.get('pattern_insights')),
+        payload.get('created_at') or _now(),
+    )
+
+def forecast_row(payload):
+    """Flatten a forecast record into FORECAST_COLUMNS order, serializing the forecast frame"""
+    # Whole-column conversions, then one dict per day: much cheaper than DataFrame.to_dict
+    forecast = payload['forecast']
+    columns = [np.datetime_as_string(forecast['ds'].to_numpy(dtype='datetime64[D]'), unit='D').tolist()]
+    columns += [forecast[name].to_numpy(dtype=float).tolist() for name in FORECAST_DATA_COLUMNS[1:]]
+    data = [dict(zip(FORECAST_DATA_COLUMNS, values)) for values in zip(*columns)]
+    insights = payload.get('insights') or {}
+    low_confidence = bool(payload.get('low_confidence'))
+    return (
+        str(uuid.uuid4()),
+        _as_uuid(payload.get('upload_id')),
+        insights.get('model_used', 'unknown'),
+        insights.get('model_explanation'),
+        _json(data),
+        _json(insights),
+        'low' if low_confidence else 'normal',
+        payload.get('forecast_periods'),
+        payload.get('data_points_used'),
+        low_confidence,
+        payload.get('created_at') or _now(),
+    )
+
+ROW_BUILDERS = {'uploads': upload_row, 'forecasts': forecast_row}
+
+class ConnectionPool:
+    """Up to `size` connections from `connect()`, handed out one per borrower
+
+    Connections are opened on first use, and each process gets its own: a
+    forked gunicorn worker must not share its parent's sockets or SQLite
+    handles.
+    """
+
+    def __init__(self, connect, size=PERSISTENCE_POOL_SIZE):
+        self._connect = connect
+        self._size = size
+        self._pid = None
+        self._lock = threading.Lock()
+        self._inherited = []
+
+    def _check_process(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Closing the parent's connections here would close them for the parent too
+                # (psycopg2 sends a terminate message), so they are only kept from being collected
+                self._inherited.extend(self._drain())
+            self._idle = queue.LifoQueue()
+            self._slots = threading.BoundedSemaphore(self._size)
+            self._pid = os.getpid()
+
+    def _drain(self):
+        conns = []
+        while True:
+            try:
+                conns.append(self._idle.get_nowait())
+            except queue.Empty:
+                return conns
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it returns to the pool unless the block raised"""
+        self._check_process()
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            except Exception:
+                # The connection may be mid-transaction or broken: replace it next time
+                _close_quietly(conn)
+                raise
+            self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        if self._pid != os.getpid():
+            return
+        for conn in self._drain():
+            _close_quietly(conn)
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+class SQLiteStore:
+    """The uploads/forecasts tables in a local SQLite file"""
+
+    def __init__(self, path=PERSISTENCE_DB_PATH, pool_size=PERSISTENCE_POOL_SIZE):
+        self.path = path
+        self.pool = ConnectionPool(self._connect, pool_size)
+
+    def _connect(self):
+        # The file and tables are created by the first connection, not when the app is imported.
+        # Nothing here is unpickled, so an existing directory is used as is; a new one is private.
+        os.makedirs(os.path.dirname(self.path) or '.', mode=0o700, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        with conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                "id TEXT PRIMARY KEY, user_id TEXT, file_name TEXT NOT NULL, file_size INTEGER, "
+                "original_rows INTEGER, cleaned_rows INTEGER, data_quality_issues TEXT, data_insights TEXT, "
+                "pattern_insights TEXT, created_at TEXT)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS forecasts ("
+                "id TEXT PRIMARY KEY, user_id TEXT, upload_id TEXT REFERENCES uploads(id) ON DELETE CASCADE, "
+                "model_used TEXT NOT NULL, model_explanation TEXT, forecast_data TEXT NOT NULL, "
+                "forecast_insights TEXT, confidence_level TEXT, forecast_periods INTEGER, "
+                "data_points_used INTEGER, low_confidence BOOLEAN DEFAULT FALSE, created_at TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_forecasts_upload_id ON forecasts(upload_id)")
+        return conn
+
+    def insert(self, table, rows):
+        """Insert `rows` (tuples in TABLES[table] order) in one transaction"""
+        columns = TABLES[table]
+        sql = (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+               f"ON CONFLICT (id) DO NOTHING")
+        with self.pool.connection() as conn, conn:
+            conn.executemany(sql, rows)
+
+    def count(self, table):
+        with self.pool.connection() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def close(self):
+        self.pool.close()
+
+class PostgresStore:
+    """The uploads/forecasts tables of supabase_schema.sql in Postgres (needs psycopg2)"""
+
+    def __init__(self, url=DATABASE_URL, pool_size=PERSISTENCE_POOL_SIZE):
+        try:
+            import psycopg2
+            import psycopg2.extras
+        except ImportError:
+            raise ImportError("Postgres persistence needs psycopg2. Please install it with: pip install psycopg2-binary")
+        self._extras = psycopg2.extras
+        self.url = url
+        self.pool = ConnectionPool(lambda: psycopg2.connect(url), pool_size)
+
+    def insert(self, table, rows):
+        columns = TABLES[table]
+        template = '(' + ', '.join(self._placeholder(column) for column in columns) + ')'
+        sql = f"INSERT INTO public.{table} ({', '.join(columns)}) VALUES %s ON CONFLICT (id) DO NOTHING"
+        with self.pool.connection() as conn:
+            with conn, conn.cursor() as cursor:
+                self._extras.execute_values(cursor, sql, rows, template=template, page_size=len(rows))
+
+    @staticmethod
+    def _placeholder(column):
+        if column in JSON_COLUMNS:
+            return '%s::jsonb'
+        if column == 'upload_id':
+            # A forecast of a dataset whose upload was never persisted is kept, unlinked
+            return '(SELECT id FROM public.uploads WHERE id = %s::uuid)'
+        return '%s'
+
+    def count(self, table):
+        with self.pool.connection() as conn:
+            with conn, conn.cursor() as cursor:
+                cursor.execute(f"SELECT COUNT(*) FROM public.{table}")
+                return cursor.fetchone()[0]
+
+    def close(self):
+        self.pool.close()
+
+class BatchWriter:
+    """Bounded queue of records written in batches by background threads"""
+
+    def __init__(self, store, queue_size=PERSISTENCE_QUEUE_SIZE, batch_size=PERSISTENCE_BATCH_SIZE,
+                 flush_seconds=PERSISTENCE_FLUSH_SECONDS, writers=PERSISTENCE_WRITERS):
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.writers = writers
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._counters = {'enqueued': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'batches': 0}
+
+    def record_upload(self, **payload):
+        """Queue an uploads row (see `upload_row` for the fields)"""
+        return self._put('uploads', payload)
+
+    def record_forecast(self, **payload):
+        """Queue a forecasts row (see `forecast_row` for the fields)"""
+        return self._put('forecasts', payload)
+
+    def _put(self, table, payload):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((table, payload))
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('enqueued')
+        return True
+
+    def _ensure_started(self):
+        # Threads don't survive a fork: gunicorn workers start their own on first use
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._threads = [threading.Thread(target=self._run, name=f"persistence-writer-{i}", daemon=True)
+                             for i in range(self.writers)]
+            for thread in self._threads:
+                thread.start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+
+            # Gather more records until the batch is full or the flush interval has passed
+            batch = [item]
+            deadline = time.monotonic() + self.flush_seconds
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            try:
+                self._write(batch)
+            finally:
+                for _ in range(len(batch) + stop):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch):
+        rows = {table: [] for table in TABLES}
+        for table, payload in batch:
+            try:
+                rows[table].append(ROW_BUILDERS[table](payload))
+            except Exception:
+                logger.exception("Could not serialize a %s record", table)
+                self._count('failed')
+
+        # Uploads first so forecasts can reference them
+        for table in ('uploads', 'forecasts'):
+            if not rows[table]:
+                continue
+            try:
+                self.store.insert(table, rows[table])
+                self._count('written', len(rows[table]))
+                self._count('batches')
+            except Exception:
+                self._write_one_by_one(table, rows[table])
+
+    def _write_one_by_one(self, table, rows):
+        """After a failed batch, save every row that can be saved on its own"""
+        for row in rows:
+            try:
+                self.store.insert(table, [row])
+                self._count('written')
+            except Exception:
+                logger.exception("Could not persist a %s row", table)
+                self._count('failed')
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def flush(self):
+        """Block until every queued record has been written or has failed"""
+        self._queue.join()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats['queued'] = self._queue.qsize()
+        return stats
+
+    def close(self):
+        """Write what is queued, stop the threads and close the connections"""
+        if self._pid == os.getpid():
+            for _ in self._threads:
+                self._queue.put(None)
+            for thread in self._threads:
+                thread.join()
+            self._pid = None
+        self.store.close()
+
+def create_store(url=DATABASE_URL):
+    """Postgres for a postgres:// DATABASE_URL, otherwise the SQLite stand-in"""
+    if url and url.startswith(('postgres://', 'postgresql://')):
+        return PostgresStore(url)
+    if url and url.startswith('sqlite:///'):
+        return SQLiteStore(url[len('sqlite:///'):])
+    return SQLiteStore()
+
+persistence = None
+if PERSISTENCE_ENABLED:
+    persistence = BatchWriter(create_store())
+    atexit.register(persistence.close)
@@ -1,9 +1,15 @@
 """preprocess.py – Simple helpers to clean messy sales data
 
 This script:
-1. Finds the date and sales columns in a messy CSV or DataFrame
+1. Finds the date and sales columns in a messy CSV or DataFrame, reading
+   only those columns from CSVs
 2. Cleans it into a tidy 2‑column format:  'ds' (date),  'y' (sales)
-3. Returns quick summary stats for the UI
+3. Returns quick summary stats for the UI, all from one statistics pass
+   (see stats.py)
+4. Resamples order-level rows onto a regular daily/weekly/monthly grid
+5. Streams large CSVs in chunks, aggregating to one row per day as it goes
+6. Optionally cleans multi-series uploads (e.g. per product) into a long
+   'series_id', 'ds', 'y' panel that `run_forecast_batch()` accepts directly
 
 Dependency footprint: **just pandas**.
 """
@@ -12,18 +18,17 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Union
 
-__all__ = ["clean_data", "diagnose_dataset", "validate_data_quality", "get_data_insights"]
+from .config import CSV_CHUNK_ROWS
+from .stats import series_statistics
 
-def clean_data(df):
-    """Clean and prepare sales data for forecasting"""
-    # Make a copy to avoid modifying original data
-    df_clean = df.copy()
-    
-    # Find date and sales columns
+__all__ = ["clean_data", "read_sales_csv", "resample_series", "clean_csv_stream", "split_panel", "diagnose_dataset", "validate_data_quality", "get_data_insights"]
+
+def detect_columns(columns):
+    """Find the date and sales columns from a list of column names"""
     date_col = None
     sales_col = None
     
-    for col in df_clean.columns:
+    for col in columns:
         col_lower = col.lower()
         if any(word in col_lower for word in ['date', 'time', 'day']):
             date_col = col
@@ -33,16 +38,215 @@ def clean_data(df):
     if not date_col or not sales_col:
         raise ValueError("Could not find date and sales columns. Please ensure your CSV has columns for dates and sales values.")
     
-    # Rename columns to standard format
-    df_clean = df_clean.rename(columns={date_col: 'ds', sales_col: 'y'})
+    return date_col, sales_col
+
+# Rows parsed up front to detect columns before the main read
+SAMPLE_ROWS = 100
+
+def _rewind(source):
+    """Seek a file-like source back to the start (paths need nothing)"""
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+def read_sales_csv(source, extra_columns=None, sample_rows=SAMPLE_ROWS):
+    """Read only the date and sales columns (plus `extra_columns`) from a CSV
+
+    The header and a small sample are parsed first to detect the columns; the
+    main read then parses just those with `usecols`, so free-text columns in
+    wide exports are never materialized.
+    """
+    sample = pd.read_csv(source, nrows=sample_rows)
+    date_col, sales_col = detect_columns(sample.columns)
+    
+    usecols = [date_col, sales_col]
+    usecols += [col for col in (extra_columns or []) if col in sample.columns and col not in usecols]
+    
+    # Small files fit entirely in the sample
+    if len(sample) < sample_rows:
+        return sample[usecols]
+    
+    _rewind(source)
+    return pd.read_csv(source, usecols=usecols)
+
+# Date formats tried against a sample of each upload, most common first.
+# Ambiguous day/month values resolve to US order because it is listed first.
+DATE_FORMATS = [
+    '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M', '%Y/%m/%d',
+    '%m/%d/%Y', '%m/%d/%Y %H:%M:%S', '%m/%d/%Y %H:%M', '%m/%d/%y', '%m-%d-%Y',
+    '%d/%m/%Y', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%y', '%d-%m-%Y',
+    '%d.%m.%Y', '%d.%m.%Y %H:%M:%S', '%d.%m.%Y %H:%M',
+    '%b %d, %Y', '%d %b %Y', '%B %d, %Y', '%d %B %Y', '%Y%m%d',
+]
+
+DATE_SAMPLE_SIZE = 500
+
+def infer_date_format(values, sample_size=DATE_SAMPLE_SIZE):
+    """Pick the format from DATE_FORMATS that parses most of a sample, or None"""
+    # Spread the sample over the whole column so later formats are seen too
+    sample = values.iloc[::max(1, len(values) // sample_size)].dropna()
+    if len(sample) == 0:
+        sample = values.dropna().head(sample_size)
+    if len(sample) == 0:
+        return None
+    sample = sample.astype(str).str.strip()
+    
+    best_format, best_count = None, 0
+    for fmt in DATE_FORMATS:
+        count = pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum()
+        if count > best_count:
+            best_format, best_count = fmt, count
+            if count == len(sample):
+                break
+    return best_format
+
+# Character widths of zero-padded strftime fields
+FIELD_WIDTHS = {'Y': 4, 'm': 2, 'd': 2, 'H': 2, 'M': 2, 'S': 2}
+
+def parse_fixed_width_dates(values, date_format):
+    """Parse zero-padded dates like '%d.%m.%Y %H:%M' with NumPy digit arithmetic
+
+    Every value is viewed as a row of bytes, each field is read straight from
+    its character offset and the timestamps are assembled as datetime64. This
+    skips pandas' per-element strptime path for non-ISO layouts. Values that
+    don't fit the layout come back as NaT. Returns None if the format has
+    fields this fast path doesn't handle, or is already ISO 8601 (which
+    pandas parses in C).
+    """
+    if date_format.startswith('%Y-%m-%d'):
+        return None
+    
+    # Locate each field and literal separator by character offset
+    offsets = {}
+    literals = []
+    width = 0
+    i = 0
+    while i < len(date_format):
+        if date_format[i] == '%':
+            field = date_format[i + 1:i + 2]
+            if field not in FIELD_WIDTHS or field in offsets:
+                return None
+            offsets[field] = width
+            width += FIELD_WIDTHS[field]
+            i += 2
+        else:
+            literals.append((width, ord(date_format[i])))
+            width += 1
+            i += 1
+    if not {'Y', 'm', 'd'} <= offsets.keys() or values.dtype != object:
+        return None
+    
+    # One byte row per value; the extra column catches values that are too long
+    try:
+        raw = values.to_numpy().astype(f'S{width + 1}')
+    except (UnicodeEncodeError, TypeError, ValueError):
+        return None
+    codes = np.frombuffer(raw.tobytes(), dtype=np.uint8).reshape(len(raw), width + 1)
+    
+    valid = codes[:, width] == 0
+    for position, char in literals:
+        valid &= codes[:, position] == char
+    
+    def field(name, default=0):
+        if name not in offsets:
+            return np.full(len(raw), default, dtype=np.int64)
+        digits = codes[:, offsets[name]:offsets[name] + FIELD_WIDTHS[name]].astype(np.int64) - ord('0')
+        valid[:] &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+        return digits @ (10 ** np.arange(FIELD_WIDTHS[name] - 1, -1, -1))
+    
+    year, month, day = field('Y'), field('m'), field('d')
+    hour, minute, second = field('H'), field('M'), field('S')
+    valid &= (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+    valid &= (hour < 24) & (minute < 60) & (second < 60)
+    
+    # Build the date from its month, then reject overflow such as 31 February
+    month_start = np.where(valid, (year - 1970) * 12 + month - 1, 0).astype('datetime64[M]')
+    dates = month_start.astype('datetime64[D]') + np.where(valid, day - 1, 0)
+    valid &= dates.astype('datetime64[M]') == month_start
+    
+    stamps = dates.astype('datetime64[ns]') + (hour * 3600 + minute * 60 + second) * np.timedelta64(1, 's')
+    stamps[~valid] = np.datetime64('NaT')
+    return pd.Series(stamps, index=values.index)
+
+def parse_dates(values, date_format=None):
+    """Parse a date column with an explicit (inferred) format
+
+    Values that don't match the format fall back to pandas' slower per-element
+    'mixed' parsing; anything still unparseable becomes NaT.
+    Returns (parsed, date_format, unparseable_count).
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values, None, 0
+    
+    # Order exports repeat each date many times; parse each distinct value once
+    head = values.iloc[:DATE_SAMPLE_SIZE]
+    if len(values) > DATE_SAMPLE_SIZE and head.nunique() < len(head) // 2:
+        codes, uniques = pd.factorize(values)
+        parsed_uniques, date_format, _ = parse_dates(pd.Series(uniques, dtype=object), date_format)
+        parsed = pd.Series(parsed_uniques.to_numpy()[codes], index=values.index)
+        parsed[codes == -1] = pd.NaT
+        unparseable = int((parsed.isna() & (codes != -1)).sum())
+        return parsed, date_format, unparseable
+    
+    present = values.notna()
+    date_format = date_format or infer_date_format(values)
+    if date_format is None:
+        parsed = pd.to_datetime(values, format='mixed', errors='coerce')
+    else:
+        parsed = parse_fixed_width_dates(values, date_format)
+        if parsed is None:
+            parsed = pd.to_datetime(values, format=date_format, errors='coerce')
+        else:
+            # Unpadded values like '3/7/2024' still match the format via strptime
+            retry = parsed.isna() & present
+            if retry.any():
+                parsed[retry] = pd.to_datetime(values[retry], format=date_format, errors='coerce')
+        
+        # Only the stragglers pay for element-wise parsing
+        retry = parsed.isna() & present
+        if retry.any():
+            parsed[retry] = pd.to_datetime(values[retry], format='mixed', errors='coerce')
+    
+    unparseable = int((parsed.isna() & present).sum())
+    return parsed, date_format, unparseable
+
+def clean_sales_values(values):
+    """Remove currency symbols and convert sales to numeric"""
+    if values.dtype == 'object':
+        values = values.astype(str).str.replace('$', '').str.replace(',', '')
+        values = pd.to_numeric(values, errors='coerce')
+    return values
+
+def clean_data(df, group_by=None, freq=None, agg='sum', fill='zero'):
+    """Clean and prepare sales data for forecasting
+
+    With `group_by` (a column name or list of names) the result is a long-format
+    panel with columns 'series_id', 'ds', 'y' instead of a single series.
+    With `freq` the cleaned rows are resampled onto a regular grid, see
+    `resample_series()`. `df` may also be a CSV path or file-like object, in
+    which case only the needed columns are read.
+    """
+    if isinstance(group_by, str):
+        group_by = [group_by]
+    
+    if not isinstance(df, pd.DataFrame):
+        df = read_sales_csv(df, extra_columns=group_by)
+    
+    # Find date and sales columns
+    date_col, sales_col = detect_columns(df.columns)
+    
+    if group_by is not None:
+        if freq is not None:
+            raise ValueError("Resampling is only supported when cleaning a single series")
+        return clean_panel(df, date_col, sales_col, group_by)
     
-    # Convert date column to datetime
-    df_clean['ds'] = pd.to_datetime(df_clean['ds'])
+    # Copy just the date and sales columns, renamed to the standard format
+    df_clean = df[[date_col, sales_col]].rename(columns={date_col: 'ds', sales_col: 'y'})
+    
+    # Convert date column to datetime using a format inferred from a sample
+    df_clean['ds'], date_format, unparseable = parse_dates(df_clean['ds'])
     
     # Remove currency symbols and convert sales to numeric
-    if df_clean['y'].dtype == 'object':
-        df_clean['y'] = df_clean['y'].astype(str).str.replace('$', '').str.replace(',', '')
-        df_clean['y'] = pd.to_numeric(df_clean['y'], errors='coerce')
+    df_clean['y'] = clean_sales_values(df_clean['y'])
     
     # Remove rows with missing values
     df_clean = df_clean.dropna()
@@ -50,83 +254,223 @@ def clean_data(df):
     # Sort by date
     df_clean = df_clean.sort_values('ds')
     
-    # Keep only the required columns
-    df_clean = df_clean[['ds', 'y']]
-    
     if len(df_clean) == 0:
         raise ValueError("No valid data rows found after cleaning.")
     
+    # Collapse duplicate dates onto a regular grid
+    if freq is not None:
+        df_clean = resample_series(df_clean, freq, agg, fill)
+    
+    # Record how dates were parsed so quality checks can report dropped rows
+    df_clean.attrs['date_format'] = date_format
+    df_clean.attrs['unparseable_dates'] = unparseable
+    
     return df_clean
 
-def diagnose_dataset(df):
+# Friendly names for the resampling frequencies the UI offers
+FREQUENCIES = {'daily': 'D', 'weekly': 'W', 'monthly': 'MS'}
+
+FILL_POLICIES = ('zero', 'ffill', 'interpolate', 'drop')
+
+def resample_series(df, freq='daily', agg='sum', fill='zero'):
+    """Aggregate a cleaned series onto a regular daily, weekly or monthly grid
+
+    `agg` is 'sum' or 'mean'. `fill` decides what happens to periods with no
+    rows: 'zero' (no sales), 'ffill' (carry the last value), 'interpolate'
+    (linear in time) or 'drop' (leave them out).
+    """
+    rule = resample_rule(freq, agg, fill)
+    
+    resampler = df.set_index('ds')['y'].resample(rule)
+    # min_count=1 keeps empty periods as NaN so the fill policy decides them
+    y = resampler.sum(min_count=1) if agg == 'sum' else resampler.mean()
+    
+    resampled = fill_periods(y, fill)
+    resampled.attrs.update(df.attrs)
+    return resampled
+
+def resample_rule(freq, agg, fill):
+    """Validate resampling options and return the pandas rule for `freq`"""
+    rule = FREQUENCIES.get(freq, freq)
+    if rule not in FREQUENCIES.values():
+        raise ValueError(f"Unknown frequency: {freq}. Use daily, weekly or monthly.")
+    if agg not in ('sum', 'mean'):
+        raise ValueError(f"Unknown aggregation: {agg}. Use sum or mean.")
+    if fill not in FILL_POLICIES:
+        raise ValueError(f"Unknown fill policy: {fill}. Use one of {', '.join(FILL_POLICIES)}.")
+    return rule
+
+def fill_periods(y, fill):
+    """Apply a fill policy to a period-indexed series (NaN = no rows) and return a ds/y frame"""
+    if fill == 'zero':
+        y = y.fillna(0.0)
+    elif fill == 'ffill':
+        y = y.ffill()
+    elif fill == 'interpolate':
+        y = y.interpolate(method='time')
+    else:
+        y = y.dropna()
+    
+    return pd.DataFrame({'ds': y.index, 'y': y.values.astype(float)})
+
+def clean_csv_stream(file, chunksize=CSV_CHUNK_ROWS, freq='daily', agg='sum', fill='zero'):
+    """Clean a CSV in chunks, aggregating sales per day as each chunk arrives
+
+    Columns are detected from the header and only those two are parsed, so
+    peak memory depends on the chunk size and the number of distinct days,
+    not on the file size. The per-day sums and row counts are then rolled up
+    to `freq`, so a mean is taken over the rows of each period (not over
+    daily means), exactly as `resample_series()` does in memory.
+    Returns (df_clean, rows_read).
+    """
+    rule = resample_rule(freq, agg, fill)
+    
+    date_col, sales_col = detect_columns(pd.read_csv(file, nrows=0).columns)
+    _rewind(file)
+    
+    totals = None
+    counts = None
+    rows_read = 0
+    date_format = None
+    unparseable = 0
+    
+    for chunk in pd.read_csv(file, chunksize=chunksize, usecols=[date_col, sales_col]):
+        rows_read += len(chunk)
+        
+        # The format inferred on the first chunk is reused for the rest
+        ds, date_format, chunk_unparseable = parse_dates(chunk[date_col], date_format)
+        ds = ds.dt.normalize()
+        unparseable += chunk_unparseable
+        y = clean_sales_values(chunk[sales_col])
+        valid = ds.notna() & y.notna()
+        grouped = y[valid].groupby(ds[valid])
+        
+        # Running per-day sum and count; a mean is just their ratio at the end
+        chunk_totals, chunk_counts = grouped.sum(), grouped.count()
+        if totals is None:
+            totals, counts = chunk_totals, chunk_counts
+        else:
+            totals = totals.add(chunk_totals, fill_value=0)
+            counts = counts.add(chunk_counts, fill_value=0)
+    
+    if totals is None or len(totals) == 0:
+        raise ValueError("No valid data rows found after cleaning.")
+    
+    # Roll the daily sums and counts up to the target periods before dividing
+    totals = totals.sort_index().resample(rule).sum(min_count=1)
+    if agg == 'mean':
+        counts = counts.sort_index().resample(rule).sum(min_count=1)
+        totals = totals / counts
+    df_clean = fill_periods(totals, fill)
+    df_clean.attrs['date_format'] = date_format
+    df_clean.attrs['unparseable_dates'] = unparseable
+    
+    return df_clean, rows_read
+
+def clean_panel(df, date_col, sales_col, group_by):
+    """Clean every group of a multi-series upload in one vectorized pass"""
+    missing = [col for col in group_by if col not in df.columns]
+    if missing:
+        raise ValueError(f"Grouping columns not found: {', '.join(missing)}")
+    
+    # Work on just the columns we need; other columns' gaps shouldn't drop rows
+    panel = df[list(group_by) + [date_col, sales_col]]
+    panel = panel[panel[group_by].notna().all(axis=1)]
+    ds, _, _ = parse_dates(panel[date_col])
+    y = clean_sales_values(panel[sales_col])
+    
+    # Build the series id column by column, never group by group
+    series_id = panel[group_by[0]].astype(str)
+    for col in group_by[1:]:
+        series_id = series_id + ' | ' + panel[col].astype(str)
+    
+    panel = pd.DataFrame({'series_id': series_id.values, 'ds': ds.values, 'y': y.values})
+    panel = panel.dropna(subset=['ds', 'y'])
+    panel = panel.sort_values(['series_id', 'ds'], kind='stable').reset_index(drop=True)
+    
+    if len(panel) == 0:
+        raise ValueError("No valid data rows found after cleaning.")
+    
+    return panel
+
+def split_panel(panel):
+    """Split a long-format panel into {series_id: ds/y DataFrame} for batch forecasting"""
+    return {
+        series_id: group[['ds', 'y']].reset_index(drop=True)
+        for series_id, group in panel.groupby('series_id', sort=False)
+    }
+
+def diagnose_dataset(df, stats=None):
     """Get basic statistics about the dataset"""
+    stats = stats or series_statistics(df)
     stats = {
-        'total_rows': len(df),
-        'date_range': f"{df['ds'].min().strftime('%Y-%m-%d')} to {df['ds'].max().strftime('%Y-%m-%d')}",
-        'avg_sales': round(df['y'].mean(), 2),
-        'min_sales': round(df['y'].min(), 2),
-        'max_sales': round(df['y'].max(), 2),
-        'total_sales': round(df['y'].sum(), 2)
+        'total_rows': stats['rows'],
+        'date_range': f"{stats['date_min'].strftime('%Y-%m-%d')} to {stats['date_max'].strftime('%Y-%m-%d')}",
+        'avg_sales': round(stats['mean'], 2),
+        'min_sales': round(stats['min'], 2),
+        'max_sales': round(stats['max'], 2),
+        'total_sales': round(stats['sum'], 2)
     }
     return stats
 
-def validate_data_quality(df):
-    """Check for common data quality issues"""
+def validate_data_quality(df, stats=None):
+    """Check for common data quality issues
+
+    Pass `stats` from `series_statistics(df)` to share one statistics pass
+    with `get_data_insights`.
+    """
+    stats = stats or series_statistics(df)
     issues = []
     insights = {}
     
     # Check for missing values
-    missing_count = df['y'].isnull().sum()
-    if missing_count > 0:
-        issues.append(f"Found {missing_count} missing sales values")
+    if stats['missing'] > 0:
+        issues.append(f"Found {stats['missing']} missing sales values")
+    
+    # Check for dates that could not be parsed during cleaning
+    unparseable_dates = df.attrs.get('unparseable_dates', 0)
+    if unparseable_dates > 0:
+        issues.append(f"Skipped {unparseable_dates} rows with unreadable dates")
     
     # Check for zero variance
-    if df['y'].std() == 0:
+    if stats['std'] == 0:
         issues.append("All sales values are identical")
     
     # Check for outliers (values more than 3 standard deviations from mean)
-    mean_sales = df['y'].mean()
-    std_sales = df['y'].std()
-    outliers = df[abs(df['y'] - mean_sales) > 3 * std_sales]
-    if len(outliers) > 0:
-        issues.append(f"Found {len(outliers)} potential outliers")
+    if stats['outliers'] > 0:
+        issues.append(f"Found {stats['outliers']} potential outliers")
     
     # Check for date gaps
-    df_sorted = df.sort_values('ds')
-    date_diffs = df_sorted['ds'].diff().dt.days
-    large_gaps = date_diffs[date_diffs > 7]
-    if len(large_gaps) > 0:
-        issues.append(f"Found {len(large_gaps)} gaps larger than 7 days in data")
+    if stats['large_gaps'] > 0:
+        issues.append(f"Found {stats['large_gaps']} gaps larger than 7 days in data")
     
     insights = {
-        'total_records': len(df),
-        'date_range_days': (df['ds'].max() - df['ds'].min()).days,
-        'avg_daily_sales': round(df['y'].mean(), 2),
-        'sales_volatility': round(df['y'].std() / df['y'].mean(), 3)
+        'total_records': stats['rows'],
+        'date_range_days': stats['range_days'],
+        'avg_daily_sales': round(stats['mean'], 2),
+        'sales_volatility': round(float(np.float64(stats['std']) / stats['mean']), 3)
     }
     
     return {"issues": issues, "insights": insights}
 
-def get_data_insights(df):
+def get_data_insights(df, stats=None):
     """Analyze data patterns and provide insights"""
+    stats = stats or series_statistics(df)
     insights = {}
     
     # Weekly pattern analysis
-    df_copy = df.copy()
-    df_copy['day_of_week'] = df_copy['ds'].dt.dayofweek
-    daily_avg = df_copy.groupby('day_of_week')['y'].mean()
-    
-    best_day_idx = daily_avg.idxmax()
-    day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    best_day = day_names[best_day_idx]
-    
-    insights['weekly_pattern'] = f"Best sales day: {best_day}"
+    daily_avg = stats['weekday_means']
+    if not np.isnan(daily_avg).all():
+        best_day_idx = int(np.nanargmax(daily_avg))
+        day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+        best_day = day_names[best_day_idx]
+        
+        insights['weekly_pattern'] = f"Best sales day: {best_day}"
     
     # Trend analysis
-    df_sorted = df.sort_values('ds')
-    if len(df_sorted) > 10:
-        first_half = df_sorted.iloc[:len(df_sorted)//2]['y'].mean()
-        second_half = df_sorted.iloc[len(df_sorted)//2:]['y'].mean()
+    if stats['rows'] > 10:
+        first_half = stats['first_half_mean']
+        second_half = stats['second_half_mean']
         
         if second_half > first_half * 1.1:
             insights['trend'] = "Sales appear to be increasing over time"
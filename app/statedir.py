@@ -0,0 +1,31 @@
+"""
+statedir.py – Directories for on-disk state that only the app's user can write
+
+Implements:
+- `private_dir()` – create a state directory with mode 0700, or check that an
+  existing one is safe to load state from
+
+The forecast cache and the job results hold pickled objects, and unpickling
+runs code. Anyone who can write files where they are read could therefore
+run code as the app, so every state directory must belong to the app's user
+and must not be writable by the group or by others.
+"""
+
+import os
+import stat
+
+def private_dir(path):
+    """Create `path` (and missing parents) with mode 0700, or check an existing one; returns `path`
+
+    Raises PermissionError when the directory belongs to another user or
+    others can write to it.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.stat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise NotADirectoryError(f"State path {path} is not a directory")
+    if hasattr(os, 'getuid') and st.st_uid != os.getuid():
+        raise PermissionError(f"State directory {path} belongs to another user")
+    if st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"State directory {path} is writable by other users; run chmod go-w on it")
+    return path
@@ -0,0 +1,201 @@
+"""
+stats.py – One-pass summary statistics of a cleaned ds/y series
+
+Implements:
+- `series_statistics()` – moments, extrema, missing values, outliers, date
+  gaps, the day-of-week profile and a first-half/second-half split, from a
+  single pass over the two columns
+- `seasonality_strength()` – day-of-week variation derived from the profile
+- `RunningStats` – the same statistics maintained incrementally as rows are
+  appended to a stored dataset
+
+`validate_data_quality`, `get_data_insights`, `diagnose_dataset` and
+`utils.detect_seasonality` all read their numbers from this one dict instead
+of each copying, sorting and grouping the frame again. Values match the
+pandas definitions those functions used: NaN sales are skipped, the standard
+deviation uses ddof=1, and gap lengths are whole days.
+"""
+
+import numpy as np
+import pandas as pd
+
+NS_PER_DAY = 86_400 * 10 ** 9
+
+# Days after which a jump between consecutive dates counts as a gap
+GAP_DAYS = 7
+
+# Values further than this many standard deviations from the mean are outliers
+OUTLIER_STDS = 3
+
+def series_statistics(df):
+    """Summary statistics of a ds/y DataFrame as a plain dict"""
+    ds = df['ds']
+    if not pd.api.types.is_datetime64_any_dtype(ds):
+        ds = pd.to_datetime(ds)
+    ns = ds.to_numpy(dtype='datetime64[ns]').view('int64')
+    y = df['y'].to_numpy(dtype=float)
+    n = len(y)
+
+    # Cleaned data is already date-ordered; only sort when it isn't
+    if n > 1 and not (np.diff(ns) >= 0).all():
+        order = np.argsort(ns, kind='stable')
+        ns, y = ns[order], y[order]
+
+    valid = ~np.isnan(y)
+    count = int(valid.sum())
+    values = y if count == n else y[valid]
+
+    # Moments and extrema over the non-missing values
+    total = float(values.sum()) if count else 0.0
+    mean = total / count if count else float('nan')
+    centered = values - mean
+    std = float(np.sqrt((centered @ centered) / (count - 1))) if count > 1 else float('nan')
+    outliers = int((np.abs(centered) > OUTLIER_STDS * std).sum()) if count > 1 else 0
+
+    # Gaps between consecutive dates, in whole days
+    gap_days = np.diff(ns) // NS_PER_DAY
+
+    # Day-of-week profile: 1970-01-01 was a Thursday (dayofweek 3)
+    weekday = (ns // NS_PER_DAY + 3) % 7
+    weekday_counts = np.bincount(weekday[valid], minlength=7)
+    weekday_sums = np.bincount(weekday[valid], weights=y[valid], minlength=7)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weekday_means = np.where(weekday_counts > 0, weekday_sums / weekday_counts, np.nan)
+
+    # Mean of the first and second half of the rows in date order
+    half = n // 2
+    first = y[:half]
+    second = y[half:]
+    first_half_mean = float(np.nanmean(first)) if np.any(~np.isnan(first)) else float('nan')
+    second_half_mean = float(np.nanmean(second)) if np.any(~np.isnan(second)) else float('nan')
+
+    return {
+        'rows': n,
+        'count': count,
+        'missing': n - count,
+        'sum': total,
+        'mean': mean,
+        'std': std,
+        'min': float(values.min()) if count else float('nan'),
+        'max': float(values.max()) if count else float('nan'),
+        'outliers': outliers,
+        'date_min': pd.Timestamp(ns.min()) if n else pd.NaT,
+        'date_max': pd.Timestamp(ns.max()) if n else pd.NaT,
+        'range_days': int((ns.max() - ns.min()) // NS_PER_DAY) if n else 0,
+        'large_gaps': int((gap_days > GAP_DAYS).sum()),
+        'weekday_means': weekday_means,
+        'first_half_mean': first_half_mean,
+        'second_half_mean': second_half_mean,
+    }
+
+def seasonality_strength(stats):
+    """Coefficient of variation of the per-weekday means (NaN with fewer than two weekdays)"""
+    means = stats['weekday_means'][~np.isnan(stats['weekday_means'])]
+    if len(means) < 2:
+        return float('nan')
+    return float(means.std(ddof=1) / means.mean())
+
+class RunningStats:
+    """The mergeable part of `series_statistics`, updated batch by batch
+
+    Count, mean and variance follow Welford's algorithm in its batch form
+    (Chan et al.): each new batch is summarized with NumPy and merged in
+    O(1), so an update costs O(new rows) however long the history is. Also
+    tracks extrema, the sum, day-of-week accumulators, first/last date and
+    the number of gaps longer than GAP_DAYS. Batches must arrive in date
+    order with no missing values.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sum = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self.weekday_sums = np.zeros(7)
+        self.weekday_counts = np.zeros(7, dtype=np.int64)
+        self.first_ns = None
+        self.last_ns = None
+        self.large_gaps = 0
+
+    def update(self, ns, y):
+        """Fold in a batch: `ns` are sorted datetime64[ns] values as int64, `y` the sales"""
+        ns = np.asarray(ns, dtype=np.int64)
+        y = np.asarray(y, dtype=float)
+        if len(y) == 0:
+            return self
+
+        # Batch moments, then the parallel-variance merge
+        batch_count = len(y)
+        batch_mean = float(y.mean())
+        centered = y - batch_mean
+        batch_m2 = float(centered @ centered)
+        total = self.count + batch_count
+        delta = batch_mean - self.mean
+        self.mean += delta * batch_count / total
+        self.m2 += batch_m2 + delta * delta * self.count * batch_count / total
+        self.count = total
+
+        self.sum += float(y.sum())
+        self.min = min(self.min, float(y.min()))
+        self.max = max(self.max, float(y.max()))
+
+        weekday = (ns // NS_PER_DAY + 3) % 7
+        self.weekday_sums += np.bincount(weekday, weights=y, minlength=7)
+        self.weekday_counts += np.bincount(weekday, minlength=7)
+
+        # Gaps inside the batch plus the one joining it to the previous batch
+        edges = ns if self.last_ns is None else np.concatenate(([self.last_ns], ns))
+        self.large_gaps += int((np.diff(edges) // NS_PER_DAY > GAP_DAYS).sum())
+        if self.first_ns is None:
+            self.first_ns = int(ns[0])
+        self.last_ns = int(ns[-1])
+        return self
+
+    def to_dict(self):
+        """JSON-serializable state, restored with `from_dict()`"""
+        state = dict(vars(self))
+        state['weekday_sums'] = self.weekday_sums.tolist()
+        state['weekday_counts'] = self.weekday_counts.tolist()
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        running = cls()
+        for name in vars(running):
+            setattr(running, name, state[name])
+        running.weekday_sums = np.array(state['weekday_sums'], dtype=float)
+        running.weekday_counts = np.array(state['weekday_counts'], dtype=np.int64)
+        return running
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else float('nan')
+
+    def statistics(self, outliers, first_half_mean, second_half_mean):
+        """A `series_statistics`-style dict
+
+        Outlier counts and half-split means depend on the whole history in a
+        way no running total captures, so the caller supplies them.
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weekday_means = np.where(self.weekday_counts > 0, self.weekday_sums / self.weekday_counts, np.nan)
+        return {
+            'rows': self.count,
+            'count': self.count,
+            'missing': 0,
+            'sum': self.sum,
+            'mean': self.mean if self.count else float('nan'),
+            'std': self.std,
+            'min': self.min if self.count else float('nan'),
+            'max': self.max if self.count else float('nan'),
+            'outliers': outliers,
+            'date_min': pd.Timestamp(self.first_ns) if self.count else pd.NaT,
+            'date_max': pd.Timestamp(self.last_ns) if self.count else pd.NaT,
+            'range_days': (self.last_ns - self.first_ns) // NS_PER_DAY if self.count else 0,
+            'large_gaps': self.large_gaps,
+            'weekday_means': weekday_means,
+            'first_half_mean': first_half_mean,
+            'second_half_mean': second_half_mean,
+        }
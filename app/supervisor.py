@@ -0,0 +1,135 @@
+"""
+supervisor.py – Run a model fit in a child process it can kill
+
+Implements:
+- `run_supervised()` – call a function in a separate process with a wall-clock
+  deadline, an address-space ceiling and cooperative cancellation
+- `fit_context()` – the multiprocessing context fit processes start from
+- `FitAborted` and its subclasses `FitTimeout`, `FitMemoryExceeded`, `FitCancelled`
+
+A fit that hangs or balloons only takes its own child process down; the
+caller gets an exception it can turn into a fallback instead of losing the
+web worker. Exceptions raised by the function itself are re-raised unchanged.
+
+Children start from a forkserver by default rather than a fork of the web
+worker. The worker is multithreaded, and a fork taken while another thread
+holds a lock (logging, the allocator, BLAS) leaves the child waiting on it
+until the deadline, which would look like a timeout. The forkserver is a
+single-threaded process that imports the forecast module and Prophet once,
+so each child still starts with the heavy imports done.
+"""
+
+import multiprocessing
+import os
+import signal
+import time
+
+from .config import FIT_MEMORY_LIMIT_MB, FIT_START_METHOD, FIT_TIMEOUT_SECONDS
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, the deadline still applies
+    resource = None
+
+# How often the parent checks the deadline and the cancel flag
+POLL_INTERVAL = 0.05
+
+class FitAborted(RuntimeError):
+    """The supervised call was stopped before it returned"""
+    reason = 'aborted'
+
+class FitTimeout(FitAborted):
+    reason = 'timeout'
+
+class FitMemoryExceeded(FitAborted):
+    reason = 'memory'
+
+class FitCancelled(FitAborted):
+    reason = 'cancelled'
+
+def fit_context(start_method=FIT_START_METHOD):
+    """The multiprocessing context for fit processes (supervised fits and the fit and job pools)"""
+    ctx = multiprocessing.get_context(start_method)
+    if start_method == 'forkserver':
+        # Only takes effect before the server starts; modules that fail to import are skipped
+        ctx.set_forkserver_preload([f'{__package__}.forecast', 'prophet'])
+    return ctx
+
+def _limit_memory(memory_limit_mb):
+    """Cap this process's address space; inherited by any solver it launches"""
+    if resource is None or not memory_limit_mb:
+        return
+    limit = int(memory_limit_mb) * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+def _kill_tree(process):
+    """Kill the child and anything it started (e.g. the Stan sampler binary)"""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (AttributeError, OSError):
+        process.kill()
+
+def _child(conn, fn, args, kwargs, memory_limit_mb):
+    """Child process entry point: run fn and send back ('ok'|'error'|'memory', payload)"""
+    try:
+        # Own process group so a timeout can kill solver subprocesses too
+        if hasattr(os, 'setpgrp'):
+            os.setpgrp()
+        _limit_memory(memory_limit_mb)
+        outcome = ('ok', fn(*args, **kwargs))
+    except MemoryError:
+        outcome = ('memory', None)
+    except Exception as e:
+        outcome = ('error', e)
+    try:
+        conn.send(outcome)
+    except Exception as e:
+        # Result or exception didn't pickle; report it as a plain error
+        conn.send(('error', RuntimeError(f"{type(e).__name__}: {e}")))
+    finally:
+        conn.close()
+
+def run_supervised(fn, *args, timeout=FIT_TIMEOUT_SECONDS, memory_limit_mb=FIT_MEMORY_LIMIT_MB,
+                   cancel_event=None, start_method=FIT_START_METHOD, **kwargs):
+    """Call `fn(*args, **kwargs)` in a child process and return its result
+
+    Raises FitTimeout after `timeout` seconds, FitMemoryExceeded if the child
+    runs out of its `memory_limit_mb` address space (or is killed by the OS),
+    and FitCancelled as soon as `cancel_event.is_set()` (any threading or
+    multiprocessing Event). A timeout or limit of None/0 disables that check.
+    """
+    ctx = fit_context(start_method)
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_child, args=(child_conn, fn, args, kwargs, memory_limit_mb), daemon=True)
+    process.start()
+    child_conn.close()
+
+    deadline = time.monotonic() + timeout if timeout else None
+    try:
+        while not parent_conn.poll(POLL_INTERVAL):
+            if cancel_event is not None and cancel_event.is_set():
+                raise FitCancelled("Model fit was cancelled")
+            if deadline is not None and time.monotonic() > deadline:
+                raise FitTimeout(f"Model fit exceeded the {timeout:g}s deadline")
+            if not process.is_alive() and not parent_conn.poll():
+                # Killed without reporting back, typically by the OOM killer
+                raise FitMemoryExceeded(f"Model fit process died (exit code {process.exitcode})")
+
+        try:
+            status, payload = parent_conn.recv()
+        except EOFError:
+            raise FitMemoryExceeded(f"Model fit process died (exit code {process.exitcode})")
+    finally:
+        if process.is_alive():
+            _kill_tree(process)
+        process.join()
+        parent_conn.close()
+
+    if status == 'memory':
+        raise FitMemoryExceeded(f"Model fit exceeded the {memory_limit_mb}MB memory limit")
+    if status == 'error':
+        raise payload
+    return payload
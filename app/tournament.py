@@ -0,0 +1,155 @@
+"""
+tournament.py – Holdout tournament behind model_choice="auto"
+
+Implements:
+- `eligible_candidates()` – the models that can fit a series of this length
+- `run_tournament()` – race the candidates on the most recent holdout windows
+  under a wall-clock budget and return the winner with a report
+
+Each round holds out the next-most-recent `holdout` periods, fits every
+surviving candidate on the data before them and scores the forecast with
+`evaluate_forecast`. The cheap trend, lag and Holt-Winters models run inline
+on threads of this process, so they share the GIL and effectively fit one
+after another; only Prophet, in a supervised child process that is killed
+when the budget runs out, fits concurrently with them. After each round any
+candidate whose mean error is worse than the leader's by
+TOURNAMENT_ELIMINATION_RATIO stops competing, so an obviously losing slow
+model doesn't pay for the remaining rounds.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+from .config import (
+    ABSOLUTE_MIN, FIT_MEMORY_LIMIT_MB, MIN_RELIABLE_ROWS, TOURNAMENT_BUDGET_SECONDS,
+    TOURNAMENT_ELIMINATION_RATIO, TOURNAMENT_ROUNDS
+)
+from .ets import min_rows as ets_min_rows
+from .lags import min_rows as lag_min_rows
+from .supervisor import FitAborted, run_supervised
+
+# Models cheap enough to fit in the calling process
+INLINE_MODELS = ('linear', 'lag', 'ets')
+
+@lru_cache(maxsize=1)
+def prophet_available():
+    try:
+        import prophet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def min_train_rows(model):
+    """Smallest training window a candidate is entered with"""
+    return {'linear': ABSOLUTE_MIN, 'lag': lag_min_rows(), 'ets': ets_min_rows(), 'prophet': MIN_RELIABLE_ROWS}[model]
+
+def eligible_candidates(train_size):
+    """Models worth entering for a training window of `train_size` rows"""
+    candidates = [c for c in INLINE_MODELS if train_size >= min_train_rows(c)]
+    if train_size >= min_train_rows('prophet') and prophet_available():
+        candidates.append('prophet')
+    return candidates
+
+def _holdout_forecast(forecast_fn, train, model, horizon, timeout):
+    """Fit one candidate on `train`; returns (yhat, seconds, error)"""
+    start = time.perf_counter()
+    try:
+        if model in INLINE_MODELS:
+            result = forecast_fn(train, model, horizon)
+        else:
+            result = run_supervised(forecast_fn, train, model, horizon,
+                                    timeout=timeout, memory_limit_mb=FIT_MEMORY_LIMIT_MB)
+        return result['forecast']['yhat'].values, time.perf_counter() - start, None
+    except Exception as e:
+        return None, time.perf_counter() - start, e
+
+def run_tournament(df, forecast_days=7, candidates=None, budget_seconds=TOURNAMENT_BUDGET_SECONDS,
+                   rounds=TOURNAMENT_ROUNDS, elimination_ratio=TOURNAMENT_ELIMINATION_RATIO):
+    """Pick the model with the lowest holdout MAE; returns (winner, report)
+
+    `winner` is None when fewer than two candidates can be scored (too little
+    data, or nothing finished within the budget); callers then fall back to
+    the heuristic choice. `report` records every candidate's holdout MAE,
+    fitting time, rounds completed and final status.
+    """
+    # Imported here: forecast.py calls into this module for "auto"
+    from .forecast import evaluate_forecast, run_forecast
+
+    df_sorted = df.sort_values('ds').reset_index(drop=True)
+    y = df_sorted['y'].values.astype(float)
+    n = len(df_sorted)
+    horizon = max(1, min(forecast_days, n // 5))
+    eligible = eligible_candidates(n - horizon)
+    candidates = [c for c in (candidates or eligible) if c in eligible]
+    
+    # Every round must leave enough training data for every candidate
+    if candidates:
+        shortest = max(min_train_rows(c) for c in candidates)
+        rounds = max(1, min(rounds, (n - shortest) // horizon))
+
+    started = time.perf_counter()
+    report = {
+        'candidates': {c: {'mae': None, 'seconds': 0.0, 'rounds': 0, 'status': 'running'} for c in candidates},
+        'holdout_periods': horizon,
+        'budget_seconds': budget_seconds
+    }
+    errors = {c: [] for c in candidates}
+    alive = list(candidates)
+
+    if len(candidates) >= 2:
+        with ThreadPoolExecutor(max_workers=len(candidates)) as pool:
+            for round_index in range(rounds):
+                remaining = budget_seconds - (time.perf_counter() - started)
+                if remaining <= 0 or not alive:
+                    break
+                cutoff = n - horizon * (round_index + 1)
+                train = df_sorted.iloc[:cutoff]
+                futures = {
+                    c: pool.submit(_holdout_forecast, run_forecast, train, c, horizon, remaining)
+                    for c in alive
+                }
+
+                actual = y[cutoff:cutoff + horizon]
+                for c, future in futures.items():
+                    yhat, seconds, error = future.result()
+                    entry = report['candidates'][c]
+                    entry['seconds'] += seconds
+                    if error is not None:
+                        entry['status'] = 'over budget' if isinstance(error, FitAborted) else 'failed'
+                        entry['error'] = str(error)
+                        alive.remove(c)
+                        continue
+                    errors[c].append(float(evaluate_forecast(actual, yhat)['mae']))
+                    entry['rounds'] += 1
+
+                # Stop candidates that are clearly behind the leader on the rounds run so far
+                means = {c: float(np.mean(errors[c])) for c in alive if errors[c]}
+                if means:
+                    best = min(means.values())
+                    for c, mean in means.items():
+                        if mean > best * elimination_ratio and len(alive) > 1:
+                            report['candidates'][c]['status'] = 'eliminated'
+                            alive.remove(c)
+
+    for c in candidates:
+        entry = report['candidates'][c]
+        entry['seconds'] = round(entry['seconds'], 4)
+        if errors[c]:
+            entry['mae'] = round(float(np.mean(errors[c])), 2)
+        if entry['status'] == 'running':
+            entry['status'] = 'finished' if len(candidates) >= 2 else 'skipped'
+
+    # Only candidates that completed the most rounds are compared on equal terms
+    finished = [c for c in alive if errors[c]]
+    winner = None
+    if finished and len(candidates) >= 2:
+        most_rounds = max(len(errors[c]) for c in finished)
+        winner = min((c for c in finished if len(errors[c]) == most_rounds), key=lambda c: np.mean(errors[c]))
+        report['candidates'][winner]['status'] = 'winner'
+
+    report['winner'] = winner
+    report['elapsed_seconds'] = round(time.perf_counter() - started, 4)
+    return winner, report
@@ -0,0 +1,88 @@
+"""
+trend.py – Closed-form least-squares trend lines in NumPy
+
+Implements:
+- `fit_linear_trend()` – slope/intercept of y against 0..n-1 plus in-sample
+  MAE/RMSE, for one series or a stacked (series × time) matrix in one solve
+- `predict_linear_trend()` – extend fitted trends over the next periods
+- `fit_linear_trend_prefixes()` – trends for many expanding windows of one
+  series from running sums
+
+With a single regressor x = 0..n-1 the normal equations have a closed form
+(slope = cov(x, y) / var(x)), so there is nothing to iterate and stacking k
+series of equal length turns k model fits into one matrix-vector product.
+"""
+
+import numpy as np
+
+def fit_linear_trend(y):
+    """Fit y ≈ intercept + slope * t for t = 0..n-1
+
+    `y` is a 1-D series or a 2-D array with one series per row. Returns a dict
+    of 'intercept', 'slope', 'fitted', 'mae' and 'rmse' (scalars/1-D for a
+    single series, one entry per row for a matrix).
+    """
+    y = np.asarray(y, dtype=float)
+    single = y.ndim == 1
+    Y = y[np.newaxis, :] if single else y
+
+    if Y.shape[1] < 2:
+        raise ValueError("Need at least 2 data points to fit a trend")
+    if np.isnan(Y).any():
+        raise ValueError("Sales values contain NaN; fill or drop missing periods before forecasting")
+
+    n = Y.shape[1]
+    t = np.arange(n, dtype=float)
+    t_centered = t - t.mean()
+
+    y_mean = Y.mean(axis=1)
+    slope = (Y @ t_centered) / (t_centered @ t_centered)
+    intercept = y_mean - slope * t.mean()
+
+    fitted = intercept[:, np.newaxis] + slope[:, np.newaxis] * t
+    residuals = Y - fitted
+    mae = np.abs(residuals).mean(axis=1)
+    rmse = np.sqrt((residuals ** 2).mean(axis=1))
+
+    fit = {'intercept': intercept, 'slope': slope, 'fitted': fitted, 'mae': mae, 'rmse': rmse, 'n': n}
+    if single:
+        fit = {key: value[0] if isinstance(value, np.ndarray) else value for key, value in fit.items()}
+    return fit
+
+def predict_linear_trend(fit, steps):
+    """Predict the `steps` periods after the training window for a fitted trend (or trends)"""
+    n = np.asarray(fit['n'])
+    intercept = np.asarray(fit['intercept'])
+    slope = np.asarray(fit['slope'])
+    if intercept.ndim == 0:
+        return intercept + slope * np.arange(n, n + steps, dtype=float)
+    # Prefix fits each end at their own n; matrix fits share one
+    t = (n[:, np.newaxis] if n.ndim else n) + np.arange(steps, dtype=float)
+    return intercept[:, np.newaxis] + slope[:, np.newaxis] * t
+
+def fit_linear_trend_prefixes(y, sizes):
+    """Fit a trend to each prefix y[:m] for m in `sizes`, from running sums in O(n + len(sizes))
+
+    Used by rolling-origin backtests: every expanding training window is an
+    incremental update of the previous one, so no window is refit from scratch.
+    Returns the same keys as `fit_linear_trend` for a matrix (one entry per
+    size) except 'fitted', 'mae' and 'rmse', with 'n' as an array of sizes.
+    """
+    y = np.asarray(y, dtype=float)
+    sizes = np.asarray(sizes)
+    if sizes.min() < 2:
+        raise ValueError("Need at least 2 data points to fit a trend")
+    if np.isnan(y[:sizes.max()]).any():
+        raise ValueError("Sales values contain NaN; fill or drop missing periods before forecasting")
+
+    t = np.arange(len(y), dtype=float)
+    sum_y = np.concatenate(([0.0], np.cumsum(y)))[sizes]
+    sum_ty = np.concatenate(([0.0], np.cumsum(t * y)))[sizes]
+
+    m = sizes.astype(float)
+    sum_t = m * (m - 1) / 2
+    sum_tt = (m - 1) * m * (2 * m - 1) / 6
+
+    slope = (m * sum_ty - sum_t * sum_y) / (m * sum_tt - sum_t ** 2)
+    intercept = (sum_y - slope * sum_t) / m
+    return {'intercept': intercept, 'slope': slope, 'n': sizes}
@@ -1,18 +1,12 @@
-import pandas as pd
-import numpy as np
-from typing import Literal
+from .stats import seasonality_strength, series_statistics
 
-def detect_seasonality(df):
+def detect_seasonality(df, stats=None):
     """Check if data has weekly patterns by looking at day-of-week sales"""
-    df_copy = df.copy()
-    df_copy['ds'] = pd.to_datetime(df_copy['ds'])
-    df_copy['day_of_week'] = df_copy['ds'].dt.dayofweek
-    
-    # Calculate average sales for each day of the week
-    daily_avg = df_copy.groupby('day_of_week')['y'].mean()
+    # Average sales for each day of the week come from the shared statistics pass
+    stats = stats or series_statistics(df)
     
     # If there's significant variation between days, it's seasonal
-    variation = daily_avg.std() / daily_avg.mean()
+    variation = seasonality_strength(stats)
     return variation > 0.2
 
 def select_model(df, model_choice):
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark appending rows to a stored dataset against recomputing its statistics.
+
+For each history length, stores a synthetic series, then times
+`DatasetStore.append` of `--new-rows` rows (running statistics, rows written
+in place) against concatenating the same rows onto the full frame and
+running `series_statistics` over all of it, as a full re-upload would.
+
+    python benchmarks/bench_append.py --lengths 10000 100000 1000000 --new-rows 7
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from App.datasets import DatasetStore
+from App.stats import series_statistics
+
+# Order-level timestamps, so a million rows fit in the pandas date range
+FREQ = '10min'
+
+def make_series(rows, start='2000-01-01', seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'ds': pd.date_range(start, periods=rows, freq=FREQ), 'y': rng.normal(100, 15, rows)})
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--lengths', type=int, nargs='*', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--new-rows', type=int, default=7)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'history':>10} {'append ms':>10} {'recompute ms':>13} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        store = DatasetStore(directory)
+        for length in args.lengths:
+            history = make_series(length)
+            dataset_id = store.create(history)
+            frame = history
+
+            append_times, recompute_times = [], []
+            for i in range(args.repeat):
+                start = frame['ds'].iloc[-1] + pd.Timedelta(FREQ)
+                batch = make_series(args.new_rows, start=start, seed=i + 1)
+
+                t0 = time.perf_counter()
+                store.append(dataset_id, batch)
+                append_times.append(time.perf_counter() - t0)
+
+                t0 = time.perf_counter()
+                frame = pd.concat([frame, batch], ignore_index=True)
+                series_statistics(frame)
+                recompute_times.append(time.perf_counter() - t0)
+
+            append_ms, recompute_ms = min(append_times) * 1000, min(recompute_times) * 1000
+            print(f"{length:>10} {append_ms:>10.2f} {recompute_ms:>13.2f} {recompute_ms / append_ms:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
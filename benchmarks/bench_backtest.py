@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Benchmark rolling-origin backtests per model and worker count.
+
+Reports wall time, summed fold time and pooled MAE. For the trend line it
+also compares the running-sum fold solve with refitting every window through
+`run_forecast`.
+
+    python benchmarks/bench_backtest.py --length 365 --step 1 --models linear lag prophet
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from App.backtest import backtest
+from App.forecast import run_forecast
+from bench_batch import make_panel
+
+logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--length', type=int, default=365)
+    parser.add_argument('--initial', type=int, default=180)
+    parser.add_argument('--step', type=int, default=7)
+    parser.add_argument('--horizon', type=int, default=7)
+    parser.add_argument('--models', nargs='*', default=['linear', 'lag', 'prophet'])
+    parser.add_argument('--workers', type=int, nargs='*', default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    df = make_panel(1, args.length)['sku-00000']
+    for model in args.models:
+        for workers in sorted(set(args.workers)):
+            result = backtest(df, model, args.initial, args.step, args.horizon, max_workers=workers)
+            timing = result['timing']
+            print(f"{model:<8} workers={workers:<3} folds={len(result['folds']):<4} "
+                  f"wall {timing['total_seconds'] * 1000:9.1f} ms  fold sum {timing['fold_seconds'] * 1000:9.1f} ms  "
+                  f"MAE {result['metrics']['mae']}")
+
+        if model == 'linear':
+            cutoffs = [fold['train_size'] for fold in result['folds']]
+            start = time.perf_counter()
+            for cutoff in cutoffs:
+                run_forecast(df.iloc[:cutoff], 'linear', args.horizon)
+            print(f"{'':<8} refit every window through run_forecast: {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+if __name__ == "__main__":
+    main()
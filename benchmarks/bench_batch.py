@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark `run_forecast_batch` throughput against the number of worker processes.
+
+Generates many synthetic daily series and reports series per second and the
+scaling efficiency relative to a single worker.
+
+    python benchmarks/bench_batch.py --series 200 --model linear
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from App.forecast import run_forecast_batch
+
+logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+
+def make_panel(count, length, seed=0):
+    """Independent daily series with trend, weekly seasonality and noise"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2023-01-01', periods=length, freq='D')
+    t = np.arange(length)
+    series = {}
+    for i in range(count):
+        y = 100 + rng.uniform(0, 1) * t + rng.uniform(5, 30) * np.sin(2 * np.pi * t / 7) + rng.normal(0, 5, length)
+        series[f"sku-{i:05d}"] = pd.DataFrame({'ds': dates, 'y': y})
+    return series
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--series', type=int, default=200)
+    parser.add_argument('--length', type=int, default=120)
+    parser.add_argument('--model', default='linear')
+    parser.add_argument('--workers', type=int, nargs='*', help="worker counts to try (default: 1, 2, 4 ... cores)")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    workers = args.workers or sorted({1, cores} | {2 ** i for i in range(1, cores.bit_length()) if 2 ** i <= cores})
+    series = make_panel(args.series, args.length)
+
+    print(f"series={args.series} length={args.length} model={args.model} cores={cores}")
+    baseline = None
+    for count in workers:
+        start = time.perf_counter()
+        batch = run_forecast_batch(series, args.model, 14, max_workers=count)
+        elapsed = time.perf_counter() - start
+        throughput = len(batch['results']) / elapsed
+        baseline = baseline or throughput
+        efficiency = throughput / (baseline * count)
+        print(f"workers={count:<3} {throughput:9.1f} series/s  speedup {throughput / baseline:5.2f}x  "
+              f"efficiency {efficiency:6.1%}  errors={len(batch['errors'])}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark forecasting a stored dataset by id against posting its rows back.
+
+For each series length, uploads a synthetic daily series to /clean and then
+forecasts it two ways: the original round trip (the cleaned rows come back
+from /clean and are posted to /forecast as JSON) and by dataset id (/clean
+with include_data=0, then /forecast with only the id). Reports the bytes
+sent and received over both requests and the best end-to-end time.
+
+    python benchmarks/bench_dataset_id.py --lengths 1000 10000 50000
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("FORECAST_CACHE_ENABLED", "0")
+os.environ.setdefault("FORECAST_DATASET_DIR", tempfile.mkdtemp(prefix="bench-datasets-"))
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'FlaskBackend'))
+from generators import make_daily_series
+from run import create_app
+
+def upload(series):
+    csv = series.rename(columns={'ds': 'Date', 'y': 'Sales'}).to_csv(index=False).encode()
+    return {'file': (io.BytesIO(csv), 'sales.csv')}
+
+def round_trip(client, series, periods):
+    cleaned = client.post('/clean/', data=upload(series))
+    request_body = json.dumps({'data': cleaned.get_json()['data'], 'model': 'linear', 'periods': periods})
+    forecast = client.post('/forecast/', data=request_body, content_type='application/json')
+    assert forecast.status_code == 200, forecast.get_data(as_text=True)[:200]
+    return len(cleaned.data) + len(request_body) + len(forecast.data)
+
+def by_id(client, series, periods):
+    cleaned = client.post('/clean/?include_data=0', data=upload(series))
+    request_body = json.dumps({'dataset_id': cleaned.get_json()['dataset_id'], 'model': 'linear', 'periods': periods})
+    forecast = client.post('/forecast/', data=request_body, content_type='application/json')
+    assert forecast.status_code == 200, forecast.get_data(as_text=True)[:200]
+    return len(cleaned.data) + len(request_body) + len(forecast.data)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--lengths', type=int, nargs='*', default=[1_000, 10_000, 50_000])
+    parser.add_argument('--periods', type=int, default=14)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    client = create_app().test_client()
+    print(f"{'rows':>8} {'rows KB':>9} {'id KB':>7} {'rows ms':>9} {'id ms':>8} {'speedup':>8}")
+    for length in args.lengths:
+        series = make_daily_series(length)
+        timings, sizes = {}, {}
+        for name, flow in (('rows', round_trip), ('id', by_id)):
+            best = float('inf')
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                sizes[name] = flow(client, series, args.periods)
+                best = min(best, time.perf_counter() - start)
+            timings[name] = best
+        print(f"{length:>8} {sizes['rows'] / 1024:>9.0f} {sizes['id'] / 1024:>7.0f} "
+              f"{timings['rows'] * 1000:>9.1f} {timings['id'] * 1000:>8.1f} {timings['rows'] / timings['id']:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
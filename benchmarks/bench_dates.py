@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark inferred-format date parsing against pandas' defaults.
+
+For each common upload format, formats `--rows` timestamps as strings and
+times `pd.to_datetime` with no format (pandas guesses from the first value
+and raises if later rows disagree), `parse_dates` (format inferred from a
+sample), and optionally `format='mixed'`, the per-element parser a naive
+fallback would use.
+
+    python benchmarks/bench_dates.py --rows 1000000 --with-mixed
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from App.preprocess import parse_dates
+
+FORMATS = {
+    'ISO': '%Y-%m-%d',
+    'US': '%m/%d/%Y',
+    'EU': '%d/%m/%Y',
+    'ISO timestamp': '%Y-%m-%d %H:%M:%S',
+    'US timestamp': '%m/%d/%Y %H:%M',
+    'EU timestamp': '%d.%m.%Y %H:%M',
+}
+
+def timed(fn):
+    start = time.perf_counter()
+    try:
+        fn()
+    except (ValueError, TypeError):
+        return None
+    return time.perf_counter() - start
+
+def fmt_ms(seconds):
+    return f"{seconds * 1000:10.1f} ms" if seconds is not None else "    raises   "
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--with-mixed', action='store_true', help="also time format='mixed' (slow)")
+    args = parser.parse_args()
+
+    # Minute-level timestamps starting on the 1st, so day-first dates begin ambiguous
+    stamps = pd.Series(pd.date_range('2021-01-01', periods=args.rows, freq='37min'))
+
+    print(f"rows={args.rows}")
+    print(f"{'format':<15} {'no format':>13} {'parse_dates':>13} {'mixed':>13}  inferred")
+    for name, fmt in FORMATS.items():
+        values = stamps.dt.strftime(fmt)
+        default = timed(lambda: pd.to_datetime(values))
+        inferred = timed(lambda: parse_dates(values))
+        mixed = timed(lambda: pd.to_datetime(values, format='mixed')) if args.with_mixed else None
+        _, chosen, unparseable = parse_dates(values.head(10000))
+        print(f"{name:<15} {fmt_ms(default)} {fmt_ms(inferred)} {fmt_ms(mixed) if args.with_mixed else '      -      '}"
+              f"  {chosen} ({unparseable} unparseable)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark the JSON, Arrow IPC and msgpack encodings of a /forecast request.
+
+For each series length, times decoding plus validation of the request body
+on the server (the work the encodings change) and a full POST /forecast
+with a linear model, and reports the request body size. Encodings whose
+optional library is missing are skipped.
+
+    python benchmarks/bench_encodings.py --lengths 1000 10000 100000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("FORECAST_CACHE_ENABLED", "0")
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'FlaskBackend'))
+import binary_formats
+from forecast_routes import records_to_frame, validate_forecast_data, validate_forecast_frame
+from generators import make_daily_series
+from run import create_app
+
+def json_body(series):
+    rows = [{'ds': d, 'y': float(y)} for d, y in zip(series['ds'].dt.strftime('%Y-%m-%d'), series['y'])]
+    return json.dumps({'data': rows, 'model': 'linear', 'periods': 14}).encode()
+
+def arrow_body(series):
+    pa = binary_formats.pa
+    table = pa.Table.from_pandas(series, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def msgpack_body(series):
+    return binary_formats.msgpack.packb({
+        'ds': series['ds'].to_numpy(dtype='datetime64[ns]').view('<i8').tobytes(),
+        'y': series['y'].to_numpy(dtype='<f8').tobytes(),
+        'model': 'linear',
+        'periods': 14,
+    })
+
+ENCODINGS = [
+    ('json', 'application/json', None, json_body),
+    ('arrow', binary_formats.ARROW_MIMETYPE, binary_formats.ARROW, arrow_body),
+    ('msgpack', binary_formats.MSGPACK_MIMETYPE, binary_formats.MSGPACK, msgpack_body),
+]
+
+def decode(app, body, mimetype, encoding):
+    """The request decoding and validation /forecast does before fitting"""
+    with app.test_request_context('/forecast/?model=linear&periods=14', method='POST', data=body, content_type=mimetype):
+        if encoding is None:
+            from flask import request
+            data = request.get_json()['data']
+            validate_forecast_data(data)
+            return records_to_frame(data)
+        df, _ = binary_formats.read_series_request(encoding)
+        validate_forecast_frame(df)
+        return df
+
+def best_of(repeat, fn):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--lengths', type=int, nargs='*', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    print(f"{'rows':>8} {'encoding':>9} {'body KB':>9} {'decode ms':>10} {'request ms':>11}")
+    for length in args.lengths:
+        series = make_daily_series(length, start='1800-01-01')
+        for name, mimetype, encoding, build in ENCODINGS:
+            if encoding is not None and not binary_formats.available(encoding):
+                print(f"{length:>8} {name:>9}  skipped (library not installed)")
+                continue
+            body = build(series)
+            decode_ms = best_of(args.repeat, lambda: decode(app, body, mimetype, encoding))
+
+            def post():
+                response = client.post('/forecast/?model=linear&periods=14', data=body, content_type=mimetype,
+                                       headers={'Accept': mimetype})
+                assert response.status_code == 200, response.get_data(as_text=True)[:200]
+            request_ms = best_of(args.repeat, post)
+            print(f"{length:>8} {name:>9} {len(body) / 1024:>9.0f} {decode_ms:>10.2f} {request_ms:>11.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark response compression and ETag revalidation on /clean and /forecast.
+
+Sends the same upload and the same forecast request repeatedly in four modes:
+uncompressed (the previous behaviour), gzip, brotli (when installed), and a
+revalidation carrying the ETag from an earlier response, which gets a 304.
+Reports bytes on the wire and the p50 server time over `--repeat` requests.
+
+    python benchmarks/bench_http.py --rows 10000 --repeat 20
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("FORECAST_CACHE_ENABLED", "0")
+os.environ.setdefault("FORECAST_DATASET_DIR", tempfile.mkdtemp(prefix="bench-datasets-"))
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'FlaskBackend'))
+import http_caching
+from generators import make_daily_series
+from run import create_app
+
+def p50(repeat, send):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = send()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000, response
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=10_000, help="days in the uploaded and forecast series")
+    parser.add_argument('--periods', type=int, default=90)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    client = create_app().test_client()
+    series = make_daily_series(args.rows, start='1980-01-01')
+    csv = series.rename(columns={'ds': 'Date', 'y': 'Sales'}).to_csv(index=False).encode()
+    rows = [{'ds': d, 'y': float(y)} for d, y in zip(series['ds'].dt.strftime('%Y-%m-%d'), series['y'])]
+
+    requests = {
+        'POST /clean': lambda headers: client.post('/clean/', data={'file': (io.BytesIO(csv), 'sales.csv')}, headers=headers),
+        'POST /forecast': lambda headers: client.post('/forecast/', json={'data': rows, 'model': 'linear', 'periods': args.periods},
+                                                      headers=headers),
+    }
+    modes = [('identity', {}), ('gzip', {'Accept-Encoding': 'gzip'})]
+    if http_caching.brotli is not None:
+        modes.append(('br', {'Accept-Encoding': 'br'}))
+
+    print(f"{'request':<16} {'mode':<10} {'bytes':>10} {'p50 ms':>8}")
+    for name, send in requests.items():
+        for mode, headers in modes:
+            ms, response = p50(args.repeat, lambda: send(headers))
+            assert response.status_code == 200, response.get_data(as_text=True)[:200]
+            print(f"{name:<16} {mode:<10} {len(response.data):>10} {ms:>8.1f}")
+
+        etag = send({}).headers['ETag']
+        ms, response = p50(args.repeat, lambda: send({'If-None-Match': etag}))
+        assert response.status_code == 304
+        print(f"{name:<16} {'304':<10} {len(response.data):>10} {ms:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark the closed-form NumPy trend engine against a per-series sklearn fit.
+
+Compares, per series: the old sklearn LinearRegression + metrics path, the
+closed-form fit one series at a time, and one stacked solve over all series.
+Also times end-to-end `run_forecast_batch(..., 'linear')`.
+
+    python benchmarks/bench_linear.py --series 1000 --length 365
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error, mean_squared_error
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from App.forecast import run_forecast_batch
+from App.trend import fit_linear_trend, predict_linear_trend
+from bench_batch import make_panel
+
+def sklearn_fit(y, steps):
+    """The fit run_linear_regression used to do per call"""
+    X = np.arange(len(y)).reshape(-1, 1)
+    model = LinearRegression().fit(X, y)
+    future = model.predict(np.arange(len(y), len(y) + steps).reshape(-1, 1))
+    fitted = model.predict(X)
+    return future, mean_absolute_error(y, fitted), np.sqrt(mean_squared_error(y, fitted))
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--series', type=int, default=1000)
+    parser.add_argument('--length', type=int, default=365)
+    args = parser.parse_args()
+
+    series = make_panel(args.series, args.length)
+    Y = np.vstack([df['y'].values for df in series.values()])
+    print(f"series={args.series} length={args.length}")
+
+    t_sklearn, old = timed(lambda: [sklearn_fit(y, 14) for y in Y])
+    t_single, _ = timed(lambda: [predict_linear_trend(fit_linear_trend(y), 14) for y in Y])
+    t_stacked, fits = timed(lambda: predict_linear_trend(fit_linear_trend(Y), 14))
+    max_diff = max(np.abs(old[i][0] - fits[i]).max() for i in range(len(Y)))
+
+    for label, elapsed in [('sklearn per series', t_sklearn), ('numpy per series', t_single), ('numpy stacked', t_stacked)]:
+        print(f"{label:<20} {elapsed * 1e6 / len(Y):10.1f} us/series  {t_sklearn / elapsed:8.1f}x")
+    print(f"max |prediction difference| vs sklearn: {max_diff:.2e}")
+
+    t_batch, batch = timed(lambda: run_forecast_batch(series, 'linear', 14, max_workers=1))
+    print(f"run_forecast_batch   {t_batch * 1e6 / len(Y):10.1f} us/series end to end ({len(batch['results'])} series)")
+
+if __name__ == "__main__":
+    main()
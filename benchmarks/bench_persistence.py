@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark persistence of uploads and forecasts with the batched background writer.
+
+Part 1 writes `--records` forecast records straight to the store, once row by
+row (one transaction each, as an inline INSERT per request would) and once
+through BatchWriter, and reports records per second and the time a caller
+spends enqueueing each record.
+
+Part 2 sends `--repeat` /forecast requests for a stored dataset and reports
+p50/p99 latency with persistence off, with an inline write per request, and
+with the batched writer. Uses the SQLite stand-in unless --database-url
+names a Postgres database.
+
+    python benchmarks/bench_persistence.py --records 20000 --repeat 300
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+os.environ.setdefault("FORECAST_CACHE_ENABLED", "0")
+os.environ.setdefault("FORECAST_METRICS_ENABLED", "0")
+os.environ.setdefault("FORECAST_DATASET_DIR", tempfile.mkdtemp(prefix="bench-datasets-"))
+os.environ.setdefault("FORECAST_PERSISTENCE", "0")
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'FlaskBackend'))
+import cleaning_routes
+import forecast_routes
+from App.persistence import BatchWriter, create_store, forecast_row
+from generators import make_daily_series
+from run import create_app
+
+class InlineWriter:
+    """Writes each record in the request thread, one transaction per record"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def record_forecast(self, **payload):
+        self.store.insert('forecasts', [forecast_row(payload)])
+
+    def record_upload(self, **payload):
+        pass
+
+def sample_record():
+    forecast = make_daily_series(30, start='2024-01-01').rename(columns={'y': 'yhat'})
+    forecast['yhat_lower'] = forecast['yhat'] - 10
+    forecast['yhat_upper'] = forecast['yhat'] + 10
+    return dict(forecast=forecast, insights={'model_used': 'linear', 'model_explanation': 'Linear trend'},
+                low_confidence=False, forecast_periods=30, data_points_used=365)
+
+def store_for(args, name):
+    return create_store(args.database_url or f"sqlite:///{os.path.join(args.workdir, name + '.sqlite3')}")
+
+def throughput(args):
+    record = sample_record()
+
+    store = store_for(args, 'inline')
+    start = time.perf_counter()
+    for _ in range(args.records):
+        store.insert('forecasts', [forecast_row(record)])
+    inline = time.perf_counter() - start
+    store.close()
+
+    writer = BatchWriter(store_for(args, 'batched'), queue_size=args.records, batch_size=args.batch_size)
+    start = time.perf_counter()
+    for _ in range(args.records):
+        writer.record_forecast(**record)
+    enqueued = time.perf_counter() - start
+    writer.flush()
+    batched = time.perf_counter() - start
+    writer.close()
+
+    print(f"{args.records} forecast records (30 days each)")
+    print(f"  row by row:  {args.records / inline:>9,.0f} records/s")
+    print(f"  batched:     {args.records / batched:>9,.0f} records/s  "
+          f"(enqueue {enqueued / args.records * 1e6:.1f} us/record, {writer.stats()['batches']} batches)")
+
+def latency(args):
+    client = create_app().test_client()
+    series = make_daily_series(args.rows, start='2015-01-01')
+    csv = series.rename(columns={'ds': 'Date', 'y': 'Sales'}).to_csv(index=False).encode()
+    dataset_id = client.post('/clean/', data={'file': (io.BytesIO(csv), 'sales.csv')}).get_json()['dataset_id']
+    body = {'dataset_id': dataset_id, 'model': 'linear', 'periods': args.periods}
+
+    writers = {'off': lambda: None, 'inline': lambda: InlineWriter(store_for(args, 'inline-requests')),
+               'batched': lambda: BatchWriter(store_for(args, 'batched-requests'))}
+    print(f"\n/forecast by dataset id ({args.rows} rows, {args.periods} periods, {args.repeat} requests)")
+    print(f"{'persistence':<12} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, make in writers.items():
+        writer = make()
+        cleaning_routes.persistence = forecast_routes.persistence = writer
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            assert client.post('/forecast/', json=body).status_code == 200
+            times.append(time.perf_counter() - start)
+        if isinstance(writer, BatchWriter):
+            writer.close()
+        times = np.array(times) * 1000
+        print(f"{name:<12} {np.percentile(times, 50):>8.2f} {np.percentile(times, 99):>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--records', type=int, default=20_000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--rows', type=int, default=730, help="days in the forecast series")
+    parser.add_argument('--periods', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=300)
+    parser.add_argument('--database-url', help="postgresql://... (default: SQLite files in a temporary directory)")
+    args = parser.parse_args()
+    args.workdir = tempfile.mkdtemp(prefix="bench-persistence-")
+
+    throughput(args)
+    latency(args)
+
+if __name__ == "__main__":
+    main()
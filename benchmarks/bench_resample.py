@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark the daily resampling stage on an order-level export.
+
+Builds a synthetic order file (many orders per day), cleans it with and
+without `freq='daily'`, and reports the row reduction plus the time each
+model takes to fit on the raw rows versus the daily totals.
+
+    python benchmarks/bench_resample.py --orders 20000 --days 365
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import App.model_registry as model_registry
+from App.cache import TieredCache
+from App.forecast import run_forecast
+from App.preprocess import clean_data
+
+logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+
+def make_orders(orders, days, seed=0):
+    """One row per order with a weekly pattern in order volume"""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2023-01-01')
+    day = rng.integers(0, days, orders)
+    weekend = (day % 7) >= 5
+    amount = rng.gamma(2.0, 20.0, orders) * np.where(weekend, 1.5, 1.0)
+    return pd.DataFrame({
+        'Order ID': np.arange(orders),
+        'Order Date': (start + day.astype('timedelta64[D]')).astype(str),
+        'Total Amount': amount.round(2)
+    })
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--models', nargs='*', default=['linear', 'prophet'])
+    args = parser.parse_args()
+
+    orders = make_orders(args.orders, args.days)
+    raw, raw_clean_time = timed(clean_data, orders)
+    daily, daily_clean_time = timed(clean_data, orders, freq='daily')
+
+    print(f"orders={args.orders} days={args.days}")
+    print(f"clean            raw {len(raw):>8} rows {raw_clean_time * 1000:8.1f} ms   "
+          f"daily {len(daily):>6} rows {daily_clean_time * 1000:8.1f} ms   "
+          f"reduction {1 - len(daily) / len(raw):.1%}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep the model registry out of the timings
+        model_registry.model_registry = TieredCache(tmp, enabled=False)
+        for model in args.models:
+            _, raw_fit = timed(run_forecast, raw, model, 14)
+            _, daily_fit = timed(run_forecast, daily, model, 14)
+            print(f"fit {model:<12} raw {raw_fit * 1000:14.1f} ms   daily {daily_fit * 1000:14.1f} ms   "
+                  f"speedup {raw_fit / daily_fit:6.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark header-first column detection against parsing every column.
+
+Writes a wide synthetic order export (20 columns including free-text notes
+and addresses) and compares `pd.read_csv` + `clean_data` on the full frame
+with `clean_data` reading the file itself, which parses only the date and
+sales columns. Reports wall time and peak traced memory for each.
+
+    python benchmarks/bench_usecols.py --rows 200000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from App.preprocess import clean_data
+
+def write_wide_export(path, rows, seed=0):
+    """Order export shaped like data/preprocesstester.csv"""
+    rng = np.random.default_rng(seed)
+    dates = np.datetime64('2022-01-01') + rng.integers(0, 730, rows).astype('timedelta64[D]')
+    words = np.array(['edge', 'ready', 'national', 'product', 'teacher', 'brother', 'same', 'hear'])
+    notes = pd.Series(words[rng.integers(0, len(words), rows)]) + ' ' + pd.Series(words[rng.integers(0, len(words), rows)])
+    pd.DataFrame({
+        'Order ID': np.arange(rows),
+        'Customer Name': 'Customer ' + pd.Series(rng.integers(0, 5000, rows)).astype(str),
+        'Customer Email': 'user' + pd.Series(rng.integers(0, 5000, rows)).astype(str) + '@example.com',
+        'Order Date': dates.astype(str),
+        'Product Name': 'Product ' + pd.Series(rng.integers(0, 50, rows)).astype(str),
+        'Product ID': 'P' + pd.Series(rng.integers(0, 50, rows)).astype(str),
+        'Quantity': rng.integers(1, 5, rows),
+        'Price': rng.uniform(5, 80, rows).round(2),
+        'Discount Code': np.where(rng.random(rows) < 0.2, 'SUMMER10', ''),
+        'Discount Amount': rng.uniform(0, 5, rows).round(2),
+        'Tax Amount': rng.uniform(0, 6, rows).round(2),
+        'Shipping Cost': rng.uniform(0, 9, rows).round(2),
+        'Currency': 'USD',
+        'Payment Status': 'Paid',
+        'Shipping Status': 'Delivered',
+        'Order Notes': notes,
+        'Shipping Address': pd.Series(rng.integers(1, 9999, rows)).astype(str) + ' Main Street Suite 100, Springfield',
+        'Refund Status': 'No',
+        'Warehouse': 'WH' + pd.Series(rng.integers(1, 6, rows)).astype(str),
+        'Total Amount': rng.uniform(10, 300, rows).round(2),
+    }).to_csv(path, index=False)
+
+def measure(fn, repeat):
+    """Best-of-`repeat` wall time, plus peak traced memory of one run"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'orders.csv')
+        write_wide_export(path, args.rows)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+
+        full_time, full_peak = measure(lambda: clean_data(pd.read_csv(path)), args.repeat)
+        narrow_time, narrow_peak = measure(lambda: clean_data(path), args.repeat)
+
+    print(f"rows={args.rows} file={size_mb:.1f} MB")
+    print(f"all columns   {full_time * 1000:9.1f} ms  peak {full_peak / 1024 / 1024:8.1f} MB")
+    print(f"usecols       {narrow_time * 1000:9.1f} ms  peak {narrow_peak / 1024 / 1024:8.1f} MB")
+    print(f"speedup {full_time / narrow_time:.2f}x, memory {full_peak / narrow_peak:.1f}x lower")
+
+if __name__ == "__main__":
+    main()
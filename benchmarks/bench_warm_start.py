@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark warm-started Prophet refits for the daily refresh workload.
+
+Each synthetic series is fitted once without its last row (as yesterday's
+upload would have been), then refitted on the full series both warm-started
+from the registered model and cold. Reports the Stan fit time alone, the
+end-to-end `run_prophet` time (which also pays for `predict`), and how far
+the warm forecast drifts from the cold one.
+
+    python benchmarks/bench_warm_start.py --series 20 --length 730
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import App.model_registry as model_registry
+from App.cache import TieredCache
+from App.forecast import prophet_warm_start_params, run_prophet
+
+logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+
+def make_series(length, seed):
+    """Daily sales with trend, weekly seasonality and noise"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(length)
+    y = 200 + rng.uniform(0, 0.5) * t + rng.uniform(5, 40) * np.sin(2 * np.pi * t / 7) + rng.normal(0, 8, length)
+    return pd.DataFrame({'ds': pd.date_range('2022-01-01', periods=length, freq='D'), 'y': y})
+
+def new_prophet():
+    from prophet import Prophet
+    return Prophet(yearly_seasonality=False, weekly_seasonality=True, daily_seasonality=False)
+
+def time_fits(df):
+    """Time a bare cold fit and a bare warm fit of the full series"""
+    previous = new_prophet().fit(df.iloc[:-1])
+
+    start = time.perf_counter()
+    new_prophet().fit(df)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_prophet().fit(df, init=prophet_warm_start_params(previous))
+    warm = time.perf_counter() - start
+    return cold, warm
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--series', type=int, default=10)
+    parser.add_argument('--length', type=int, default=365)
+    parser.add_argument('--horizon', type=int, default=14)
+    args = parser.parse_args()
+
+    warm_times, cold_times, drifts = [], [], []
+    warm_fits, cold_fits = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        for seed in range(args.series):
+            df = make_series(args.length, seed)
+            cold_fit, warm_fit = time_fits(df)
+            cold_fits.append(cold_fit)
+            warm_fits.append(warm_fit)
+
+            # Yesterday's fit, then today's warm-started refit
+            model_registry.model_registry = TieredCache(os.path.join(tmp, f"warm-{seed}"))
+            run_prophet(df.iloc[:-1], args.horizon)
+            start = time.perf_counter()
+            warm, insights = run_prophet(df, args.horizon)
+            warm_times.append(time.perf_counter() - start)
+            assert insights['warm_started']
+
+            # Same refit with an empty registry
+            model_registry.model_registry = TieredCache(os.path.join(tmp, f"cold-{seed}"))
+            start = time.perf_counter()
+            cold, _ = run_prophet(df, args.horizon)
+            cold_times.append(time.perf_counter() - start)
+
+            drift = np.abs(warm['yhat'].values - cold['yhat'].values) / np.abs(cold['yhat'].values)
+            drifts.append(drift.max())
+
+    print(f"series={args.series} length={args.length} horizon={args.horizon}")
+    for label, cold, warm in [('fit only', cold_fits, warm_fits), ('run_prophet', cold_times, warm_times)]:
+        cold_median, warm_median = np.median(cold), np.median(warm)
+        print(f"{label:<12} cold {cold_median * 1000:8.1f} ms  warm {warm_median * 1000:8.1f} ms  "
+              f"speedup {cold_median / warm_median:5.2f}x")
+    print(f"max relative yhat drift vs cold fit: {max(drifts):.4%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Seeded synthetic data for the benchmark suite.
+
+- `make_order_export()` – a wide e-commerce order export (one row per order
+  line, many columns, several orders per day), as users actually upload
+- `make_daily_series()` – one cleaned ds/y series with trend, weekly cycle and noise
+- `make_sku_panel()` – many daily series, as a {name: DataFrame} map
+
+The same seed always produces the same data, so timings are comparable
+between runs and machines.
+"""
+
+import numpy as np
+import pandas as pd
+
+REGIONS = np.array(['North', 'South', 'East', 'West'])
+CATEGORIES = np.array(['Furniture', 'Office Supplies', 'Technology', 'Apparel', 'Grocery'])
+
+def make_order_export(rows, seed=0, orders_per_day=50, start='2015-01-01'):
+    """Order-line export with `rows` rows spread over rows / orders_per_day days"""
+    rng = np.random.default_rng(seed)
+    days = max(1, rows // orders_per_day)
+    order_dates = pd.Timestamp(start) + pd.to_timedelta(np.sort(rng.integers(0, days, rows)), unit='D')
+    quantity = rng.integers(1, 10, rows)
+    unit_price = np.round(rng.lognormal(3, 0.8, rows), 2)
+    discount = np.round(rng.choice([0, 0.1, 0.2, 0.3], rows, p=[0.7, 0.15, 0.1, 0.05]), 2)
+    sales = np.round(quantity * unit_price * (1 - discount), 2)
+
+    return pd.DataFrame({
+        'Order ID': np.char.add('ORD-', np.arange(rows).astype(str)),
+        'Order Date': order_dates.strftime('%m/%d/%Y'),
+        'Ship Date': (order_dates + pd.to_timedelta(rng.integers(1, 7, rows), unit='D')).strftime('%m/%d/%Y'),
+        'Customer ID': np.char.add('C', rng.integers(0, 10_000, rows).astype(str)),
+        'Region': REGIONS[rng.integers(0, len(REGIONS), rows)],
+        'Category': CATEGORIES[rng.integers(0, len(CATEGORIES), rows)],
+        'Product ID': np.char.add('P', rng.integers(0, 2_000, rows).astype(str)),
+        'Quantity': quantity,
+        'Unit Price': unit_price,
+        'Discount': discount,
+        'Sales': sales,
+        'Profit': np.round(sales * rng.uniform(-0.1, 0.4, rows), 2),
+    })
+
+def order_export_csv(rows, seed=0):
+    """The order export encoded as CSV bytes, ready to upload"""
+    return make_order_export(rows, seed).to_csv(index=False).encode('utf-8')
+
+def make_daily_series(days, seed=0, start='1900-01-01'):
+    """Cleaned daily ds/y series with trend, weekly seasonality and noise"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(days)
+    y = 100 + 0.05 * t + 15 * np.sin(2 * np.pi * t / 7) + rng.normal(0, 5, days)
+    return pd.DataFrame({'ds': pd.date_range(start, periods=days, freq='D'), 'y': np.maximum(y, 0)})
+
+def make_sku_panel(skus, days, seed=0):
+    """`skus` independent daily series of equal length, keyed by SKU name"""
+    return {f"sku-{i:05d}": make_daily_series(days, seed + i, start='2023-01-01') for i in range(skus)}
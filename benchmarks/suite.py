@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: time and memory-profile every pipeline stage and endpoint.
+
+Runs each case at several input sizes on seeded synthetic data (see
+generators.py), records the best wall time over `--repeat` runs and the
+peak traced memory of one extra run, and writes everything to JSON.
+`compare` checks a result file against a stored baseline and exits non-zero
+when any case got slower or hungrier than the threshold allows.
+
+    python benchmarks/suite.py run --sizes 100 10000 1000000 --output benchmarks/results/latest.json
+    python benchmarks/suite.py run --quick --output benchmarks/baseline.json     # store a baseline
+    python benchmarks/suite.py compare benchmarks/baseline.json benchmarks/results/latest.json
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# Measure real work: no result cache or model registry between repeats
+os.environ.setdefault("FORECAST_CACHE_ENABLED", "0")
+os.environ.setdefault("MODEL_REGISTRY_ENABLED", "0")
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'FlaskBackend'))
+from App.forecast import run_forecast, run_forecast_batch
+from App.preprocess import clean_data, get_data_insights, read_sales_csv, validate_data_quality
+from generators import make_daily_series, make_sku_panel, order_export_csv
+
+logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+
+DEFAULT_SIZES = [100, 10_000, 1_000_000]
+QUICK_SIZES = [100, 10_000]
+
+# Longest daily series the forecasting cases use (models scale with series length, not upload size)
+MAX_SERIES_DAYS = 20_000
+# Largest upload sent through the HTTP endpoint cases
+MAX_ENDPOINT_ROWS = 1_000_000
+
+def _client():
+    from run import create_app
+    return create_app().test_client()
+
+def _records(df):
+    return [{'ds': d, 'y': float(y)} for d, y in zip(df['ds'].dt.strftime('%Y-%m-%d'), df['y'])]
+
+def build_cases(sizes, prophet=False):
+    """(name, rows, setup, run) for every case; setup output is passed to run and isn't timed"""
+    cases = []
+    for rows in sizes:
+        days = min(rows, MAX_SERIES_DAYS)
+
+        def csv_bytes(rows=rows):
+            return order_export_csv(rows)
+        def raw_frame(rows=rows):
+            return read_sales_csv(io.BytesIO(order_export_csv(rows)))
+        def cleaned_frame(rows=rows):
+            return clean_data(raw_frame(rows))
+        def series(days=days):
+            return make_daily_series(days)
+
+        cases += [
+            ('read_sales_csv', rows, csv_bytes, lambda data: read_sales_csv(io.BytesIO(data))),
+            ('clean_data', rows, raw_frame, clean_data),
+            ('validate_data_quality', rows, cleaned_frame, validate_data_quality),
+            ('get_data_insights', rows, cleaned_frame, get_data_insights),
+            ('run_forecast[linear]', days, series, lambda df: run_forecast(df, 'linear', 14)),
+            ('run_forecast[lag]', days, series, lambda df: run_forecast(df, 'lag', 14)),
+        ]
+        if prophet and days <= 1_000:
+            cases.append(('run_forecast[prophet]', days, series, lambda df: run_forecast(df, 'prophet', 14)))
+
+        # Panels: one year per SKU, as many SKUs as the size allows
+        skus = max(1, min(rows // 365, 2_000))
+        cases.append(('run_forecast_batch[linear]', skus * 365, lambda skus=skus: make_sku_panel(skus, 365),
+                      lambda panel: run_forecast_batch(panel, 'linear', 14, max_workers=1)))
+
+        if rows <= MAX_ENDPOINT_ROWS:
+            def upload(rows=rows):
+                return _client(), order_export_csv(rows)
+            def post_clean(setup):
+                client, data = setup
+                response = client.post('/clean/?format=columnar', data={'file': (io.BytesIO(data), 'orders.csv')},
+                                       content_type='multipart/form-data')
+                assert response.status_code == 200, response.get_data(as_text=True)[:200]
+            def forecast_body(days=days):
+                return _client(), _records(make_daily_series(days))
+            def post_forecast(setup):
+                client, rows_json = setup
+                response = client.post('/forecast/', json={'data': rows_json, 'model': 'linear', 'periods': 14})
+                assert response.status_code == 200, response.get_data(as_text=True)[:200]
+            cases += [
+                ('POST /clean', rows, upload, post_clean),
+                ('POST /forecast[linear]', days, forecast_body, post_forecast),
+            ]
+    return cases
+
+def measure(setup, run, repeat):
+    """Best wall time over `repeat` runs, then peak traced memory of one more run"""
+    data = setup()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(data)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run(data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def run_suite(args):
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    cases = build_cases(sizes, prophet=args.prophet)
+    if args.filter:
+        cases = [case for case in cases if any(f in case[0] for f in args.filter)]
+
+    results = []
+    for name, rows, setup, run in cases:
+        seconds, peak = measure(setup, run, args.repeat)
+        results.append({'name': name, 'rows': rows, 'seconds': round(seconds, 6), 'peak_mb': round(peak / 2 ** 20, 3)})
+        print(f"{name:<28} rows={rows:<9} {seconds * 1000:11.2f} ms  peak {peak / 2 ** 20:9.2f} MB", flush=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.output}")
+    return report
+
+def compare_reports(baseline, current, time_threshold=0.25, memory_threshold=0.25, min_seconds=0.002):
+    """Regressions of `current` against `baseline`, one dict per case that got worse
+
+    A case regresses when its time grows by more than `time_threshold`
+    (fractional) and by at least `min_seconds`, so sub-millisecond jitter
+    is ignored, or when its peak memory grows by more than `memory_threshold`.
+    """
+    base = {(r['name'], r['rows']): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        before = base.get((result['name'], result['rows']))
+        if before is None:
+            continue
+        slower = (result['seconds'] > before['seconds'] * (1 + time_threshold)
+                  and result['seconds'] - before['seconds'] >= min_seconds)
+        hungrier = result['peak_mb'] > before['peak_mb'] * (1 + memory_threshold) and result['peak_mb'] - before['peak_mb'] >= 1
+        if slower or hungrier:
+            regressions.append({
+                'name': result['name'],
+                'rows': result['rows'],
+                'seconds': (before['seconds'], result['seconds']),
+                'peak_mb': (before['peak_mb'], result['peak_mb']),
+                'slower': slower,
+                'hungrier': hungrier,
+            })
+    return regressions
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    base = {(r['name'], r['rows']): r for r in baseline['results']}
+    for result in current['results']:
+        before = base.get((result['name'], result['rows']))
+        if before is None:
+            print(f"{result['name']:<28} rows={result['rows']:<9} (new)")
+            continue
+        ratio = result['seconds'] / before['seconds'] if before['seconds'] else float('inf')
+        print(f"{result['name']:<28} rows={result['rows']:<9} {before['seconds'] * 1000:10.2f} -> "
+              f"{result['seconds'] * 1000:10.2f} ms ({ratio:5.2f}x)  "
+              f"{before['peak_mb']:8.2f} -> {result['peak_mb']:8.2f} MB")
+
+    regressions = compare_reports(baseline, current, args.time_threshold, args.memory_threshold, args.min_seconds)
+    for r in regressions:
+        kind = ' and '.join(k for k, flag in (('time', r['slower']), ('memory', r['hungrier'])) if flag)
+        print(f"REGRESSION ({kind}): {r['name']} rows={r['rows']}")
+    if not regressions:
+        print("no regressions")
+    return 1 if regressions else 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the benchmarks and write JSON results")
+    run_parser.add_argument('--sizes', type=int, nargs='*', help=f"input sizes in rows (default {DEFAULT_SIZES})")
+    run_parser.add_argument('--quick', action='store_true', help=f"only sizes {QUICK_SIZES}")
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--prophet', action='store_true', help="include Prophet fits (sizes up to 1000)")
+    run_parser.add_argument('--filter', nargs='*', help="only cases whose name contains one of these")
+    run_parser.add_argument('--output', help="JSON file to write")
+
+    compare_parser = commands.add_parser('compare', help="flag regressions against a baseline")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--time-threshold', type=float, default=0.25)
+    compare_parser.add_argument('--memory-threshold', type=float, default=0.25)
+    compare_parser.add_argument('--min-seconds', type=float, default=0.002)
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run_suite(args)
+        return 0
+    return compare(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
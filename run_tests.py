@@ -2,6 +2,7 @@
 """
 Test runner for SalesForecaster application.
 Runs all tests with coverage reporting and generates HTML report.
+Pass --bench to also run the benchmark suite and compare with benchmarks/baseline.json.
 """
 
 import subprocess
@@ -21,6 +22,32 @@ def run_command(cmd, description):
         print(f"Error: {e.stderr}")
         return None
 
+def run_benchmarks():
+    """Run the quick benchmark suite and compare it with the stored baseline, if any."""
+    latest = Path("benchmarks/results/latest.json")
+    baseline = Path("benchmarks/baseline.json")
+    
+    bench_result = run_command(
+        f"python benchmarks/suite.py run --quick --output {latest}",
+        "Running benchmark suite"
+    )
+    if bench_result is None:
+        return
+    print(bench_result)
+    
+    if not baseline.exists():
+        print(f"No baseline at {baseline}; save one with: cp {latest} {baseline}")
+        return
+    
+    # compare exits non-zero on regressions, so run it directly to keep its report
+    comparison = subprocess.run(
+        f"python benchmarks/suite.py compare {baseline} {latest}",
+        shell=True, capture_output=True, text=True
+    )
+    print(comparison.stdout)
+    if comparison.returncode != 0:
+        print("⚠️  Performance regressions against the baseline (see above).")
+
 def main():
     """Run all tests with coverage."""
     print("🧪 SalesForecaster Test Suite")
@@ -75,6 +102,10 @@ def main():
         print(f"\n📈 Coverage report generated: {html_report.absolute()}")
         print("Open htmlcov/index.html in your browser to view detailed coverage.")
     
+    # Optional performance run: python run_tests.py --bench
+    if "--bench" in sys.argv:
+        run_benchmarks()
+    
     print("\n✅ Test suite completed!")
     print("\nNext steps:")
     print("1. Review any failed tests")
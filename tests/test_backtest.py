@@ -0,0 +1,76 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'FlaskBackend'))
+
+from App.backtest import backtest, rolling_origins
+from App.forecast import evaluate_forecast, run_forecast
+
+def make_series(periods=80, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'ds': pd.date_range('2024-01-01', periods=periods, freq='D'),
+        'y': 100 + 0.5 * np.arange(periods) + 10 * np.sin(np.arange(periods) * 2 * np.pi / 7) + rng.normal(0, 2, periods)
+    })
+
+def test_rolling_origins():
+    assert rolling_origins(30, initial=10, step=5, horizon=7) == [10, 15, 20]
+    with pytest.raises(ValueError, match="folds"):
+        rolling_origins(10_000, initial=10, step=1, horizon=1)
+
+def test_evaluate_forecast_rows_match_single_calls():
+    """The 2-D form scores every row exactly like separate 1-D calls."""
+    rng = np.random.default_rng(0)
+    actual = rng.uniform(50, 150, (6, 7))
+    predicted = actual + rng.normal(0, 5, (6, 7))
+
+    scores = evaluate_forecast(actual, predicted)
+
+    for i in range(len(actual)):
+        single = evaluate_forecast(actual[i], predicted[i])
+        assert {key: values[i] for key, values in scores.items()} == single
+
+def test_linear_folds_match_refitting_each_window():
+    """Prefix-sum trend folds score the same as calling run_forecast on each training window."""
+    df = make_series()
+    result = backtest(df, 'linear', initial=40, step=10, horizon=7)
+
+    for fold in result['folds']:
+        cutoff = fold['train_size']
+        forecast = run_forecast(df.iloc[:cutoff], 'linear', 7)['forecast']
+        expected = evaluate_forecast(df['y'].values[cutoff:cutoff + 7], forecast['yhat'].values)
+        assert fold['mae'] == pytest.approx(expected['mae'])
+        assert fold['rmse'] == pytest.approx(expected['rmse'])
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_lag_backtest_in_parallel(max_workers):
+    """Pool-run folds come back in cutoff order with timings and pooled metrics."""
+    result = backtest(make_series(), 'lag', initial=45, step=7, horizon=7, max_workers=max_workers)
+
+    cutoffs = [fold['train_size'] for fold in result['folds']]
+    assert cutoffs == [45, 52, 59, 66, 73]
+    assert all(fold['seconds'] > 0 for fold in result['folds'])
+    assert result['metrics']['folds'] == 5
+    assert len(result['metrics']['mae_by_step']) == 7
+
+def test_backtest_endpoint():
+    from run import create_app
+    client = create_app().test_client()
+    df = make_series()
+    rows = [{'ds': str(d.date()), 'y': float(y)} for d, y in zip(df['ds'], df['y'])]
+
+    response = client.post('/forecast/backtest', json={'data': rows, 'model': 'linear', 'initial': 50, 'horizon': 7})
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['step'] == 7
+    assert len(body['folds']) == 4
+    assert body['metrics']['mae'] > 0
+
+    response = client.post('/forecast/backtest', json={'data': rows, 'initial': 79, 'horizon': 7})
+    assert response.status_code == 400
@@ -0,0 +1,103 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'FlaskBackend'))
+
+import App.forecast
+from App.forecast import run_forecast_batch, run_in_fit_pool
+
+def make_series(periods=20, slope=1.0):
+    return pd.DataFrame({
+        'ds': pd.date_range('2024-01-01', periods=periods, freq='D'),
+        'y': [100 + slope * i + (i % 3) for i in range(periods)]
+    })
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_batch_returns_results_and_errors(max_workers):
+    """Good series are forecast, bad ones are reported without failing the batch."""
+    series = {
+        'store-a': make_series(slope=1.0),
+        'store-b': make_series(slope=2.0),
+        'too-short': make_series(periods=3),
+    }
+
+    batch = run_forecast_batch(series, model_choice='linear', forecast_days=5, max_workers=max_workers)
+
+    assert set(batch['results']) == {'store-a', 'store-b'}
+    assert set(batch['errors']) == {'too-short'}
+    assert len(batch['results']['store-a']['forecast']) == 5
+    assert 'at least 5' in batch['errors']['too-short']
+
+def test_batch_endpoint():
+    """/forecast/batch returns per-series results and errors."""
+    from run import create_app
+    client = create_app().test_client()
+
+    rows = [{'ds': str(d.date()), 'y': float(y)} for d, y in zip(make_series()['ds'], make_series()['y'])]
+    response = client.post('/forecast/batch', json={
+        'series': {'good': rows, 'flat': [{'ds': r['ds'], 'y': 1.0} for r in rows]},
+        'model': 'linear',
+        'periods': 3,
+    })
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert not body['success']
+    assert len(body['results']['good']['forecast']) == 3
+    assert 'identical' in body['errors']['flat']
+
+def test_batch_accepts_cleaned_panel():
+    """A panel from clean_data(group_by=...) feeds the batch forecaster directly."""
+    from App.preprocess import clean_data
+    frames = []
+    for product in ['A', 'B']:
+        frame = make_series()
+        frames.append(pd.DataFrame({'Order Date': frame['ds'], 'Product ID': product, 'Sales': frame['y']}))
+    panel = clean_data(pd.concat(frames), group_by='Product ID')
+
+    batch = run_forecast_batch(panel, model_choice='linear', max_workers=1)
+
+    assert set(batch['results']) == {'A', 'B'}
+    assert not batch['errors']
+
+def test_batch_auto_picks_the_same_model_as_single_forecast():
+    """"auto" races the models per series in a batch too, instead of using the size heuristic."""
+    from run import create_app
+    client = create_app().test_client()
+
+    # 60 days with a strong weekly pattern: the tournament picks a seasonal model over the linear trend
+    weekly = [0, 5, 10, 15, 20, 40, 30]
+    rows = [{'ds': str(d.date()), 'y': 100 + 0.5 * i + weekly[i % 7] + (i % 3) * 0.5}
+            for i, d in enumerate(pd.date_range('2024-01-01', periods=60))]
+
+    single = client.post('/forecast/', json={'data': rows, 'model': 'auto', 'periods': 7}).get_json()
+    batch = client.post('/forecast/batch', json={'series': {'store': rows}, 'model': 'auto', 'periods': 7}).get_json()
+
+    assert single['insights']['model_selection'] == 'tournament'
+    assert batch['results']['store']['insights']['model_used'] == single['insights']['model_used'] != 'Linear Regression'
+
+def exit_on_negative(chunk):
+    if chunk[0] < 0:
+        os._exit(1)
+    return chunk
+
+def test_dead_worker_fails_only_its_chunk():
+    """A child that dies breaks the pool: its chunk reports an error, and the next call gets a new pool."""
+    outcomes = {tuple(chunk): (output, error) for chunk, output, error in run_in_fit_pool(exit_on_negative, [[-1]])}
+    assert outcomes[(-1,)][0] is None and 'stopped' in outcomes[(-1,)][1]
+
+    assert list(run_in_fit_pool(exit_on_negative, [[1], [2]])) == [([1], [1], None), ([2], [2], None)]
+
+def test_batch_reuses_one_pool():
+    series = {f'store-{i}': make_series(periods=60, slope=i + 1.0) for i in range(4)}
+    run_forecast_batch(series, model_choice='lag', forecast_days=3, max_workers=2)
+    pool = App.forecast._fit_pool
+
+    batch = run_forecast_batch(series, model_choice='lag', forecast_days=3, max_workers=2)
+
+    assert App.forecast._fit_pool is pool
+    assert set(batch['results']) == set(series) and not batch['errors']
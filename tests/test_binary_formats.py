@@ -0,0 +1,103 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'FlaskBackend'))
+
+import App.forecast
+import binary_formats
+from App.cache import TieredCache
+
+DAYS = 40
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({'ds': pd.date_range('2024-01-01', periods=DAYS, freq='D'),
+                         'y': 100 + np.arange(DAYS) + rng.normal(0, 3, DAYS)})
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(App.forecast, 'forecast_cache', TieredCache(str(tmp_path), enabled=False))
+    from run import create_app
+    return create_app().test_client()
+
+def json_forecast(client, series):
+    rows = [{'ds': d, 'y': y} for d, y in zip(series['ds'].dt.strftime('%Y-%m-%d'), series['y'])]
+    return client.post('/forecast/', json={'data': rows, 'model': 'linear', 'periods': 7}).get_json()
+
+def test_arrow_round_trip_matches_json(client, series):
+    pa = pytest.importorskip('pyarrow')
+    sink = pa.BufferOutputStream()
+    table = pa.Table.from_pandas(series, preserve_index=False)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    response = client.post('/forecast/?model=linear&periods=7', data=sink.getvalue().to_pybytes(),
+                           content_type=binary_formats.ARROW_MIMETYPE,
+                           headers={'Accept': binary_formats.ARROW_MIMETYPE})
+
+    assert response.status_code == 200
+    assert response.mimetype == binary_formats.ARROW_MIMETYPE
+    assert 'Accept' in response.headers['Vary']
+    forecast = pa.ipc.open_stream(response.data).read_all()
+    fields = json.loads(forecast.schema.metadata[b'response'])
+    expected = json_forecast(client, series)
+    assert fields['insights'] == expected['insights']
+    np.testing.assert_allclose(forecast.column('yhat').to_numpy(), [row['yhat'] for row in expected['forecast']])
+    assert forecast.column('ds').to_pandas().dt.strftime('%Y-%m-%d').tolist() == [row['ds'] for row in expected['forecast']]
+
+def test_msgpack_binary_columns(client, series):
+    msgpack = pytest.importorskip('msgpack')
+    body = msgpack.packb({
+        'ds': series['ds'].to_numpy(dtype='datetime64[ns]').view('<i8').tobytes(),
+        'y': series['y'].to_numpy(dtype='<f8').tobytes(),
+        'model': 'linear',
+        'periods': 7,
+    })
+
+    response = client.post('/forecast/', data=body, content_type=binary_formats.MSGPACK_MIMETYPE,
+                           headers={'Accept': binary_formats.MSGPACK_MIMETYPE})
+
+    assert response.status_code == 200
+    payload = msgpack.unpackb(response.data)
+    yhat = np.frombuffer(payload['forecast']['yhat'], dtype=payload['dtypes']['yhat'])
+    ds = np.frombuffer(payload['forecast']['ds'], dtype=payload['dtypes']['ds']).view('datetime64[ns]')
+    expected = json_forecast(client, series)
+    np.testing.assert_allclose(yhat, [row['yhat'] for row in expected['forecast']])
+    assert pd.DatetimeIndex(ds).strftime('%Y-%m-%d').tolist() == [row['ds'] for row in expected['forecast']]
+    assert payload['insights'] == expected['insights']
+
+def test_msgpack_request_with_json_response(client, series):
+    msgpack = pytest.importorskip('msgpack')
+    body = msgpack.packb({'ds': series['ds'].dt.strftime('%Y-%m-%d').tolist(), 'y': series['y'].tolist(),
+                          'model': 'linear', 'periods': 7})
+
+    response = client.post('/forecast/', data=body, content_type=binary_formats.MSGPACK_MIMETYPE)
+
+    assert response.is_json
+    assert response.get_json()['forecast'] == json_forecast(client, series)['forecast']
+
+def test_binary_validation_errors(client):
+    msgpack = pytest.importorskip('msgpack')
+
+    def post(payload):
+        return client.post('/forecast/', data=msgpack.packb(payload), content_type=binary_formats.MSGPACK_MIMETYPE)
+
+    dates = pd.date_range('2024-01-01', periods=6).strftime('%Y-%m-%d').tolist()
+    assert 'identical' in post({'ds': dates, 'y': [5.0] * 6}).get_json()['error']
+    assert 'numeric' in post({'ds': dates, 'y': [1, 2, None, 4, 5, 6]}).get_json()['error']
+    assert 'same length' in post({'ds': dates, 'y': [1.0, 2.0]}).get_json()['error']
+    assert post({'ds': dates[:3], 'y': [1.0, 2.0, 3.0]}).status_code == 400
+    assert client.post('/forecast/', data=b'\xc1', content_type=binary_formats.MSGPACK_MIMETYPE).status_code == 400
+
+def test_missing_library_is_unsupported_media_type(client, monkeypatch):
+    monkeypatch.setattr(binary_formats, 'msgpack', None)
+    response = client.post('/forecast/', data=b'\x80', content_type=binary_formats.MSGPACK_MIMETYPE,
+                           headers={'Accept': binary_formats.MSGPACK_MIMETYPE})
+    assert response.status_code == 415
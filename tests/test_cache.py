@@ -0,0 +1,84 @@
+import os
+import time
+
+import pandas as pd
+from App.cache import TieredCache, fingerprint_series, forecast_key
+
+def make_series(periods=10, offset=0):
+    return pd.DataFrame({
+        'ds': pd.date_range('2024-01-01', periods=periods, freq='D'),
+        'y': [100.0 + i + offset for i in range(periods)]
+    })
+
+def test_fingerprint_is_content_addressed():
+    """Equal series hash the same, different values hash differently."""
+    assert fingerprint_series(make_series()) == fingerprint_series(make_series())
+    assert fingerprint_series(make_series()) != fingerprint_series(make_series(offset=1))
+    assert fingerprint_series(make_series()) != fingerprint_series(make_series(periods=11))
+
+def test_forecast_key_includes_model_and_horizon():
+    """Model choice and horizon are part of the key."""
+    fp = fingerprint_series(make_series())
+    assert forecast_key(fp, 'linear', 7) != forecast_key(fp, 'prophet', 7)
+    assert forecast_key(fp, 'linear', 7) != forecast_key(fp, 'linear', 14)
+
+def test_memory_and_disk_hits(tmp_path):
+    """A value set in one cache is visible to another sharing the directory."""
+    first = TieredCache(str(tmp_path))
+    first.set('abc', {'value': 1})
+
+    assert first.get('abc') == {'value': 1}
+    assert first.stats()['memory_hits'] == 1
+
+    second = TieredCache(str(tmp_path))
+    assert second.get('abc') == {'value': 1}
+    assert second.get('missing') is None
+    stats = second.stats()
+    assert stats['disk_hits'] == 1
+    assert stats['misses'] == 1
+
+def test_get_returns_independent_copies(tmp_path):
+    """Mutating a returned value does not change the cached entry."""
+    cache = TieredCache(str(tmp_path))
+    cache.set('k', {'items': [1, 2]})
+    cache.get('k')['items'].append(3)
+    assert cache.get('k') == {'items': [1, 2]}
+
+def test_lru_eviction_by_entry_count(tmp_path):
+    """The least recently used entry leaves the memory tier first."""
+    cache = TieredCache(str(tmp_path), max_entries=2, max_disk_bytes=0)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+def test_ttl_expiry(tmp_path):
+    """Expired entries are misses in both tiers."""
+    cache = TieredCache(str(tmp_path), ttl=0.05)
+    cache.set('k', 'v')
+    time.sleep(0.1)
+    assert cache.get('k') is None
+
+def test_disabled_cache_never_stores(tmp_path):
+    """A disabled cache always misses."""
+    cache = TieredCache(str(tmp_path), enabled=False)
+    cache.set('k', 'v')
+    assert cache.get('k') is None
+
+def test_disk_tier_needs_a_private_directory(tmp_path):
+    """The disk tier is created with mode 0700 and never reads from a directory others can write to."""
+    private = TieredCache(str(tmp_path / 'private'))
+    private.set('k', 'v')
+    assert os.stat(tmp_path / 'private').st_mode & 0o777 == 0o700
+
+    shared = tmp_path / 'shared'
+    shared.mkdir()
+    shared.chmod(0o777)
+    planted = TieredCache(str(shared))
+    planted.set('k', 'v')
+    assert os.listdir(shared) == []
+    assert TieredCache(str(shared)).get('k') is None
@@ -0,0 +1,69 @@
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'FlaskBackend'))
+
+import cleaning_routes
+
+ORDERS = b"Order Date,Product,Total Amount\n" + b"\n".join(
+    f"2024-02-{i % 10 + 1:02d},P{i % 3},{10 + i}".encode() for i in range(60)
+)
+
+@pytest.fixture
+def client():
+    from run import create_app
+    return create_app().test_client()
+
+def test_large_upload_is_streamed_and_aggregated(client, monkeypatch):
+    """Resampled uploads above the streaming threshold come back as daily totals."""
+    monkeypatch.setattr(cleaning_routes, 'STREAM_THRESHOLD_BYTES', 0)
+
+    body = client.post('/clean/', data={'freq': 'daily', 'file': (io.BytesIO(ORDERS), 'orders.csv')}).get_json()
+
+    assert body['success']
+    assert body['aggregated']
+    assert len(body['data']) == 10
+    assert sum(row['y'] for row in body['data']) == sum(10 + i for i in range(60))
+    assert '60 rows into 10 daily periods' in body['message']
+
+def test_large_upload_without_freq_is_refused_unread(client, monkeypatch):
+    """Uploads that can't be streamed are refused above the threshold instead of being loaded whole."""
+    def read_whole(*args, **kwargs):
+        raise AssertionError("large upload was read into memory")
+    monkeypatch.setattr(cleaning_routes, 'STREAM_THRESHOLD_BYTES', 0)
+    monkeypatch.setattr(cleaning_routes, 'read_sales_csv', read_whole)
+
+    plain = client.post('/clean/', data={'file': (io.BytesIO(ORDERS), 'orders.csv')})
+    panel = client.post('/clean/', data={'freq': 'daily', 'group_by': 'Product',
+                                         'file': (io.BytesIO(ORDERS), 'orders.csv')})
+
+    for response in (plain, panel):
+        assert response.status_code == 413
+        assert 'pass freq' in response.get_json()['error']
+
+def test_upload_limit_is_configurable(client, monkeypatch):
+    """The size limit comes from configuration, not a hardcoded 10MB."""
+    monkeypatch.setattr(cleaning_routes, 'MAX_UPLOAD_BYTES', 100)
+
+    response = client.post('/clean/', data={'file': (io.BytesIO(ORDERS), 'orders.csv')})
+
+    assert response.status_code == 400
+    assert 'too large' in response.get_json()['error']
+
+def test_streamed_weekly_mean_matches_in_memory_upload(client, monkeypatch):
+    """Streaming doesn't change a weekly mean: both paths average the rows of each week."""
+    # Day d has d + 1 orders, so a mean of daily means would differ from the mean of the rows
+    orders = b"Order Date,Total Amount\n" + b"\n".join(
+        f"2024-02-{day + 1:02d},{10 * day + k}".encode() for day in range(14) for k in range(day + 1)
+    )
+    data = {'freq': 'weekly', 'agg': 'mean'}
+    in_memory = client.post('/clean/', data={**data, 'file': (io.BytesIO(orders), 'orders.csv')}).get_json()
+    monkeypatch.setattr(cleaning_routes, 'STREAM_THRESHOLD_BYTES', 0)
+    streamed = client.post('/clean/', data={**data, 'file': (io.BytesIO(orders), 'orders.csv')}).get_json()
+
+    assert [row['y'] for row in streamed['data']] == pytest.approx([row['y'] for row in in_memory['data']])
+    assert [row['ds'] for row in streamed['data']] == [row['ds'] for row in in_memory['data']]
@@ -0,0 +1,231 @@
+import io
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'FlaskBackend'))
+
+import cleaning_routes
+import forecast_routes
+import App.forecast
+from App.cache import TieredCache
+from App.datasets import DatasetStore
+from App.preprocess import get_data_insights, validate_data_quality
+from App.stats import RunningStats, series_statistics
+
+def daily(start, days, seed=0):
+    rng = np.random.default_rng(seed)
+    y = 100 + 20 * np.sin(np.arange(days) * 2 * np.pi / 7) + rng.normal(0, 5, days)
+    y[days // 3] = 400  # one outlier
+    return pd.DataFrame({'ds': pd.date_range(start, periods=days, freq='D'), 'y': y})
+
+def to_csv(df):
+    return df.rename(columns={'ds': 'Date', 'y': 'Sales'}).to_csv(index=False).encode()
+
+@pytest.fixture
+def store(tmp_path):
+    return DatasetStore(str(tmp_path))
+
+@pytest.fixture
+def client(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(cleaning_routes, 'dataset_store', store)
+    monkeypatch.setattr(forecast_routes, 'dataset_store', store)
+    monkeypatch.setattr(App.forecast, 'forecast_cache', TieredCache(str(tmp_path / 'cache'), enabled=False))
+    from run import create_app
+    return create_app().test_client()
+
+def test_running_stats_merge_matches_one_pass():
+    df = daily('2024-01-01', 100)
+    df = pd.concat([df, daily('2024-05-01', 30, seed=1)], ignore_index=True)  # gap of >7 days
+    ns = df['ds'].to_numpy(dtype='datetime64[ns]').view('int64')
+
+    running = RunningStats()
+    for lo, hi in [(0, 1), (1, 40), (40, 100), (100, 130)]:
+        running.update(ns[lo:hi], df['y'].to_numpy()[lo:hi])
+
+    expected = series_statistics(df)
+    assert running.count == 130
+    assert running.mean == pytest.approx(expected['mean'])
+    assert running.std == pytest.approx(expected['std'])
+    assert (running.min, running.max) == (expected['min'], expected['max'])
+    assert running.large_gaps == expected['large_gaps'] == 1
+
+def test_running_stats_round_trip_through_json():
+    df = daily('2024-01-01', 30)
+    running = RunningStats().update(df['ds'].to_numpy(dtype='datetime64[ns]').view('int64'), df['y'].to_numpy())
+
+    restored = RunningStats.from_dict(json.loads(json.dumps(running.to_dict())))
+
+    assert restored.statistics(0, 1.0, 2.0).keys() == running.statistics(0, 1.0, 2.0).keys()
+    for key, value in running.statistics(0, 1.0, 2.0).items():
+        np.testing.assert_equal(restored.statistics(0, 1.0, 2.0)[key], value)
+    assert RunningStats.from_dict(json.loads(json.dumps(RunningStats().to_dict()))).count == 0
+
+def test_appended_dataset_matches_full_statistics(store):
+    history, new = daily('2024-01-01', 90), daily('2024-03-31', 20, seed=1)
+    dataset_id = store.create(history)
+
+    stats, written = store.append(dataset_id, new)
+    expected = series_statistics(pd.concat([history, new], ignore_index=True))
+
+    for key in ('rows', 'count', 'missing', 'outliers', 'large_gaps', 'range_days', 'date_min', 'date_max'):
+        assert stats[key] == expected[key], key
+    for key in ('sum', 'mean', 'std', 'min', 'max', 'first_half_mean', 'second_half_mean'):
+        assert stats[key] == pytest.approx(expected[key]), key
+    np.testing.assert_allclose(stats['weekday_means'], expected['weekday_means'])
+    pd.testing.assert_frame_equal(store.load(dataset_id), pd.concat([history, new], ignore_index=True))
+    assert len(written) == 20 and not written.attrs['updated_last']
+
+def test_append_rejects_rows_before_last_date(store):
+    dataset_id = store.create(daily('2024-01-01', 30))
+
+    with pytest.raises(ValueError, match='2024-01-30'):
+        store.append(dataset_id, daily('2024-01-29', 5))
+    assert store.statistics(dataset_id)['rows'] == 30
+
+    # Unresampled datasets hold one row per order, so more orders on the last date are fine
+    assert store.append(dataset_id, daily('2024-01-30', 5))[0]['rows'] == 35
+
+@pytest.mark.parametrize('fill', ['zero', 'ffill', 'interpolate', 'drop'])
+def test_resampled_append_fills_gap_and_merges_last_period(client, fill):
+    """Appending to a resampled dataset gives the same series as uploading everything at once."""
+    history, new = daily('2024-01-01', 30), daily('2024-02-04', 10, seed=1)
+    late = pd.DataFrame({'ds': [pd.Timestamp('2024-01-30')], 'y': [7.0]})  # another order on the last stored day
+    options = {'freq': 'daily', 'fill': fill}
+    dataset_id = client.post('/clean/', data={**options, 'file': (io.BytesIO(to_csv(history)), 'sales.csv')}).get_json()['dataset_id']
+
+    body = client.post('/clean/append', data={'dataset_id': dataset_id,
+                                              'file': (io.BytesIO(to_csv(pd.concat([late, new]))), 'new.csv')}).get_json()
+
+    full = client.post('/clean/', data={**options, 'file': (io.BytesIO(to_csv(pd.concat([history, late, new]))), 'all.csv')}).get_json()
+    stored = cleaning_routes.dataset_store.load(dataset_id)
+    np.testing.assert_allclose(stored['y'], [row['y'] for row in full['data']])
+    assert body['total_rows'] == len(full['data'])
+    assert body['updated_last_period']
+    assert body['rows_appended'] == len(full['data']) - 30
+
+def test_resampled_mean_rejects_rows_for_last_period(client):
+    options = {'freq': 'daily', 'agg': 'mean'}
+    cleaned = client.post('/clean/', data={**options, 'file': (io.BytesIO(to_csv(daily('2024-01-01', 30))), 'sales.csv')})
+    dataset_id = cleaned.get_json()['dataset_id']
+
+    late = client.post('/clean/append', json={'dataset_id': dataset_id, 'data': [{'ds': '2024-01-30', 'y': 1}]})
+    after = client.post('/clean/append', json={'dataset_id': dataset_id, 'data': [{'ds': '2024-01-31', 'y': 1}]})
+
+    assert late.status_code == 400 and 'mean' in late.get_json()['error']
+    assert after.status_code == 200 and after.get_json()['total_rows'] == 31
+
+def test_appends_to_different_datasets_do_not_wait_for_each_other(store):
+    first, second = store.create(daily('2024-01-01', 30)), store.create(daily('2024-01-01', 30))
+    done = threading.Event()
+
+    with store._locked(first):
+        thread = threading.Thread(target=lambda: (store.append(second, daily('2024-01-31', 5)), done.set()))
+        thread.start()
+        assert done.wait(5)
+    thread.join()
+    assert store._locks == {}
+
+def test_append_unknown_dataset_returns_none(store):
+    assert store.append('0' * 32, daily('2024-01-01', 5)) is None
+    with pytest.raises(ValueError):
+        store.statistics('../etc')
+
+def test_clean_append_endpoint_matches_full_upload(client):
+    history, new = daily('2024-01-01', 60), daily('2024-03-01', 14, seed=1)
+    cleaned = client.post('/clean/', data={'file': (io.BytesIO(to_csv(history)), 'sales.csv')}).get_json()
+    dataset_id = cleaned['dataset_id']
+
+    body = client.post('/clean/append', data={'dataset_id': dataset_id,
+                                              'file': (io.BytesIO(to_csv(new)), 'new.csv')}).get_json()
+
+    full = pd.concat([history, new], ignore_index=True)
+    stats = series_statistics(full)
+    assert body['success']
+    assert body['rows_appended'] == 14 and body['total_rows'] == 74
+    assert len(body['data']) == 14
+    assert body['quality_issues'] == validate_data_quality(full, stats)['issues']
+    assert body['data_insights'] == validate_data_quality(full, stats)['insights']
+    assert body['pattern_insights'] == get_data_insights(full, stats)
+
+def test_clean_append_accepts_json_rows(client):
+    cleaned = client.post('/clean/', data={'file': (io.BytesIO(to_csv(daily('2024-01-01', 30))), 'sales.csv')})
+    rows = [{'ds': '2024-01-31', 'y': 120.0}, {'ds': '2024-02-01', 'y': 95.5}]
+
+    body = client.post('/clean/append', json={'dataset_id': cleaned.get_json()['dataset_id'], 'data': rows})
+
+    assert body.status_code == 200
+    assert body.get_json()['total_rows'] == 32
+
+def test_clean_append_errors(client):
+    assert client.post('/clean/append', json={'data': []}).status_code == 400
+    assert client.post('/clean/append', json={'dataset_id': 'f' * 32, 'data': [{'ds': '2024-01-01', 'y': 1}]}).status_code == 404
+
+    cleaned = client.post('/clean/', data={'file': (io.BytesIO(to_csv(daily('2024-01-01', 30))), 'sales.csv')})
+    stale = client.post('/clean/append', json={'dataset_id': cleaned.get_json()['dataset_id'],
+                                               'data': [{'ds': '2024-01-15', 'y': 1}]})
+    assert stale.status_code == 400
+
+def test_forecast_by_dataset_id_matches_posted_rows(client):
+    history = daily('2024-01-01', 60)
+    cleaned = client.post('/clean/?include_data=0', data={'file': (io.BytesIO(to_csv(history)), 'sales.csv')}).get_json()
+    assert cleaned['data'] is None
+
+    by_id = client.post('/forecast/', json={'dataset_id': cleaned['dataset_id'], 'model': 'linear', 'periods': 7})
+    rows = [{'ds': d, 'y': y} for d, y in zip(history['ds'].dt.strftime('%Y-%m-%d'), history['y'])]
+    posted = client.post('/forecast/', json={'data': rows, 'model': 'linear', 'periods': 7})
+
+    assert by_id.status_code == 200
+    assert by_id.get_json()['forecast'] == posted.get_json()['forecast']
+    assert client.post('/forecast/backtest', json={'dataset_id': cleaned['dataset_id'], 'model': 'linear'}).status_code == 200
+
+def test_forecast_unknown_or_unforecastable_dataset(client, store):
+    assert client.post('/forecast/', json={'dataset_id': 'a' * 32}).status_code == 404
+    flat = store.create(pd.DataFrame({'ds': pd.date_range('2024-01-01', periods=10), 'y': 5.0}))
+    response = client.post('/forecast/', json={'dataset_id': flat})
+    assert response.status_code == 400
+    assert 'identical' in response.get_json()['error']
+
+def test_expired_datasets_are_removed(tmp_path):
+    store = DatasetStore(str(tmp_path), ttl=60)
+    dataset_id = store.create(daily('2024-01-01', 30))
+    stats_path = os.path.join(str(tmp_path), dataset_id, 'stats.json')
+    os.utime(stats_path, (0, 0))
+
+    assert store.load(dataset_id) is None
+    assert not os.path.exists(os.path.dirname(stats_path))
+
+def test_disk_limit_evicts_least_recently_used(tmp_path):
+    store = DatasetStore(str(tmp_path), max_disk_bytes=10_000, purge_interval=0)
+    first = store.create(daily('2024-01-01', 300))
+    earlier = time.time() - 100
+    os.utime(os.path.join(str(tmp_path), first, 'stats.json'), (earlier, earlier))
+    second = store.create(daily('2024-01-01', 300))
+
+    assert store.load(first) is None
+    assert store.load(second) is not None
+
+def test_create_purges_at_most_once_per_interval(tmp_path, monkeypatch):
+    """Uploads don't each pay for a scan of the whole store."""
+    store = DatasetStore(str(tmp_path), purge_interval=60)
+    scans = []
+    monkeypatch.setattr(store, '_entries', lambda: scans.append(1) or [])
+    for _ in range(3):
+        store.create(daily('2024-01-01', 30))
+
+    assert len(scans) == 1
+
+def test_row_limit(tmp_path):
+    store = DatasetStore(str(tmp_path), max_rows=40)
+    dataset_id = store.create(daily('2024-01-01', 30))
+    with pytest.raises(ValueError, match='40 rows'):
+        store.append(dataset_id, daily('2024-01-31', 20))
+    with pytest.raises(ValueError, match='40 rows'):
+        store.create(daily('2024-01-01', 50))
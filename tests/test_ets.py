@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from App.ets import _filter, fit_holt_winters, initial_states, predict_holt_winters
+from App.forecast import run_forecast
+
+WEEKLY = np.array([0, 5, 10, 15, 20, 40, 30])
+WEEKLY_FACTORS = np.array([0.8, 0.9, 1.0, 1.1, 1.2, 1.3, 0.7])
+
+def reference_filter(y, m, alpha, beta, gamma, init, multiplicative):
+    """One parameter set, one scalar step at a time"""
+    level, trend, season = init[0], init[1], list(init[2])
+    errors = []
+    for t, value in enumerate(y):
+        s = season[t % m]
+        base = level + trend
+        if multiplicative:
+            error = value - base * s
+            drive = error / s
+            season[t % m] = s + gamma * error / base
+        else:
+            error = value - base - s
+            drive = error
+            season[t % m] = s + gamma * error
+        level = base + alpha * drive
+        trend = trend + beta * drive
+        errors.append(error)
+    return np.array(errors), level, trend, np.array(season)
+
+@pytest.mark.parametrize('multiplicative', [False, True])
+def test_vectorized_filter_matches_scalar_recursion(multiplicative):
+    rng = np.random.default_rng(0)
+    t = np.arange(100)
+    y = (100 + 0.5 * t) * WEEKLY_FACTORS[t % 7] + rng.normal(0, 3, 100)
+    init = initial_states(y, 7, multiplicative)
+    alpha, beta, gamma = np.array([0.1, 0.5, 0.9]), np.array([0.01, 0.2, 0.05]), np.array([0.3, 0.1, 0.05])
+
+    sse, level, trend, season, errors, _ = _filter(y, 7, alpha, beta, gamma, init, multiplicative, keep_errors=True)
+
+    for k in range(3):
+        expected = reference_filter(y, 7, alpha[k], beta[k], gamma[k], init, multiplicative)
+        np.testing.assert_allclose(errors[:, k], expected[0])
+        assert sse[k] == pytest.approx((expected[0] ** 2).sum())
+        assert (level[k], trend[k]) == pytest.approx(expected[1:3])
+        np.testing.assert_allclose(season[:, k], expected[3])
+
+def test_recovers_additive_and_multiplicative_patterns():
+    """Noiseless weekly patterns are forecast closely, and 'auto' picks the matching season type."""
+    t = np.arange(140)
+    additive = 100 + 0.5 * t + WEEKLY[t % 7]
+    multiplicative = (100 + 0.5 * t) * WEEKLY_FACTORS[t % 7]
+
+    for y, mode in ((additive, 'additive'), (multiplicative, 'multiplicative')):
+        model = fit_holt_winters(y[:120])
+        predictions, _ = predict_holt_winters(model, 20)
+        assert model['seasonal'] == mode
+        np.testing.assert_allclose(predictions, y[120:], rtol=0.01)
+
+def test_interval_width_grows_with_horizon():
+    rng = np.random.default_rng(1)
+    t = np.arange(200)
+    model = fit_holt_winters(100 + WEEKLY[t % 7] + rng.normal(0, 5, 200), seasonal='additive')
+    _, std = predict_holt_winters(model, 21)
+
+    assert np.all(np.diff(std) > 0)
+    # One-step spread is the residual standard deviation
+    assert std[0] == pytest.approx(model['sigma'])
+    assert model['sigma'] == pytest.approx(5, rel=0.2)
+
+def test_invalid_input():
+    with pytest.raises(ValueError, match="at least 14"):
+        fit_holt_winters(np.arange(10.0))
+    with pytest.raises(ValueError, match="positive"):
+        fit_holt_winters(np.r_[0.0, np.arange(1.0, 30.0)], seasonal='multiplicative')
+    # 'auto' quietly stays additive when a value is zero
+    assert fit_holt_winters(np.r_[0.0, np.arange(1.0, 30.0)])['seasonal'] == 'additive'
+
+def test_ets_model_choice():
+    """run_forecast(model_choice='ets') returns a standard forecast with widening intervals."""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'ds': pd.date_range('2024-01-01', periods=90, freq='D'),
+        'y': 100 + 10 * np.sin(np.arange(90) * 2 * np.pi / 7) + rng.normal(0, 2, 90)
+    })
+
+    result = run_forecast(df, 'ets', 14)
+
+    forecast = result['forecast']
+    width = (forecast['yhat_upper'] - forecast['yhat_lower']).values
+    assert result['insights']['model_used'] == 'Holt-Winters'
+    assert result['insights']['seasonality'] in ('additive', 'multiplicative')
+    assert len(forecast) == 14
+    assert np.all(np.diff(width) > 0)
+
+def test_ets_without_weekly_season():
+    """Weekly data (or under two weeks of days) gets Holt's trend without a season."""
+    df = pd.DataFrame({'ds': pd.date_range('2024-01-07', periods=20, freq='W-SUN'),
+                       'y': 50 + 2.0 * np.arange(20) + np.tile([1.0, -1.0], 10)})
+
+    result = run_forecast(df, 'ets', 4)
+
+    assert result['insights']['seasonality'] == 'none'
+    np.testing.assert_allclose(result['forecast']['yhat'], 50 + 2.0 * np.arange(20, 24), atol=2)
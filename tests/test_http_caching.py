@@ -0,0 +1,130 @@
+import gzip
+import io
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'FlaskBackend'))
+
+import App.forecast
+import cleaning_routes
+import forecast_routes
+from App.cache import TieredCache
+from App.datasets import DatasetStore
+
+def sales_csv(days=200, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({'Date': pd.date_range('2024-01-01', periods=days).strftime('%Y-%m-%d'),
+                       'Sales': np.round(100 + rng.normal(0, 10, days), 2)})
+    return df.to_csv(index=False).encode()
+
+def rows(days=60):
+    return [{'ds': d.strftime('%Y-%m-%d'), 'y': 100.0 + (i % 7) * 3 + i * 0.5}
+            for i, d in enumerate(pd.date_range('2024-01-01', periods=days))]
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(App.forecast, 'forecast_cache', TieredCache(str(tmp_path / 'cache'), enabled=False))
+    monkeypatch.setattr(cleaning_routes, 'dataset_store', DatasetStore(str(tmp_path)))
+    from run import create_app
+    return create_app().test_client()
+
+def test_large_responses_are_gzipped(client):
+    plain = client.post('/clean/', data={'file': (io.BytesIO(sales_csv()), 'sales.csv')})
+    compressed = client.post('/clean/', data={'file': (io.BytesIO(sales_csv()), 'sales.csv')},
+                             headers={'Accept-Encoding': 'gzip, deflate'})
+
+    assert 'Content-Encoding' not in plain.headers
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert len(compressed.data) < len(plain.data) / 3
+    body = json.loads(gzip.decompress(compressed.data))
+    assert body['data'] == plain.get_json()['data']
+    # Each upload stored its own dataset, so the tags differ beyond the coding suffix
+    assert compressed.headers['ETag'].endswith('-gzip"') and not plain.headers['ETag'].endswith('-gzip"')
+
+def test_small_responses_are_not_compressed(client):
+    response = client.get('/health', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+def test_brotli_preferred_when_installed(client):
+    brotli = pytest.importorskip('brotli')
+    response = client.post('/forecast/', json={'data': rows(), 'model': 'linear', 'periods': 60},
+                           headers={'Accept-Encoding': 'gzip;q=0.8, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(brotli.decompress(response.data))['success']
+
+def test_forecast_revalidation_skips_the_fit(client, monkeypatch):
+    first = client.post('/forecast/', json={'data': rows(), 'model': 'linear', 'periods': 7})
+    etag = first.headers['ETag']
+
+    def refit(*args, **kwargs):
+        raise AssertionError("304 responses must not refit")
+    monkeypatch.setattr(forecast_routes, 'run_forecast_cached', refit)
+    again = client.post('/forecast/', json={'data': rows(), 'model': 'linear', 'periods': 7},
+                        headers={'If-None-Match': etag})
+
+    assert again.status_code == 304
+    assert again.headers['ETag'] == etag
+    assert again.data == b''
+
+def test_forecast_etag_tracks_inputs(client):
+    def etag(**overrides):
+        body = {'data': rows(), 'model': 'linear', 'periods': 7, **overrides}
+        return client.post('/forecast/', json=body).headers['ETag']
+
+    base = etag()
+    assert etag() == base
+    assert etag(periods=14) != base
+    assert etag(model='lag') != base
+    assert etag(format='columnar') != base
+    assert etag(data=rows(61)) != base
+
+def test_gzip_etag_revalidates(client):
+    headers = {'Accept-Encoding': 'gzip'}
+    first = client.post('/forecast/', json={'data': rows(), 'model': 'linear', 'periods': 60}, headers=headers)
+    assert first.headers['ETag'].endswith('-gzip"')
+
+    again = client.post('/forecast/', json={'data': rows(), 'model': 'linear', 'periods': 60},
+                        headers={**headers, 'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+
+def test_clean_revalidation(client):
+    first = client.post('/clean/', data={'file': (io.BytesIO(sales_csv()), 'sales.csv')})
+    etag = first.headers['ETag']
+
+    same = client.post('/clean/', data={'file': (io.BytesIO(sales_csv()), 'sales.csv')}, headers={'If-None-Match': etag})
+    changed = client.post('/clean/', data={'file': (io.BytesIO(sales_csv(seed=1)), 'sales.csv')},
+                          headers={'If-None-Match': etag})
+    other_options = client.post('/clean/', data={'file': (io.BytesIO(sales_csv()), 'sales.csv'), 'freq': 'weekly'},
+                                headers={'If-None-Match': etag})
+
+    assert same.status_code == 304
+    assert changed.status_code == 200
+    assert other_options.status_code == 200
+
+def test_clean_revalidation_needs_the_dataset(client):
+    """A 304 would hand back the earlier dataset_id, so it's only sent while that dataset is stored."""
+    first = client.post('/clean/', data={'file': (io.BytesIO(sales_csv()), 'sales.csv')})
+    dataset_id, etag = first.get_json()['dataset_id'], first.headers['ETag']
+    store = cleaning_routes.dataset_store
+    shutil.rmtree(os.path.join(store.directory, dataset_id))
+
+    again = client.post('/clean/', data={'file': (io.BytesIO(sales_csv()), 'sales.csv')}, headers={'If-None-Match': etag})
+
+    assert again.status_code == 200
+    assert again.get_json()['dataset_id'] != dataset_id
+    assert store.load(again.get_json()['dataset_id']) is not None
+    assert again.headers['ETag'] != etag
+
+def test_clean_without_stored_dataset_sends_no_etag(client, monkeypatch):
+    monkeypatch.setattr(cleaning_routes, 'store_dataset', lambda *args, **kwargs: None)
+    response = client.post('/clean/', data={'file': (io.BytesIO(sales_csv()), 'sales.csv')})
+    assert response.get_json()['dataset_id'] is None
+    assert 'ETag' not in response.headers
@@ -0,0 +1,142 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'FlaskBackend'))
+
+import App.jobs as jobs
+from App.forecast import run_forecast_cached
+from App.jobs import JobQueue, MemoryJobBackend, SQLiteJobBackend
+
+def make_series(periods=20):
+    return pd.DataFrame({
+        'ds': pd.date_range('2024-01-01', periods=periods, freq='D'),
+        'y': [100 + i + (i % 3) for i in range(periods)]
+    })
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def queue(request, tmp_path):
+    if request.param == 'memory':
+        backend = MemoryJobBackend()
+    else:
+        backend = SQLiteJobBackend(str(tmp_path / 'jobs.sqlite3'))
+    queue = JobQueue(backend, max_workers=1)
+    yield queue
+    queue.shutdown()
+
+def test_job_runs_forecast(queue):
+    """A submitted forecast finishes with the same result shape as a direct call."""
+    job_id = queue.submit(run_forecast_cached, make_series(), 'linear', 5)
+    job = queue.wait(job_id, timeout=60)
+
+    assert job['status'] == 'done'
+    result, cached = job['result']
+    assert len(result['forecast']) == 5
+    assert result['insights']['model_used'] == 'Linear Regression'
+
+def test_job_failure_is_recorded(queue):
+    """Errors raised by the job are stored instead of propagating."""
+    job_id = queue.submit(run_forecast_cached, make_series(periods=3), 'linear', 5)
+    job = queue.wait(job_id, timeout=60)
+
+    assert job['status'] == 'failed'
+    assert 'at least 5' in job['error']
+
+def test_unknown_and_expired_jobs(tmp_path):
+    """Unknown ids return None and jobs older than the TTL are purged."""
+    backend = SQLiteJobBackend(str(tmp_path / 'jobs.sqlite3'), ttl=-1)
+    backend.create('old')
+    backend.purge()
+
+    assert backend.get('old') is None
+    assert backend.get('missing') is None
+
+def test_sqlite_jobs_visible_to_other_workers(tmp_path):
+    """A second backend on the same file (another gunicorn worker) sees finished jobs."""
+    path = str(tmp_path / 'jobs.sqlite3')
+    SQLiteJobBackend(path).create('abc')
+    SQLiteJobBackend(path).finish('abc', result={'value': 1})
+
+    assert SQLiteJobBackend(path).get('abc')['result'] == {'value': 1}
+
+def test_async_forecast_endpoint(tmp_path, monkeypatch):
+    """POST /forecast?async=1 returns a job id that can be polled for the forecast."""
+    from run import create_app
+    queue = JobQueue(SQLiteJobBackend(str(tmp_path / 'jobs.sqlite3')), max_workers=1)
+    monkeypatch.setattr(jobs, 'job_queue', queue)
+    import forecast_routes
+    monkeypatch.setattr(forecast_routes, 'job_queue', queue)
+    client = create_app().test_client()
+
+    df = make_series()
+    rows = [{'ds': str(d.date()), 'y': float(y)} for d, y in zip(df['ds'], df['y'])]
+    response = client.post('/forecast/?async=1', json={'data': rows, 'model': 'linear', 'periods': 5})
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body['status'] == 'queued'
+
+    queue.wait(body['job_id'], timeout=60)
+    polled = client.get(body['status_url']).get_json()
+    queue.shutdown()
+
+    assert polled['status'] == 'done'
+    assert len(polled['forecast']) == 5
+    assert client.get('/forecast/jobs/does-not-exist').status_code == 404
+
+def test_sqlite_jobs_refuse_shared_directory(tmp_path):
+    shared = tmp_path / 'shared'
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(PermissionError, match='writable by other users'):
+        SQLiteJobBackend(str(shared / 'jobs.sqlite3'))
+
+def test_jobs_of_a_dead_worker_are_failed(tmp_path):
+    """A job whose owner process is gone, or that stopped sending heartbeats, doesn't stay queued forever."""
+    path = str(tmp_path / 'jobs.sqlite3')
+    backend = SQLiteJobBackend(path, stale_after=60)
+    child = subprocess.Popen([sys.executable, '-c', 'pass'])
+    child.wait()
+    for job_id, owner_pid, heartbeat in (('orphan', child.pid, time.time()), ('silent', os.getpid(), time.time() - 120),
+                                         ('alive', os.getppid(), time.time())):
+        backend.create(job_id)
+        with sqlite3.connect(path) as conn:
+            conn.execute("UPDATE jobs SET owner_pid = ?, heartbeat = ? WHERE id = ?", (owner_pid, heartbeat, job_id))
+
+    assert backend.get('orphan')['status'] == 'failed'
+    assert 'stopped' in backend.get('silent')['error']
+    assert backend.get('alive')['status'] == 'queued'
+
+def test_queue_sends_heartbeats(tmp_path):
+    backend = SQLiteJobBackend(str(tmp_path / 'jobs.sqlite3'), stale_after=0.5)
+    queue = JobQueue(backend, max_workers=1, heartbeat_seconds=0.05)
+    job_id = queue.submit(time.sleep, 1.0)
+
+    time.sleep(0.8)
+    assert backend.get(job_id)['status'] == 'queued'
+    assert queue.wait(job_id, timeout=10)['status'] == 'done'
+    queue.shutdown()
+
+def test_unsafe_state_dir_falls_back_to_memory_backend(tmp_path, monkeypatch):
+    """A job database others could write to is refused without stopping the app from starting."""
+    state_dir = tmp_path / 'shared'
+    state_dir.mkdir()
+    state_dir.chmod(0o777)
+    env = dict(os.environ, SALESFORECASTER_STATE_DIR=str(state_dir))
+    backend_dir = os.path.join(os.path.dirname(__file__), '..', 'FlaskBackend')
+    imported = subprocess.run([sys.executable, '-c', 'import forecast_routes'], cwd=backend_dir, env=env)
+    assert imported.returncode == 0
+
+    monkeypatch.setattr(jobs, 'JOB_DB_PATH', str(state_dir / 'jobs.sqlite3'))
+    queue = JobQueue(max_workers=1)
+    job_id = queue.submit(run_forecast_cached, make_series(), 'linear', 5)
+
+    assert isinstance(queue.backend, MemoryJobBackend)
+    assert queue.wait(job_id, timeout=60)['status'] == 'done'
+    assert not (state_dir / 'jobs.sqlite3').exists()
+    queue.shutdown()
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from App.forecast import run_forecast
+from App.lags import build_lag_features, fit_lag_model, predict_lag_model
+
+def test_lag_columns_match_shifted_series():
+    """Each lag column is the series shifted by that many steps; the rolling mean trails the target."""
+    y = np.arange(20, dtype=float) ** 1.5
+    X, target = build_lag_features(y, lags=3, window=4)
+
+    frame = pd.Series(y)
+    warmup = 4
+    np.testing.assert_array_equal(target, y[warmup:])
+    for lag in (1, 2, 3):
+        np.testing.assert_array_equal(X[:, 1 + lag], frame.shift(lag).values[warmup:])
+    np.testing.assert_allclose(X[:, 5], frame.shift(1).rolling(4).mean().values[warmup:])
+
+def test_default_features_have_full_column_rank():
+    """With the default lags and window the rolling mean isn't a combination of the lag columns."""
+    y = np.random.default_rng(0).normal(100, 10, 120)
+    X, _ = build_lag_features(y, np.arange(120) % 7)
+
+    assert np.linalg.matrix_rank(X) == X.shape[1]
+    with pytest.raises(ValueError, match="window"):
+        build_lag_features(y, lags=7, window=7)
+
+def test_recovers_weekly_pattern():
+    """A noiseless weekly pattern with trend is forecast almost exactly."""
+    dates = pd.date_range('2024-01-01', periods=120, freq='D')
+    t = np.arange(140)
+    pattern = 100 + 0.5 * t + np.array([0, 5, 10, 15, 20, 40, 30])[t % 7]
+    weekdays = pd.date_range('2024-01-01', periods=140, freq='D').dayofweek.values
+
+    model = fit_lag_model(pattern[:120], weekdays[:120])
+    predictions = predict_lag_model(model, pattern[:120], 20, weekdays[120:])
+
+    np.testing.assert_allclose(predictions, pattern[120:], atol=1e-6)
+    assert model['mae'] < 1e-6
+
+def test_too_short_series_rejected():
+    with pytest.raises(ValueError, match="at least"):
+        fit_lag_model(np.arange(10.0), np.arange(10) % 7)
+
+def test_lag_model_choice():
+    """run_forecast(model_choice='lag') returns a standard forecast with widening intervals."""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'ds': pd.date_range('2024-01-01', periods=90, freq='D'),
+        'y': 100 + 10 * np.sin(np.arange(90) * 2 * np.pi / 7) + rng.normal(0, 2, 90)
+    })
+
+    result = run_forecast(df, 'lag', 14)
+
+    forecast = result['forecast']
+    width = (forecast['yhat_upper'] - forecast['yhat_lower']).values
+    assert result['insights']['model_used'] == 'Lag Regression'
+    assert len(forecast) == 14
+    assert np.all(np.diff(width) > 0)
+    assert not result['low_confidence']
@@ -0,0 +1,60 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'FlaskBackend'))
+
+import App.metrics as metrics
+from App.metrics import Histogram, rows_label, timed
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram('test_latency_seconds', 'Test histogram', labelnames=('stage',), buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage='a')
+    histogram.observe(0.5, stage='a')
+    histogram.observe(5.0, stage='a')
+
+    text = histogram.render()
+
+    assert '# TYPE test_latency_seconds histogram' in text
+    assert 'test_latency_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{stage="a",le="1.0"} 2' in text
+    assert 'test_latency_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{stage="a"} 3' in text
+    metrics._registry.pop('test_latency_seconds')
+
+def test_rows_label():
+    assert rows_label(50) == '<=100'
+    assert rows_label(5000) == '<=10000'
+    assert rows_label(10 ** 7) == '>1000000'
+
+def test_disabled_timer_records_nothing(monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_ENABLED', False)
+    metrics.STAGE_SECONDS.clear()
+
+    with timed('fit', 'linear', 10):
+        pass
+
+    assert timed('fit') is timed('predict')
+    assert 'stage="fit"' not in metrics.STAGE_SECONDS.render()
+
+def test_metrics_endpoint_reports_forecast_stages(tmp_path, monkeypatch):
+    """A forecast request shows up as fit/predict/serialize stages and request latency."""
+    from run import create_app
+    import App.forecast as forecast
+    from App.cache import TieredCache
+    monkeypatch.setattr(forecast, 'forecast_cache', TieredCache(str(tmp_path), enabled=False))
+    client = create_app().test_client()
+    df = pd.DataFrame({'ds': pd.date_range('2024-01-01', periods=20), 'y': [100 + i * 2 + i % 3 for i in range(20)]})
+    rows = [{'ds': str(d.date()), 'y': float(y)} for d, y in zip(df['ds'], df['y'])]
+    client.post('/forecast/', json={'data': rows, 'model': 'linear', 'periods': 5})
+
+    response = client.get('/metrics')
+    text = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert 'salesforecaster_stage_seconds_count{stage="fit",model="linear",rows="<=100"}' in text
+    assert 'stage="serialize"' in text
+    assert 'salesforecaster_request_seconds_count{endpoint="/forecast/",method="POST",status="200"}' in text
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+import App.model_registry as model_registry
+from App.cache import TieredCache
+from App.forecast import run_prophet
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    cache = TieredCache(str(tmp_path))
+    monkeypatch.setattr(model_registry, 'model_registry', cache)
+    return cache
+
+def make_series(periods=60):
+    return pd.DataFrame({
+        'ds': pd.date_range('2024-01-01', periods=periods, freq='D'),
+        'y': [i + 10 + (i % 7) * 5 for i in range(periods)]
+    })
+
+def test_prophet_model_reused_across_horizons(registry):
+    """A second horizon on the same data predicts from the registered model."""
+    pytest.importorskip('prophet')
+    df = make_series()
+
+    week, week_insights = run_prophet(df, forecast_days=7)
+    fortnight, fortnight_insights = run_prophet(df, forecast_days=14)
+
+    assert not week_insights['model_reused']
+    assert fortnight_insights['model_reused']
+    assert len(fortnight) == 14
+    np.testing.assert_allclose(fortnight['yhat'].values[:7], week['yhat'].values)
+
+def test_different_series_fits_new_model(registry):
+    """Changing the training data misses the registry."""
+    pytest.importorskip('prophet')
+    run_prophet(make_series(60))
+    _, insights = run_prophet(make_series(61))
+
+    assert not insights['model_reused']
+
+def test_appended_rows_warm_start_from_previous_fit(registry):
+    """Appending a day warm-starts from the earlier fit and stays close to a cold fit."""
+    pytest.importorskip('prophet')
+    df = make_series(90)
+
+    run_prophet(df.iloc[:-1])
+    warm, warm_insights = run_prophet(df)
+
+    assert warm_insights['warm_started']
+    assert not warm_insights['model_reused']
+
+    registry.clear()
+    cold, cold_insights = run_prophet(df)
+    assert not cold_insights['warm_started']
+    np.testing.assert_allclose(warm['yhat'].values, cold['yhat'].values, rtol=0.02)
@@ -0,0 +1,190 @@
+import io
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'FlaskBackend'))
+
+import cleaning_routes
+import forecast_routes
+import App.forecast
+from App.cache import TieredCache
+from App.datasets import DatasetStore
+from App.persistence import BatchWriter, ConnectionPool, SQLiteStore, create_store
+
+def daily(days, seed=0):
+    rng = np.random.default_rng(seed)
+    y = 100 + 20 * np.sin(np.arange(days) * 2 * np.pi / 7) + rng.normal(0, 5, days)
+    return pd.DataFrame({'ds': pd.date_range('2024-01-01', periods=days, freq='D'), 'y': y})
+
+def forecast_frame(days=7):
+    return pd.DataFrame({'ds': pd.date_range('2024-03-01', periods=days), 'yhat': np.arange(days, dtype=float),
+                         'yhat_lower': np.zeros(days), 'yhat_upper': np.full(days, 10.0)})
+
+def rows(store, table):
+    with sqlite3.connect(store.path) as conn:
+        conn.row_factory = sqlite3.Row
+        return [dict(row) for row in conn.execute(f"SELECT * FROM {table}")]
+
+@pytest.fixture
+def writer(tmp_path):
+    writer = BatchWriter(SQLiteStore(str(tmp_path / 'db.sqlite3')), batch_size=50, flush_seconds=0.01)
+    yield writer
+    writer.close()
+
+@pytest.fixture
+def client(writer, tmp_path, monkeypatch):
+    store = DatasetStore(str(tmp_path / 'datasets'))
+    monkeypatch.setattr(cleaning_routes, 'dataset_store', store)
+    monkeypatch.setattr(forecast_routes, 'dataset_store', store)
+    monkeypatch.setattr(cleaning_routes, 'persistence', writer)
+    monkeypatch.setattr(forecast_routes, 'persistence', writer)
+    monkeypatch.setattr(App.forecast, 'forecast_cache', TieredCache(str(tmp_path / 'cache'), enabled=False))
+    from run import create_app
+    return create_app().test_client()
+
+def test_batches_are_written_in_order(writer):
+    upload_id = 'ab' * 16
+    writer.record_upload(id=upload_id, file_name='sales.csv', file_size=2048, original_rows=100, cleaned_rows=90,
+                         data_quality_issues=['gap'], data_insights=['ok'], pattern_insights=['weekly'])
+    for _ in range(120):
+        writer.record_forecast(forecast=forecast_frame(), insights={'model_used': 'linear', 'mae': np.float64(1.5)},
+                               low_confidence=np.bool_(False), forecast_periods=7, data_points_used=90,
+                               upload_id=upload_id)
+    writer.flush()
+
+    stats = writer.stats()
+    assert stats['written'] == 121 and stats['dropped'] == stats['failed'] == 0
+    assert stats['batches'] < 121
+
+    upload, = rows(writer.store, 'uploads')
+    assert upload['id'] == 'abababab-abab-abab-abab-abababababab'
+    assert json.loads(upload['pattern_insights']) == ['weekly']
+    forecasts = rows(writer.store, 'forecasts')
+    assert len(forecasts) == 120 and forecasts[0]['upload_id'] == upload['id']
+    assert forecasts[0]['model_used'] == 'linear' and forecasts[0]['confidence_level'] == 'normal'
+    assert json.loads(forecasts[0]['forecast_data'])[0] == {'ds': '2024-03-01', 'yhat': 0.0,
+                                                            'yhat_lower': 0.0, 'yhat_upper': 10.0}
+    assert json.loads(forecasts[0]['forecast_insights'])['mae'] == 1.5
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    release = threading.Event()
+
+    class SlowStore:
+        def insert(self, table, rows):
+            release.wait()
+
+        def close(self):
+            pass
+
+    writer = BatchWriter(SlowStore(), queue_size=2, batch_size=1, flush_seconds=0)
+    accepted = [writer.record_upload(file_name=f'{i}.csv') for i in range(10)]
+    release.set()
+    writer.close()
+
+    # One record may be taken off the queue by the writer before it blocks
+    assert accepted.count(True) in (2, 3)
+    assert writer.stats()['dropped'] == 10 - accepted.count(True)
+
+def test_failed_batch_keeps_the_good_rows(writer):
+    writer.record_upload(file_name='good.csv')
+    writer.record_upload(file_name=None)  # violates NOT NULL
+    writer.record_upload(file_name='also-good.csv')
+    writer.flush()
+
+    assert sorted(row['file_name'] for row in rows(writer.store, 'uploads')) == ['also-good.csv', 'good.csv']
+    assert writer.stats()['failed'] == 1
+
+def test_pool_reuses_connections_and_replaces_broken_ones():
+    made = []
+
+    class Conn:
+        def close(self):
+            self.closed = True
+
+    def connect():
+        made.append(Conn())
+        return made[-1]
+
+    pool = ConnectionPool(connect, size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as again:
+        assert again is first
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            raise RuntimeError("broken")
+    with pool.connection() as fresh:
+        assert fresh is not first
+    assert len(made) == 2 and made[0].closed
+
+def test_pool_starts_fresh_in_a_forked_process():
+    made = []
+
+    class Conn:
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    def connect():
+        made.append(Conn())
+        return made[-1]
+
+    pool = ConnectionPool(connect, size=1)
+    with pool.connection() as parent:
+        pass
+    pool._pid = -1  # as if this process were a fork of the one that opened `parent`
+
+    with pool.connection() as child:
+        assert child is not parent
+    assert not parent.closed
+
+def test_sqlite_store_connects_on_first_use(tmp_path):
+    store = SQLiteStore(str(tmp_path / 'state' / 'db.sqlite3'))
+    assert not os.path.exists(tmp_path / 'state')
+
+    assert store.count('uploads') == 0
+    store.close()
+
+def test_create_store_from_url(tmp_path):
+    store = create_store(f"sqlite:///{tmp_path / 'other.sqlite3'}")
+    assert isinstance(store, SQLiteStore) and store.path.endswith('other.sqlite3')
+    store.close()
+
+def test_clean_and_forecast_requests_are_persisted(client, writer):
+    csv = daily(60).rename(columns={'ds': 'Date', 'y': 'Sales'}).to_csv(index=False).encode()
+    cleaned = client.post('/clean/', data={'file': (io.BytesIO(csv), 'sales.csv')}).get_json()
+    response = client.post('/forecast/', json={'dataset_id': cleaned['dataset_id'], 'model': 'linear', 'periods': 5})
+    assert response.status_code == 200
+    writer.flush()
+
+    upload, = rows(writer.store, 'uploads')
+    forecast, = rows(writer.store, 'forecasts')
+    assert upload['id'].replace('-', '') == cleaned['dataset_id']
+    assert (upload['file_name'], upload['file_size'], upload['original_rows']) == ('sales.csv', len(csv), 60)
+    assert json.loads(upload['data_quality_issues']) == cleaned['quality_issues']
+    assert forecast['upload_id'] == upload['id']
+    assert (forecast['forecast_periods'], forecast['data_points_used']) == (5, 60)
+    assert len(json.loads(forecast['forecast_data'])) == 5
+
+def test_async_forecasts_are_persisted(client, writer, tmp_path, monkeypatch):
+    from App.jobs import JobQueue, MemoryJobBackend
+    queue = JobQueue(MemoryJobBackend(), max_workers=1)
+    monkeypatch.setattr(forecast_routes, 'job_queue', queue)
+    data = [{'ds': str(d.date()), 'y': float(y)} for d, y in zip(daily(40)['ds'], daily(40)['y'])]
+
+    job = client.post('/forecast/?async=1', json={'data': data, 'model': 'linear', 'periods': 5}).get_json()
+    queue.wait(job['job_id'], timeout=60)
+    queue.shutdown()
+    writer.flush()
+
+    forecast, = rows(writer.store, 'forecasts')
+    assert (forecast['forecast_periods'], forecast['data_points_used']) == (5, 40)
@@ -1,3 +1,5 @@
+import os
+
 import pandas as pd
 import pytest
 from App.preprocess import clean_data, validate_data_quality, get_data_insights
@@ -116,4 +118,151 @@ def test_diagnose_dataset():
     assert result['rows'] == 10
     assert result['date_start'] == '2024-01-01'
     assert result['date_end'] == '2024-01-10'
-    assert result['avg_sales'] == 145.0
\ No newline at end of file
+    assert result['avg_sales'] == 145.0
+
+def test_clean_data_group_by_builds_panel():
+    """Grouped cleaning returns one long panel with a series id per group."""
+    df = pd.DataFrame({
+        'Order Date': ['2024-01-02', '2024-01-01', '2024-01-01', '2024-01-03'],
+        'Product ID': ['A', 'A', 'B', None],
+        'Store': ['s1', 's1', 's2', 's1'],
+        'Notes': [None, 'gift', None, None],
+        'Total Amount': ['$10.00', '$20.00', '$5.00', '$7.00']
+    })
+
+    panel = clean_data(df, group_by=['Product ID', 'Store'])
+
+    assert list(panel.columns) == ['series_id', 'ds', 'y']
+    assert list(panel['series_id']) == ['A | s1', 'A | s1', 'B | s2']
+    assert list(panel['y']) == [20.0, 10.0, 5.0]
+    assert panel[panel['series_id'] == 'A | s1']['ds'].is_monotonic_increasing
+
+def test_clean_data_group_by_unknown_column():
+    """Unknown grouping columns are reported."""
+    df = pd.DataFrame({'Date': ['2024-01-01'], 'Sales': [1.0]})
+
+    with pytest.raises(ValueError, match="Grouping columns not found"):
+        clean_data(df, group_by='Region')
+
+def test_split_panel():
+    """A panel splits into per-series ds/y frames."""
+    from App.preprocess import split_panel
+    path = os.path.join(os.path.dirname(__file__), '..', 'data', 'preprocesstester.csv')
+    panel = clean_data(pd.read_csv(path), group_by='Product ID')
+
+    series = split_panel(panel)
+
+    assert set(series) == set(panel['series_id'])
+    assert sum(len(frame) for frame in series.values()) == len(panel)
+    assert all(list(frame.columns) == ['ds', 'y'] for frame in series.values())
+
+def test_clean_csv_stream_aggregates_across_chunks():
+    """Chunked cleaning gives the same daily totals as aggregating the whole file."""
+    from io import StringIO
+    from App.preprocess import clean_csv_stream
+    rows = ["Order ID,Order Date,Notes,Total Amount"]
+    for i in range(50):
+        rows.append(f"{i},2024-01-{i % 7 + 1:02d} 1{i % 10}:00,note {i},\"${1000 + i:,}.50\"")
+    rows.append("99,not a date,,5")
+    csv = "\n".join(rows)
+
+    streamed, rows_read = clean_csv_stream(StringIO(csv), chunksize=8)
+
+    full = clean_data(pd.read_csv(StringIO(csv)).iloc[:-1])
+    expected = full.groupby(full['ds'].dt.normalize())['y'].sum()
+    assert rows_read == 51
+    assert list(streamed['ds']) == list(expected.index)
+    assert streamed['y'].tolist() == pytest.approx(expected.tolist())
+
+    means, _ = clean_csv_stream(StringIO(csv), chunksize=8, agg='mean')
+    assert means['y'].tolist() == pytest.approx(full.groupby(full['ds'].dt.normalize())['y'].mean().tolist())
+
+def test_read_sales_csv_reads_only_needed_columns():
+    """Wide exports are parsed down to the date, sales and requested columns."""
+    from io import StringIO
+    from App.preprocess import read_sales_csv
+    csv = "Order ID,Order Date,Notes,Product ID,Total Amount\n" + "\n".join(
+        f"{i},2024-01-{i % 28 + 1:02d},\"free, text {i}\",P{i % 2},{i}.5" for i in range(30)
+    )
+
+    df = read_sales_csv(StringIO(csv), sample_rows=5)
+    grouped = read_sales_csv(StringIO(csv), extra_columns=['Product ID'], sample_rows=5)
+
+    assert set(df.columns) == {'Order Date', 'Total Amount'}
+    assert len(df) == 30
+    assert set(grouped.columns) == {'Order Date', 'Total Amount', 'Product ID'}
+
+def test_clean_data_ignores_gaps_in_unrelated_columns():
+    """Missing values outside the date and sales columns no longer drop rows."""
+    path = os.path.join(os.path.dirname(__file__), '..', 'data', 'preprocesstester.csv')
+
+    result = clean_data(path)
+
+    assert len(result) == len(pd.read_csv(path))
+    assert list(result.columns) == ['ds', 'y']
+
+def test_parse_dates_infers_day_first_format():
+    """European dates are recognised even when the first values look American."""
+    from App.preprocess import parse_dates
+    values = pd.Series(['01/02/2024', '05/02/2024', '13/02/2024', '28/02/2024'])
+
+    parsed, date_format, unparseable = parse_dates(values)
+
+    assert date_format == '%d/%m/%Y'
+    assert unparseable == 0
+    assert list(parsed.dt.strftime('%Y-%m-%d')) == ['2024-02-01', '2024-02-05', '2024-02-13', '2024-02-28']
+
+def test_parse_dates_falls_back_for_mixed_formats():
+    """Rows in a second format are still parsed; garbage is counted."""
+    from App.preprocess import parse_dates
+    values = pd.Series(['2024-03-01', '2024-03-02 10:30:00', 'March 3, 2024', 'not a date', None])
+
+    parsed, date_format, unparseable = parse_dates(values)
+
+    assert date_format == '%Y-%m-%d'
+    assert unparseable == 1
+    assert parsed.notna().sum() == 3
+
+def test_unparseable_dates_reported_as_quality_issue():
+    """Rows dropped for unreadable dates show up in validate_data_quality."""
+    df = pd.DataFrame({
+        'Date': ['2024-01-01', '2024-01-02', 'soon', '2024-01-04'],
+        'Sales': [100, 110, 120, 130]
+    })
+
+    cleaned = clean_data(df)
+    result = validate_data_quality(cleaned)
+
+    assert len(cleaned) == 3
+    assert cleaned.attrs['unparseable_dates'] == 1
+    assert any('unreadable dates' in issue for issue in result['issues'])
+
+def test_fixed_width_fast_path_matches_pandas():
+    """The NumPy fast path agrees with strptime and rejects impossible dates."""
+    from App.preprocess import parse_dates, parse_fixed_width_dates
+    stamps = pd.Series(pd.date_range('2024-01-01', periods=2000, freq='97min'))
+    values = stamps.dt.strftime('%d.%m.%Y %H:%M').copy()
+    values[5] = '30.02.2024 10:00'
+    values[6] = '3.1.2024 10:00'
+
+    fast = parse_fixed_width_dates(values, '%d.%m.%Y %H:%M')
+    parsed, date_format, unparseable = parse_dates(values)
+
+    assert date_format == '%d.%m.%Y %H:%M'
+    assert pd.isna(fast[5]) and pd.isna(fast[6])
+    assert parsed[6] == pd.Timestamp('2024-01-03 10:00')
+    assert unparseable == 1
+    expected = pd.to_datetime(values.drop([5, 6]), format='%d.%m.%Y %H:%M')
+    assert (parsed.drop([5, 6]) == expected).all()
+
+def test_parse_dates_with_repeated_values():
+    """Columns with many repeated dates parse each distinct value once, same result."""
+    from App.preprocess import parse_dates
+    values = pd.Series(['07/%02d/2024' % (i % 28 + 1) for i in range(3000)] + [None, 'bad'])
+
+    parsed, date_format, unparseable = parse_dates(values)
+
+    assert date_format == '%m/%d/%Y'
+    assert unparseable == 1
+    assert parsed[:3000].equals(pd.to_datetime(values[:3000], format='%m/%d/%Y'))
+    assert parsed[3000:].isna().all()
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from App.forecast import run_linear_regression
+from App.preprocess import clean_data, resample_series
+
+def make_orders():
+    """Order-level rows: several orders per day, with 2024-01-03 missing"""
+    return pd.DataFrame({
+        'Order Date': ['2024-01-01', '2024-01-01', '2024-01-02', '2024-01-04', '2024-01-04', '2024-01-04'],
+        'Total Amount': [10.0, 20.0, 5.0, 1.0, 2.0, 3.0]
+    })
+
+def test_daily_sum_fills_gaps_with_zero():
+    """Duplicate dates collapse to one row per day and empty days become zero."""
+    result = clean_data(make_orders(), freq='daily')
+
+    assert list(result['ds'].dt.strftime('%Y-%m-%d')) == ['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-04']
+    assert list(result['y']) == [30.0, 5.0, 0.0, 6.0]
+
+@pytest.mark.parametrize('fill, expected', [
+    ('ffill', [15.0, 5.0, 5.0, 2.0]),
+    ('interpolate', [15.0, 5.0, 3.5, 2.0]),
+    ('drop', [15.0, 5.0, 2.0]),
+])
+def test_mean_with_fill_policies(fill, expected):
+    """Each fill policy decides what an empty period becomes."""
+    result = clean_data(make_orders(), freq='daily', agg='mean', fill=fill)
+    assert list(result['y']) == expected
+
+def test_weekly_and_monthly_grids():
+    """Weekly and monthly resampling sum onto period labels."""
+    df = pd.DataFrame({'ds': pd.date_range('2024-01-01', periods=60, freq='D'), 'y': 1.0})
+
+    weekly = resample_series(df, 'weekly')
+    monthly = resample_series(df, 'monthly')
+
+    assert weekly['y'].sum() == 60
+    assert (weekly['ds'].dt.dayofweek == 6).all()
+    assert list(monthly['y']) == [31.0, 29.0]
+
+def test_unknown_options_rejected():
+    """Invalid frequency, aggregation and fill policy are reported."""
+    df = clean_data(make_orders())
+    for kwargs in ({'freq': 'hourly'}, {'agg': 'median'}, {'fill': 'bfill'}):
+        with pytest.raises(ValueError):
+            resample_series(df, **{'freq': 'daily', **kwargs})
+
+def test_forecast_follows_series_frequency():
+    """A weekly series is forecast on weekly dates."""
+    df = pd.DataFrame({
+        'ds': pd.date_range('2024-01-07', periods=20, freq='W'),
+        'y': np.arange(20) * 3.0 + 50
+    })
+
+    forecast, _ = run_linear_regression(df, forecast_days=4)
+
+    assert list(forecast['ds']) == list(pd.date_range('2024-05-26', periods=4, freq='W'))
+
+@pytest.mark.parametrize('freq', ['weekly', 'monthly'])
+def test_streamed_mean_matches_in_memory(freq):
+    """Streamed weekly/monthly means weight every row, not every day's mean."""
+    from io import StringIO
+    from App.preprocess import clean_csv_stream
+    rng = np.random.default_rng(0)
+    days = pd.date_range('2024-01-01', periods=45, freq='D')
+    # Uneven orders per day: one big order on some days, many small ones on others
+    rows = [(day, value) for day in days for value in rng.uniform(1, 200, rng.integers(1, 8))]
+    csv = "Order Date,Total Amount\n" + "\n".join(f"{day:%Y-%m-%d},{value:.2f}" for day, value in rows)
+
+    streamed, rows_read = clean_csv_stream(StringIO(csv), chunksize=7, freq=freq, agg='mean')
+    in_memory = clean_data(pd.read_csv(StringIO(csv)), freq=freq, agg='mean')
+
+    assert rows_read == len(rows)
+    assert list(streamed['ds']) == list(in_memory['ds'])
+    assert streamed['y'].tolist() == pytest.approx(in_memory['y'].tolist())
@@ -0,0 +1,61 @@
+import io
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'FlaskBackend'))
+
+from serializers import frame_to_columns, frame_to_records
+
+CSV = b"Date,Sales\n" + b"\n".join(f"2024-01-{d:02d},{100 + d * 7 % 13}".encode() for d in range(1, 21))
+
+@pytest.fixture
+def client():
+    from run import create_app
+    return create_app().test_client()
+
+def test_frame_to_columns_and_records_agree():
+    """Both layouts carry the same JSON-native values."""
+    df = pd.DataFrame({
+        'ds': pd.date_range('2024-01-01', periods=3, freq='D'),
+        'y': [1, 2, 3],
+        'low_confidence': [True, False, True]
+    })
+
+    columns = frame_to_columns(df)
+    records = frame_to_records(df, extra={'_meta': 'x'})
+
+    assert columns == {'ds': ['2024-01-01', '2024-01-02', '2024-01-03'], 'y': [1.0, 2.0, 3.0],
+                       'low_confidence': [True, False, True]}
+    assert records[1] == {'ds': '2024-01-02', 'y': 2.0, 'low_confidence': False, '_meta': 'x'}
+    assert type(records[0]['y']) is float
+
+def test_clean_columnar_sends_metadata_once(client):
+    """The columnar /clean layout has one list per column and no per-row metadata."""
+    rows = client.post('/clean/', data={'file': (io.BytesIO(CSV), 'sales.csv')}).get_json()
+    cols = client.post('/clean/?format=columnar', data={'file': (io.BytesIO(CSV), 'sales.csv')}).get_json()
+
+    assert rows['format'] == 'records'
+    assert '_quality_issues' in rows['data'][0]
+    assert cols['format'] == 'columnar'
+    assert cols['data']['ds'] == [row['ds'] for row in rows['data']]
+    assert cols['data']['y'] == [row['y'] for row in rows['data']]
+    assert cols['data_insights'] == rows['data_insights']
+
+def test_forecast_columnar(client):
+    """/forecast returns the same forecast in either layout."""
+    data = [{'ds': f"2024-01-{d:02d}", 'y': float(100 + d * 7 % 13)} for d in range(1, 21)]
+    rows = client.post('/forecast/', json={'data': data, 'model': 'linear'}).get_json()
+    cols = client.post('/forecast/', json={'data': data, 'model': 'linear', 'format': 'columnar'}).get_json()
+
+    assert set(cols['forecast']) == {'ds', 'yhat', 'yhat_lower', 'yhat_upper', 'low_confidence'}
+    assert cols['forecast']['yhat'] == [row['yhat'] for row in rows['forecast']]
+    assert cols['forecast']['low_confidence'] == [row['low_confidence'] for row in rows['forecast']]
+
+def test_unknown_format_rejected(client):
+    """An unknown layout is a client error."""
+    response = client.post('/clean/?format=xml', data={'file': (io.BytesIO(CSV), 'sales.csv')})
+    assert response.status_code == 400
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from App.preprocess import get_data_insights, validate_data_quality
+from App.stats import series_statistics, seasonality_strength
+
+@pytest.fixture
+def messy_series():
+    """Unsorted dates with a gap, a missing value and an outlier"""
+    rng = np.random.default_rng(0)
+    dates = list(pd.date_range('2024-01-01', periods=60, freq='D')) + [pd.Timestamp('2024-04-15')]
+    y = rng.normal(100, 10, 61)
+    y[5] = np.nan
+    y[30] = 1000
+    df = pd.DataFrame({'ds': dates, 'y': y})
+    return df.sample(frac=1, random_state=0).reset_index(drop=True)
+
+def test_statistics_match_pandas(messy_series):
+    df = messy_series
+    stats = series_statistics(df)
+    ordered = df.sort_values('ds')
+
+    assert stats['rows'] == 61
+    assert stats['missing'] == 1
+    assert stats['mean'] == pytest.approx(df['y'].mean())
+    assert stats['std'] == pytest.approx(df['y'].std())
+    assert stats['min'] == df['y'].min() and stats['max'] == df['y'].max()
+    assert stats['outliers'] == (abs(df['y'] - df['y'].mean()) > 3 * df['y'].std()).sum()
+    assert stats['large_gaps'] == (ordered['ds'].diff().dt.days > 7).sum() == 1
+    np.testing.assert_allclose(stats['weekday_means'], df.groupby(df['ds'].dt.dayofweek)['y'].mean().values)
+    assert stats['first_half_mean'] == pytest.approx(ordered['y'].iloc[:30].mean())
+
+def test_seasonality_strength_needs_two_weekdays():
+    weekly = pd.DataFrame({'ds': pd.date_range('2024-01-07', periods=10, freq='W'), 'y': range(10)})
+    assert np.isnan(seasonality_strength(series_statistics(weekly)))
+
+def test_diagnostics_share_one_pass(messy_series):
+    """Passing precomputed statistics gives the same answers as computing them inline."""
+    stats = series_statistics(messy_series)
+
+    assert validate_data_quality(messy_series, stats) == validate_data_quality(messy_series)
+    assert get_data_insights(messy_series, stats) == get_data_insights(messy_series)
+    assert "Found 1 potential outliers" in validate_data_quality(messy_series, stats)['issues']
@@ -0,0 +1,79 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import App.forecast as forecast
+from App.supervisor import FitCancelled, FitMemoryExceeded, FitTimeout, run_supervised
+
+def make_series(periods=40):
+    return pd.DataFrame({
+        'ds': pd.date_range('2024-01-01', periods=periods, freq='D'),
+        'y': [100 + i + (i % 7) * 3 for i in range(periods)]
+    })
+
+def add(a, b):
+    return a + b
+
+def sleep_forever(*args):
+    time.sleep(60)
+
+def allocate(megabytes):
+    return np.ones(megabytes * 1024 * 1024 // 8).sum()
+
+def fail():
+    raise ValueError("bad series")
+
+HELD = threading.Lock()
+
+def take_held_lock():
+    if not HELD.acquire(timeout=2):
+        raise RuntimeError("lock was copied into the child while held")
+    return 'acquired'
+
+def test_returns_result():
+    assert run_supervised(add, 2, 3, timeout=10) == 5
+
+def test_reraises_function_errors():
+    with pytest.raises(ValueError, match="bad series"):
+        run_supervised(fail, timeout=10)
+
+def test_timeout_kills_child():
+    start = time.monotonic()
+    with pytest.raises(FitTimeout):
+        run_supervised(sleep_forever, timeout=0.3)
+    assert time.monotonic() - start < 5
+
+def test_memory_ceiling():
+    pytest.importorskip('resource')
+    with pytest.raises(FitMemoryExceeded):
+        run_supervised(allocate, 8192, timeout=30, memory_limit_mb=1024)
+
+def test_cancellation():
+    cancel = threading.Event()
+    threading.Timer(0.2, cancel.set).start()
+    with pytest.raises(FitCancelled):
+        run_supervised(sleep_forever, timeout=30, cancel_event=cancel)
+
+def test_child_does_not_inherit_held_locks():
+    """Fits don't start from a fork of this process, so a lock another thread holds can't deadlock them."""
+    holder = threading.Thread(target=HELD.acquire)
+    holder.start()
+    holder.join()
+    try:
+        assert run_supervised(take_held_lock, timeout=30) == 'acquired'
+    finally:
+        HELD.release()
+
+def test_prophet_timeout_falls_back_to_linear(monkeypatch):
+    """A Prophet fit past its deadline is replaced by linear regression and reported in insights."""
+    monkeypatch.setattr(forecast, 'run_prophet', sleep_forever)
+
+    result = forecast.run_forecast(make_series(), 'prophet', 7, timeout=0.3)
+
+    insights = result['insights']
+    assert insights['model_used'] == 'Linear Regression'
+    assert insights['fallback']['reason'] == 'timeout'
+    assert len(result['forecast']) == 7
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from App.forecast import resolve_model_choice, run_forecast
+from App.tournament import run_tournament
+from App.utils import select_model
+
+def make_series(periods=90, weekly=20.0, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(periods)
+    return pd.DataFrame({
+        'ds': pd.date_range('2024-01-01', periods=periods, freq='D'),
+        'y': 100 + 0.2 * t + weekly * np.sin(2 * np.pi * t / 7) + rng.normal(0, 1, periods)
+    })
+
+def test_weekly_series_eliminates_trend_line():
+    """The trend line can't follow a strong weekly cycle and drops out after the first round."""
+    winner, report = run_tournament(make_series(), 7, candidates=['linear', 'lag'])
+
+    assert winner == 'lag'
+    linear = report['candidates']['linear']
+    assert linear['status'] == 'eliminated'
+    assert linear['rounds'] == 1
+    assert report['candidates']['lag']['rounds'] == 3
+    assert report['candidates']['lag']['mae'] < linear['mae']
+
+def test_slow_candidate_stopped_by_budget():
+    """A candidate still fitting when the budget runs out is killed and can't win."""
+    pytest.importorskip('prophet')
+    winner, report = run_tournament(make_series(), 7, candidates=['linear', 'prophet'], budget_seconds=0.01)
+
+    assert winner == 'linear'
+    assert report['candidates']['prophet']['status'] == 'over budget'
+
+def test_auto_records_tournament_in_insights():
+    result = run_forecast(make_series(), 'auto', 7)
+
+    insights = result['insights']
+    tournament = insights['tournament']
+    assert insights['model_selection'] == 'tournament'
+    assert tournament['candidates'][tournament['winner']]['status'] == 'winner'
+    assert all('seconds' in entry and 'mae' in entry for entry in tournament['candidates'].values())
+
+def test_short_series_falls_back_to_heuristic():
+    """With only the trend line eligible there is no race; the shared heuristic decides."""
+    df = make_series(periods=12)
+    result = run_forecast(df, 'auto', 7)
+
+    assert result['insights']['model_selection'] == 'heuristic'
+    assert result['insights']['tournament']['winner'] is None
+    assert resolve_model_choice(df) == select_model(df, 'auto') == 'linear'
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error, mean_squared_error
+
+from App.forecast import run_linear_regression, run_linear_regression_batch
+from App.trend import fit_linear_trend, predict_linear_trend
+
+def sklearn_trend(y, steps):
+    X = np.arange(len(y)).reshape(-1, 1)
+    model = LinearRegression().fit(X, y)
+    fitted = model.predict(X)
+    future = model.predict(np.arange(len(y), len(y) + steps).reshape(-1, 1))
+    return future, mean_absolute_error(y, fitted), np.sqrt(mean_squared_error(y, fitted))
+
+def test_matches_sklearn():
+    """Closed-form slope/intercept, predictions and metrics agree with sklearn."""
+    rng = np.random.default_rng(0)
+    y = 50 + 0.7 * np.arange(200) + rng.normal(0, 5, 200)
+
+    fit = fit_linear_trend(y)
+    future, mae, rmse = sklearn_trend(y, 14)
+
+    np.testing.assert_allclose(predict_linear_trend(fit, 14), future, rtol=1e-10)
+    assert fit['mae'] == pytest.approx(mae, rel=1e-10)
+    assert fit['rmse'] == pytest.approx(rmse, rel=1e-10)
+
+def test_stacked_matrix_matches_row_by_row():
+    """One solve over a (series × time) matrix equals fitting each row separately."""
+    rng = np.random.default_rng(1)
+    Y = rng.normal(100, 10, (25, 60)) + np.arange(60) * rng.normal(0, 1, (25, 1))
+
+    fits = fit_linear_trend(Y)
+    predictions = predict_linear_trend(fits, 7)
+
+    for i in range(len(Y)):
+        single = fit_linear_trend(Y[i])
+        assert fits['slope'][i] == pytest.approx(single['slope'])
+        assert fits['mae'][i] == pytest.approx(single['mae'])
+        np.testing.assert_allclose(predictions[i], predict_linear_trend(single, 7))
+
+def test_nan_values_rejected():
+    with pytest.raises(ValueError, match="NaN"):
+        fit_linear_trend([1.0, np.nan, 3.0])
+
+def test_batch_output_matches_single_series():
+    """Batched linear forecasts are identical to per-series run_linear_regression output."""
+    series = {
+        f's{i}': pd.DataFrame({
+            'ds': pd.date_range('2024-01-01', periods=periods, freq='D'),
+            'y': [10 + i * k + (k % 5) for k in range(periods)]
+        })
+        for i, periods in enumerate([20, 20, 35])
+    }
+
+    batch = run_linear_regression_batch(series, forecast_days=5)
+
+    for name, df in series.items():
+        forecast_df, insights = run_linear_regression(df, forecast_days=5)
+        pd.testing.assert_frame_equal(batch[name][0], forecast_df)
+        assert batch[name][1] == insights